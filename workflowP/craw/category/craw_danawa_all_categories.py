@@ -1,9 +1,13 @@
 # craw/category/craw_danawa_all_categories.py
+import argparse
 import logging
+import os
 from pathlib import Path
 import time
 import json
 import csv
+import sys
+from multiprocessing import Pool, Value
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -19,11 +23,17 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 CSV_PATH = DATA_DIR / "danawa_category_rows.csv"
 JSON_PATH = DATA_DIR / "danawa_category_rows.json"
+PARITY_PATH = DATA_DIR / "metrics" / "category_parity.json"
+
+# 카테고리 트리(정수 노드 ID)/브라우저 캐시 모듈은 아이템 단계와 공유한다
+sys.path.insert(0, str(PROJ_ROOT / "craw" / "items"))
+import category_tree  # noqa: E402
+import browser_cache  # noqa: E402
 
 # ================== 로그 설정 ==================
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
+    format="%(asctime)s [%(levelname)s][%(processName)s] %(message)s",
     datefmt="%H:%M:%S",
 )
 logger = logging.getLogger(__name__)
@@ -32,6 +42,8 @@ logger = logging.getLogger(__name__)
 HOVER_DELAY = 0.05          # hover 후 아주 짧은 대기
 WAIT_TIMEOUT = 1            # 패널 표시 대기 최대 시간
 WAIT_POLL_INTERVAL = 0.05   # 패널 탐색 주기
+# 1차 메뉴를 나눠 처리할 브라우저 워커 수 (1이면 순차 실행, 실사이트 결과 비교 전까지 기본 1)
+CATEGORY_WORKERS = max(1, int(os.environ.get("CATEGORY_WORKERS", "1")))
 
 # ================== 유틸 함수 ==================
 def clean_category_text(driver, el):
@@ -148,105 +160,205 @@ def wait_panel(driver, el, class_keywords, timeout=WAIT_TIMEOUT, poll_interval=W
         time.sleep(poll_interval)
     return None
 
-# ================== 메인 ==================
-def main():
-    logger.info("🔍 Danawa 전체 카테고리 크롤링 시작")
+# ================== 크롤 ==================
+def create_driver(cache_dir=None):
     options = Options()
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
     options.add_argument("--window-size=1400,1000")
     options.add_argument("--headless=new")
+    if cache_dir is not None:
+        for arg in browser_cache.chrome_args(cache_dir):
+            options.add_argument(arg)
 
     driver = webdriver.Chrome(options=options)
-    actions = ActionChains(driver)
     driver.get("https://www.danawa.com/")
     driver.implicitly_wait(3)
+    return driver
+
+def open_browser(name):
+    """공유 캐시 복제본(BROWSER_CACHE=1)으로 드라이버 생성. 반환: (driver, 캐시 슬롯 또는 None)"""
+    slot = browser_cache.CacheSlot(f"{name}-{os.getpid()}") if browser_cache.BROWSER_CACHE else None
+    driver = create_driver(slot.acquire() if slot else None)
+    if slot:
+        stats = browser_cache.summarize(browser_cache.page_stats(driver) or [0, 0, 0, 0])
+        if stats["cache_requests"]:
+            logger.info(
+                f"🗄️ {name}: 첫 페이지 캐시 적중 {stats['cache_hits']}/{stats['cache_requests']}개 요청, "
+                f"절약 {stats['cache_saved_mb']}MB"
+            )
+    return driver, slot
+
+def close_browser(driver, slot):
+    driver.quit()
+    if slot:
+        slot.release()
+
+def find_first_menus(driver):
+    return driver.find_elements(By.CSS_SELECTOR, "#sectionLayer > li > a")
+
+def menu_key(driver, el):
+    """1차 메뉴 식별자 (href, 이름) — 브라우저마다 요소 순서가 달라도 같은 메뉴를 찾기 위함"""
+    try:
+        href = (el.get_attribute("href") or "").strip()
+    except StaleElementReferenceException:
+        href = ""
+    return href, clean_category_text(driver, el)
+
+def list_first_menus():
+    """부모 프로세스에서 1차 메뉴 식별자 목록을 한 번만 읽는다 (이 순서로 결과를 합침)"""
+    driver, slot = open_browser("category-menus")
+    try:
+        return [menu_key(driver, el) for el in find_first_menus(driver)]
+    finally:
+        close_browser(driver, slot)
 
+def crawl_first_menu(driver, actions, first_menu):
+    """1차 메뉴 하나의 하위 트리를 hover 로 펼치며 행 목록을 추출"""
     rows = []
     try:
-        first_menus = driver.find_elements(By.CSS_SELECTOR, "#sectionLayer > li > a")
-        for first_menu in first_menus:
-            try:
-                first_text = clean_category_text(driver, first_menu)
-            except StaleElementReferenceException:
-                continue
-            if not first_text:
+        first_text = clean_category_text(driver, first_menu)
+    except StaleElementReferenceException:
+        return rows
+    if not first_text:
+        return rows
+
+    log_category_path(first=first_text)
+
+    # 1차 → 2차
+    hover(actions, first_menu)
+    second_panel = wait_panel(driver, first_menu, ["category__2depth"])
+    if not second_panel:
+        return rows
+
+    second_items = visible_only(second_panel.find_elements(By.CSS_SELECTOR, "ul > li > a"))
+    for second in second_items:
+        try:
+            second_text = clean_category_text(driver, second)
+            if not second_text:
                 continue
+            log_category_path(first=first_text, second=second_text)
 
-            log_category_path(first=first_text)
+            # 2차 → 3차
+            hover(actions, second)
+            third_panel = wait_panel(driver, second, ["category__3depth"])
 
-            # 1차 → 2차
-            hover(actions, first_menu)
-            second_panel = wait_panel(driver, first_menu, ["category__2depth"])
-            if not second_panel:
+            if not third_panel:
+                href = (second.get_attribute("href") or "").strip()
+                rows.append({"1차": first_text, "2차": second_text, "3차": "", "4차": "", "link": href})
+                log_category_path(first=first_text, second=second_text, href=href)
                 continue
 
-            second_items = visible_only(second_panel.find_elements(By.CSS_SELECTOR, "ul > li > a"))
-            for second in second_items:
+            third_items = visible_only(third_panel.find_elements(By.CSS_SELECTOR, "ul > li > a"))
+            for third in third_items:
                 try:
-                    second_text = clean_category_text(driver, second)
-                    if not second_text:
+                    third_text = clean_category_text(driver, third)
+                    if not third_text:
                         continue
-                    log_category_path(first=first_text, second=second_text)
+                    log_category_path(first=first_text, second=second_text, third=third_text)
 
-                    # 2차 → 3차
-                    hover(actions, second)
-                    third_panel = wait_panel(driver, second, ["category__3depth"])
+                    # 3차 → 4차
+                    hover(actions, third)
+                    fourth_panel = wait_panel(driver, third, ["category__4depth"])
 
-                    if not third_panel:
-                        href = (second.get_attribute("href") or "").strip()
-                        rows.append({"1차": first_text, "2차": second_text, "3차": "", "4차": "", "link": href})
-                        log_category_path(first=first_text, second=second_text, href=href)
+                    if not fourth_panel:
+                        href = (third.get_attribute("href") or "").strip()
+                        rows.append(
+                            {"1차": first_text, "2차": second_text, "3차": third_text, "4차": "", "link": href}
+                        )
+                        log_category_path(first=first_text, second=second_text, third=third_text, href=href)
                         continue
 
-                    third_items = visible_only(third_panel.find_elements(By.CSS_SELECTOR, "ul > li > a"))
-                    for third in third_items:
-                        try:
-                            third_text = clean_category_text(driver, third)
-                            if not third_text:
-                                continue
-                            log_category_path(first=first_text, second=second_text, third=third_text)
-
-                            # 3차 → 4차
-                            hover(actions, third)
-                            fourth_panel = wait_panel(driver, third, ["category__4depth"])
-
-                            if not fourth_panel:
-                                href = (third.get_attribute("href") or "").strip()
-                                rows.append(
-                                    {"1차": first_text, "2차": second_text, "3차": third_text, "4차": "", "link": href}
-                                )
-                                log_category_path(first=first_text, second=second_text, third=third_text, href=href)
-                                continue
-
-                            fourth_items = visible_only(fourth_panel.find_elements(By.CSS_SELECTOR, "ul > li > a"))
-                            for fourth in fourth_items:
-                                fourth_text = clean_category_text(driver, fourth)
-                                if not fourth_text:
-                                    continue
-                                href = (fourth.get_attribute("href") or "").strip()
-                                rows.append(
-                                    {"1차": first_text, "2차": second_text, "3차": third_text, "4차": fourth_text, "link": href}
-                                )
-                                log_category_path(
-                                    first=first_text,
-                                    second=second_text,
-                                    third=third_text,
-                                    fourth=fourth_text,
-                                    href=href,
-                                )
-                        except StaleElementReferenceException:
-                            logger.debug("3차 카테고리 요소가 갱신되어 건너뜀")
+                    fourth_items = visible_only(fourth_panel.find_elements(By.CSS_SELECTOR, "ul > li > a"))
+                    for fourth in fourth_items:
+                        fourth_text = clean_category_text(driver, fourth)
+                        if not fourth_text:
                             continue
+                        href = (fourth.get_attribute("href") or "").strip()
+                        rows.append(
+                            {"1차": first_text, "2차": second_text, "3차": third_text, "4차": fourth_text, "link": href}
+                        )
+                        log_category_path(
+                            first=first_text,
+                            second=second_text,
+                            third=third_text,
+                            fourth=fourth_text,
+                            href=href,
+                        )
                 except StaleElementReferenceException:
-                    logger.debug("2차 카테고리 요소가 갱신되어 건너뜀")
+                    logger.debug("3차 카테고리 요소가 갱신되어 건너뜀")
                     continue
+        except StaleElementReferenceException:
+            logger.debug("2차 카테고리 요소가 갱신되어 건너뜀")
+            continue
+    return rows
 
+def crawl_sequential():
+    """브라우저 하나로 1차 메뉴를 순서대로 처리"""
+    driver, slot = open_browser("category")
+    actions = ActionChains(driver)
+    rows = []
+    try:
+        for first_menu in find_first_menus(driver):
+            rows.extend(crawl_first_menu(driver, actions, first_menu))
     finally:
-        driver.quit()
+        close_browser(driver, slot)
+    return rows
 
-    # 저장
+# 병렬 워커가 공유하는 "다음에 처리할 1차 메뉴 번호"와 부모가 읽은 메뉴 식별자 목록
+_NEXT_MENU = None
+_MENU_KEYS = ()
+
+def _init_worker(counter, menu_keys):
+    global _NEXT_MENU, _MENU_KEYS
+    _NEXT_MENU = counter
+    _MENU_KEYS = menu_keys
+
+def crawl_worker(worker_no):
+    """
+    워커 하나가 자기 브라우저로 1차 메뉴를 번호 순으로 하나씩 가져가 처리한다(동적 분배).
+    번호는 부모의 메뉴 목록 기준이고, 자기 페이지에서는 (href, 이름)으로 같은 메뉴를 찾는다.
+    반환: [(메뉴 번호, 행 목록)]
+    """
+    driver, slot = open_browser(f"category{worker_no}")
+    actions = ActionChains(driver)
+    done = []
+    try:
+        by_key, by_text = {}, {}
+        for el in find_first_menus(driver):
+            href, text = menu_key(driver, el)
+            by_key.setdefault((href, text), el)
+            by_text.setdefault(text, el)
+        while True:
+            with _NEXT_MENU.get_lock():
+                index = _NEXT_MENU.value
+                _NEXT_MENU.value += 1
+            if index >= len(_MENU_KEYS):
+                break
+            href, text = _MENU_KEYS[index]
+            menu = by_key.get((href, text)) or (by_text.get(text) if text else None)
+            if menu is None:
+                logger.warning(f"워커 {worker_no}: 1차 메뉴를 찾지 못해 건너뜀 ({text or href})")
+                done.append((index, []))
+                continue
+            done.append((index, crawl_first_menu(driver, actions, menu)))
+    finally:
+        close_browser(driver, slot)
+    logger.info(f"워커 {worker_no}: 1차 메뉴 {len(done)}개 처리")
+    return done
+
+def crawl_parallel(workers):
+    """1차 메뉴를 여러 브라우저 워커에 나눠 처리하고 부모가 읽은 메뉴 순서로 합친다"""
+    menu_keys = list_first_menus()
+    logger.info(f"1차 메뉴 {len(menu_keys)}개를 워커 {workers}개에 분배")
+    counter = Value("i", 0)
+    with Pool(workers, initializer=_init_worker, initargs=(counter, menu_keys)) as pool:
+        partials = pool.map(crawl_worker, range(workers))
+    ordered = sorted((item for partial in partials for item in partial), key=lambda item: item[0])
+    return [row for _, menu_rows in ordered for row in menu_rows]
+
+def save_rows(rows):
     headers = ["1차", "2차", "3차", "4차", "link"]
     with CSV_PATH.open("w", encoding="utf-8-sig", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=headers)
@@ -256,10 +368,86 @@ def main():
     with JSON_PATH.open("w", encoding="utf-8") as f:
         json.dump(rows, f, indent=2, ensure_ascii=False)
 
+    # 기존 노드 ID 를 유지한 채 트리 갱신 (아이템 결과가 노드 ID 로 경로를 참조)
+    tree = category_tree.rebuild(rows, CSV_PATH)
+    logger.info(f"🌳 카테고리 트리: 노드 {len(tree)}개, 이름 {len(tree.names)}개 → {category_tree.TREE_PATH}")
+
+# ================== 병렬/순차 결과 비교 ==================
+ROW_KEYS = ("1차", "2차", "3차", "4차", "link")
+PARITY_SAMPLE = 50   # 리포트에 남길 차이 행 수
+
+def compare_rows(sequential, parallel):
+    """순차/병렬 행 목록 비교: 행 집합과 순서가 모두 같아야 identical"""
+    seq = [tuple(r.get(k, "") for k in ROW_KEYS) for r in sequential]
+    par = [tuple(r.get(k, "") for k in ROW_KEYS) for r in parallel]
+    only_seq, only_par = sorted(set(seq) - set(par)), sorted(set(par) - set(seq))
+    return {
+        "sequential_rows": len(seq),
+        "parallel_rows": len(par),
+        "only_sequential": len(only_seq),
+        "only_parallel": len(only_par),
+        "same_order": seq == par,
+        "identical": seq == par,
+        "only_sequential_sample": [dict(zip(ROW_KEYS, r)) for r in only_seq[:PARITY_SAMPLE]],
+        "only_parallel_sample": [dict(zip(ROW_KEYS, r)) for r in only_par[:PARITY_SAMPLE]],
+    }
+
+def check_parity(workers):
+    """
+    같은 시점에 순차 → 병렬로 한 번씩 크롤해 결과를 비교한다 (CSV/JSON/트리는 건드리지 않음).
+    실사이트에서 identical 이 확인되기 전까지 CATEGORY_WORKERS 기본값은 1로 둔다.
+    """
+    started = time.perf_counter()
+    sequential = crawl_sequential()
+    sequential_s = time.perf_counter() - started
+    started = time.perf_counter()
+    parallel = crawl_parallel(max(2, workers))
+    parallel_s = time.perf_counter() - started
+
+    report = compare_rows(sequential, parallel)
+    report.update({
+        "workers": max(2, workers),
+        "sequential_s": round(sequential_s, 1),
+        "parallel_s": round(parallel_s, 1),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    PARITY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with PARITY_PATH.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
     logger.info(
-        f"✅ 완료: 총 {len(rows)}개 항목 | CSV 저장 경로: {CSV_PATH} | JSON 저장 경로: {JSON_PATH}"
+        f"{'✅' if report['identical'] else '❌'} 순차 {report['sequential_rows']}행 ({sequential_s:.0f}s) vs "
+        f"병렬 {report['parallel_rows']}행 ({parallel_s:.0f}s, 워커 {report['workers']}개): "
+        f"순차에만 {report['only_sequential']}행, 병렬에만 {report['only_parallel']}행, "
+        f"순서 {'같음' if report['same_order'] else '다름'} → {PARITY_PATH}"
+    )
+    return report["identical"]
+
+# ================== 메인 ==================
+def main(workers=CATEGORY_WORKERS):
+    logger.info(f"🔍 Danawa 전체 카테고리 크롤링 시작 (워커 {workers}개)")
+    started = time.perf_counter()
+    if browser_cache.BROWSER_CACHE:
+        browser_cache.sweep_clones()
+    # 워커 1개(기본)는 메뉴 목록용 브라우저 없이 기존과 같은 단일 브라우저 순차 실행
+    rows = crawl_parallel(workers) if workers > 1 else crawl_sequential()
+
+    # 저장
+    save_rows(rows)
+
+    logger.info(
+        f"✅ 완료: 총 {len(rows)}개 항목 ({time.perf_counter() - started:.1f}s) | "
+        f"CSV 저장 경로: {CSV_PATH} | JSON 저장 경로: {JSON_PATH}"
     )
 
 if __name__ == "__main__":
     logger.info("================= Danawa 카테고리 크롤러 시작 =================")
-    main()
+    parser = argparse.ArgumentParser(description="다나와 전체 카테고리 크롤러")
+    parser.add_argument("--workers", type=int, default=CATEGORY_WORKERS, help="브라우저 워커 수 (1이면 순차)")
+    parser.add_argument(
+        "--check-parity", action="store_true",
+        help="순차/병렬(--workers, 최소 2) 결과를 비교해 리포트만 저장 (다르면 종료 코드 1)",
+    )
+    cli_args = parser.parse_args()
+    if cli_args.check_parity:
+        sys.exit(0 if check_parity(cli_args.workers) else 1)
+    main(workers=max(1, cli_args.workers))
@@ -2,6 +2,8 @@
 from pathlib import Path
 import csv
 
+import category_tree
+
 # =============== 경로 설정 ===============
 THIS_FILE = Path(__file__).resolve()
 PROJ_ROOT = THIS_FILE.parents[2]                          # GiftStandard/
@@ -11,24 +13,39 @@ CSV_PATH = PROJ_ROOT / "craw" / "data" / "danawa_category_rows.csv"
 DANAWA_LIST_PREFIX = "https://prod.danawa.com/list/?cate="
 EXCLUDE_FIRST_CATEGORY = "로켓배송관"   # 1차 == 이 값일 때 제외
 
+def _iter_csv_rows():
+    with CSV_PATH.open("r", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+def load_tree():
+    """
+    카테고리 트리 로드. 트리가 없거나 CSV 와 내용이 다르면(수동 수정 등) CSV 로 다시 만들어 저장한다.
+    CSV 도 트리도 없으면 None.
+    """
+    tree = category_tree.load()
+    if category_tree.is_fresh(tree, CSV_PATH) or not CSV_PATH.exists():
+        return tree
+    return category_tree.rebuild(list(_iter_csv_rows()), CSV_PATH)
+
 def iter_rows(filter_prefix: str = DANAWA_LIST_PREFIX):
     """
-    CSV_PATH에서 행을 읽고:
+    카테고리 트리(없으면 CSV_PATH)에서 행을 읽고:
       1) link 가 filter_prefix 로 시작하지 않으면 제외
       2) 1차 카테고리가 EXCLUDE_FIRST_CATEGORY 와 같으면 제외
+    트리에서 읽은 행에는 노드 ID("node")가 함께 들어 있다.
     """
-    with CSV_PATH.open("r", encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            link = row.get("link", "")
-            first_cat = row.get("1차", "")
-            # 조건 1: prefix 확인
-            if filter_prefix and not link.startswith(filter_prefix):
-                continue
-            # 조건 2: 특정 1차 카테고리 제외
-            # if first_cat == EXCLUDE_FIRST_CATEGORY:
-            #     continue
-            yield row
+    tree = load_tree()
+    rows = tree.iter_rows() if tree is not None else _iter_csv_rows()
+    for row in rows:
+        link = row.get("link", "")
+        first_cat = row.get("1차", "")
+        # 조건 1: prefix 확인
+        if filter_prefix and not link.startswith(filter_prefix):
+            continue
+        # 조건 2: 특정 1차 카테고리 제외
+        # if first_cat == EXCLUDE_FIRST_CATEGORY:
+        #     continue
+        yield row
 
 def to_list(filter_prefix: str = DANAWA_LIST_PREFIX):
     return list(iter_rows(filter_prefix))
@@ -1,32 +1,66 @@
+import argparse
+import hashlib
 import logging
 import json
 import re
 import time
 import os
 import datetime
+import signal
+import threading
+import itertools
+import zlib
 from selenium.webdriver.chrome.service import Service
-from pathlib import Path
-from multiprocessing import Pool, cpu_count, Manager
+from multiprocessing import Pool, current_process
+from multiprocessing.pool import ThreadPool
+from multiprocessing.util import Finalize
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from A_link_filter import to_list
+from result_store import (
+    OUTPUT_DIR,
+    STATUS_PATH,
+    LEGACY_JSON_PATH,
+    parse_shard_spec,
+    link_in_shard,
+    shard_output_dir,
+    shard_status_path,
+    read_existing_results,
+    merge_results,
+    write_sharded_results,
+    part_bytes,
+    write_status,
+    read_page_fingerprints,
+    write_page_fingerprints,
+    PAGE_FINGERPRINTS_FILE,
+    read_negative_cache,
+    write_negative_cache,
+    read_link_costs,
+    write_link_costs,
+    LINK_COSTS_FILE,
+    NEGATIVE_CACHE_FILE,
+)
+import rank_index
+import search_index
+import product_index
+import category_tree
+import link_scheduler
+import browser_cache
+import compact_records
+from browser_lifecycle import (
+    BrowserSession,
+    OWNER_ENV,
+    OWNER_SWITCH,
+    reap_orphans,
+    reset_curves,
+    summarize_curves,
+    tree_rss_mb,
+)
 
 # ================== 상수 ==================
-THIS_FILE = Path(__file__).resolve()
-PROJ_ROOT = THIS_FILE.parents[2]
-DATA_DIR = PROJ_ROOT / "craw" / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-OUTPUT_DIR = DATA_DIR / "quick_text_probe_parallel"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-LEGACY_JSON_PATH = DATA_DIR / "quick_text_probe_parallel.json"
-MANIFEST_PATH = OUTPUT_DIR / "manifest.json"
-STATE_PATH = OUTPUT_DIR / "state.json"
-STATUS_PATH = DATA_DIR / "quick_text_probe_parallel.status.json"
-JSON_PART_RECORDS = max(1, int(os.environ.get("JSON_PART_RECORDS", "500")))
-
 PAGELOAD_TIMEOUT = int(os.environ.get("PAGELOAD_TIMEOUT", "10"))
 IMPLICIT_WAIT = int(os.environ.get("IMPLICIT_WAIT", "2"))
 WAIT_TIMEOUT = int(os.environ.get("WAIT_TIMEOUT", "10"))
@@ -35,6 +69,26 @@ WORKERS = int(os.environ.get("WORKERS", "4"))  # 병렬 실행 개수
 CHECKPOINT_N = int(os.environ.get("CHECKPOINT_N", "10"))  # 중간 저장 단위
 # 배치(청크) 크기: 기본 10 → 10개 단위로 부모가 결과 수신/체크포인트 가능
 BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "10"))
+# 브라우저 소유자 pid: 최상위 프로세스에서 정해지고 워커 프로세스(와 chromedriver)는 환경변수로 물려받는다
+OWNER_PID = os.environ.setdefault(OWNER_ENV, str(os.getpid()))
+# 다중 러너 분할 실행: "i/N" (예: 0/4). 비어 있으면 전체 링크를 단일 출력에 저장
+CRAWL_SHARD = os.environ.get("CRAWL_SHARD", "").strip()
+# 완료된 링크 재방문 (목록 지문이 같으면 추출/저장 없이 "unchanged" 처리)
+# auto(기본): 미완료 링크가 없을 때만 완료 링크를 RECRAWL_SLICES 조각 중 하나씩 돌아가며 재방문
+# 1: 매 실행 완료 링크 전체 재방문 / 0: 재방문하지 않음
+RECRAWL_COMPLETED = os.environ.get("RECRAWL_COMPLETED", "auto").strip().lower()
+RECRAWL_SLICES = max(1, int(os.environ.get("RECRAWL_SLICES", "3")))
+# 목록 페이지 지문 캐시 사용 여부
+PAGE_FINGERPRINT = os.environ.get("PAGE_FINGERPRINT", "1") != "0"
+# 상품 목록이 없던 링크는 TTL 동안 건너뛰고, 이후 짧은 대기 시간으로 다시 확인한다 (0이면 비활성)
+NEGATIVE_CACHE_TTL_HOURS = float(os.environ.get("NEGATIVE_CACHE_TTL_HOURS", "72"))
+NEGATIVE_PROBE_TIMEOUT = int(os.environ.get("NEGATIVE_PROBE_TIMEOUT", "3"))
+# 브라우저 워커 실행 방식: process(프로세스 Pool, 기본) | thread(한 프로세스 안의 스레드 풀)
+ITEM_EXECUTOR = os.environ.get("ITEM_EXECUTOR", "process").strip().lower()
+EXECUTORS = ("process", "thread")
+# 더블 버퍼링: 현재 탭을 추출하는 동안 두 번째 탭에서 배치의 다음 링크를 미리 로드
+PREFETCH_NEXT = os.environ.get("PREFETCH_NEXT", "0") == "1"
+PAGE_SETTLE_S = 2.0   # 로드 직후 스크립트 렌더링 대기 (미리 로드한 탭은 이미 지난 시간만큼 차감)
 
 LIST_SELECTORS = [
     "div.main_prodlist.main_prodlist_list > ul > li"
@@ -110,8 +164,8 @@ def short_exception(exc: Exception) -> str:
         text = exc.__class__.__name__ if exc else ""
     return text
 
-def ensure_list_view(driver, page_url=None):
-    """목록형(리스트) 보기로 전환"""
+def ensure_list_view(driver, page_url=None, timeout=WAIT_TIMEOUT):
+    """목록형(리스트) 보기로 전환. 전환 실패는 False, 보기 탭 자체가 없으면 None."""
     if not page_url:
         try:
             page_url = driver.current_url
@@ -120,12 +174,12 @@ def ensure_list_view(driver, page_url=None):
     url_for_log = page_url or "<unknown>"
 
     try:
-        list_button = WebDriverWait(driver, WAIT_TIMEOUT).until(
+        list_button = WebDriverWait(driver, timeout).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, LIST_VIEW_BUTTON_SELECTOR))
         )
     except Exception as exc:
         log.warning("목록형 보기 탭을 찾지 못했습니다 (url=%s): %s", url_for_log, short_exception(exc))
-        return False
+        return None
 
     try:
         current_class = list_button.get_attribute("class") or ""
@@ -142,18 +196,18 @@ def ensure_list_view(driver, page_url=None):
             except Exception:
                 return False
 
-        WebDriverWait(driver, WAIT_TIMEOUT).until(_list_view_selected)
+        WebDriverWait(driver, timeout).until(_list_view_selected)
         time.sleep(0.5)
         return True
     except Exception as exc:
         log.warning("목록형 보기 전환 실패 (url=%s): %s", url_for_log, short_exception(exc))
         return False
 
-def find_product_items(driver):
+def find_product_items(driver, timeout=WAIT_TIMEOUT):
     """상품 리스트 탐색 (로드 대기 포함)"""
     for sel in LIST_SELECTORS:
         try:
-            WebDriverWait(driver, WAIT_TIMEOUT).until(
+            WebDriverWait(driver, timeout).until(
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, sel))
             )
             els = driver.find_elements(By.CSS_SELECTOR, sel)
@@ -163,26 +217,108 @@ def find_product_items(driver):
             pass
     return [], ""
 
-# ================== 워커 함수 ==================
-def worker(args):
-    """링크 리스트 한 묶음을 병렬로 크롤링"""
-    if len(args) == 4:
-        link_batch, start_index, total, skipped = args
-    else:
-        link_batch, start_index, total = args
-        skipped = 0
+# 목록 상위 30개 상품의 (링크, 가격, 리뷰 수)를 한 번의 스크립트 호출로 읽는다
+PAGE_FINGERPRINT_JS = """
+return Array.prototype.slice.call(arguments[0], 0, 30).map(function (el) {
+    var a = el.querySelector('div.prod_main_info > div.prod_info > p > a');
+    var p = el.querySelector('div.prod_main_info > div.prod_pricelist > ul > li p.price_sect > a > strong');
+    var r = el.querySelector('div.prod_info > div.prod_sub_info div.text__review > span.text__number');
+    return [a ? a.href : '', p ? p.textContent : '', r ? r.textContent : ''];
+});
+"""
 
-    progress_total = total - skipped
-    if progress_total <= 0:
-        progress_total = len(link_batch) or 1
+def page_fingerprint(driver, items):
+    """목록 페이지 지문: 순서대로 나열한 상품 코드/가격/리뷰 수의 해시 (실패 시 None)"""
+    try:
+        rows = driver.execute_script(PAGE_FINGERPRINT_JS, items)
+    except Exception as exc:
+        log.debug("페이지 지문 계산 실패: %s", short_exception(exc))
+        return None
+    if not rows:
+        return None
+    digest = hashlib.sha1()
+    for href, price, reviews in rows:
+        digest.update(
+            f"{product_index.product_id(href) or href}\x1f{clean_text(price)}\x1f{clean_text(reviews)}\n".encode("utf-8")
+        )
+    return digest.hexdigest()
 
-    if skipped:
-        progress_total_display = f"{total - skipped}"
-    else:
-        progress_total_display = str(progress_total)
-    results = []
+# ================== 탭 파이프라인 ==================
+class TabPrefetcher:
+    """
+    브라우저 하나에 탭 두 개를 두고, 현재 탭을 추출하는 동안 다른 탭에서 다음 링크를 미리 로드한다.
+    open() 은 미리 로드한 탭이 있으면 그 탭으로 전환해 로드 완료만 기다리고, 쓰던 탭은 다음 미리 로드에 쓴다.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.spare = None     # 다음 링크를 로드할 탭 핸들
+        self.pending = None   # (링크, 탭 핸들, 시작 시각)
+
+    def prefetch(self, link):
+        driver = self.driver
+        current = None
+        try:
+            current = driver.current_window_handle
+            if self.spare is None or self.spare not in driver.window_handles:
+                driver.switch_to.new_window("tab")
+                self.spare = driver.current_window_handle
+            else:
+                driver.switch_to.window(self.spare)
+            # driver.get 과 달리 window.location 대입은 로드 완료를 기다리지 않고 바로 반환된다
+            driver.execute_script("window.location.href = arguments[0];", link)
+            driver.switch_to.window(current)
+            self.pending = (link, self.spare, time.perf_counter())
+        except Exception as exc:
+            log.debug("다음 링크 미리 로드 실패: %s", short_exception(exc))
+            self.pending = None
+            if current is not None:
+                try:
+                    driver.switch_to.window(current)
+                except Exception:
+                    pass
+
+    def open(self, link):
+        """link 를 연다. 미리 로드한 탭을 썼으면 미리 로드 시작 후 경과 초, 아니면 None."""
+        driver = self.driver
+        pending, self.pending = self.pending, None
+        if pending and pending[0] == link:
+            _, handle, started = pending
+            try:
+                previous = driver.current_window_handle
+                driver.switch_to.window(handle)
+                self.spare = previous
+                WebDriverWait(driver, PAGELOAD_TIMEOUT, poll_frequency=0.1).until(
+                    lambda d: d.execute_script("return document.readyState") == "complete"
+                )
+                return time.perf_counter() - started
+            except Exception as exc:
+                log.debug("미리 로드한 탭 사용 실패, 직접 로드: %s", short_exception(exc))
+        driver.get(link)
+        return None
+
+# ================== 드라이버 ==================
+# 워커 프로세스마다 BrowserSession 하나를 유지한다.
+# 데몬(warm) 모드에서는 배치 간 드라이버를 재사용하고, 아니면 배치마다 종료한다.
+class _WorkerState(threading.local):
+    """워커(프로세스 또는 스레드)별 브라우저 세션"""
+    warm = False
+    session = None
+    shared = False   # thread 실행기: 풀 종료 시 close_thread_sessions 가 정리
+    prefetcher = None
 
-    # 크롬 옵션 설정
+_SESSION = _WorkerState()
+# thread 실행기에서 만들어진 세션 (풀 종료 시 일괄 정리)
+_THREAD_SESSIONS = []
+_THREAD_SESSIONS_LOCK = threading.Lock()
+_THREAD_NO = itertools.count(1)
+# 여러 스레드가 동시에 크롬/chromedriver 를 띄우면 시작이 느려지거나 실패할 수 있어 직렬화
+_DRIVER_START_LOCK = threading.Lock()
+# 기존 결과의 {상품 ID: 지문}. Pool initializer 로 받아 변경 없는 상품의 상세 파싱을 건너뛴다.
+_KNOWN_PRODUCTS = {}
+
+def create_driver(cache_dir=None):
+    """크롬 옵션 설정 후 WebDriver 생성 (cache_dir: 공유 캐시의 워커 복제본)"""
     service = Service(log_path=os.devnull)
     options = Options()
     options.add_argument("--no-sandbox")
@@ -201,6 +337,16 @@ def worker(args):
     options.add_argument("--no-default-browser-check")
     options.add_argument("--no-first-run")
     options.add_argument("--mute-audio")
+    if PREFETCH_NEXT:
+        # 뒤에서 로드 중인 탭이 타이머/렌더링 제한을 받지 않도록
+        options.add_argument("--disable-background-timer-throttling")
+        options.add_argument("--disable-renderer-backgrounding")
+        options.add_argument("--disable-backgrounding-occluded-windows")
+    if cache_dir is not None:
+        for arg in browser_cache.chrome_args(cache_dir):
+            options.add_argument(arg)
+    # 부모 프로세스가 고아 브라우저를 찾아 정리할 수 있도록 소유자 표식을 남긴다
+    options.add_argument(f"{OWNER_SWITCH}={OWNER_PID}")
 
     options.add_experimental_option("excludeSwitches", [
         "enable-logging",
@@ -209,236 +355,376 @@ def worker(args):
     ])
     options.add_experimental_option("useAutomationExtension", False)
 
-    driver = webdriver.Chrome(service=service, options=options)
+    with _DRIVER_START_LOCK:
+        driver = webdriver.Chrome(service=service, options=options)
     driver.set_page_load_timeout(PAGELOAD_TIMEOUT)
     driver.implicitly_wait(IMPLICIT_WAIT)
+    return driver
 
-    # 진행도 출력 폭 계산 (예: 1250 -> 폭 5 에 맞춰 우측 언더스코어 패딩)
-    width = max(5, len(str(progress_total)))
+def _close_session():
+    session = _SESSION.session
+    if session is not None:
+        session.close()
 
-    for idx, r in enumerate(link_batch, start=0):
-        cur = start_index + idx
-        cur_disp = f"{cur}{' ' * (width - len(str(cur)))}"
-        prog_str = f"진행도 [{cur_disp}/ {progress_total_display}]"
-        link = r.get("link")
-        path = [r.get(f"{i}차", "") for i in range(1, 5)]
-        result = {"link": link, "path": path, "ok": False, "products": []}
+def init_known_products(known=None):
+    """Pool initializer: 재파싱 생략에 쓸 기존 상품 지문 설정"""
+    _KNOWN_PRODUCTS.clear()
+    if known and product_index.PRODUCT_SKIP_KNOWN:
+        _KNOWN_PRODUCTS.update(known)
 
-        try:
-            driver.get(link)
-            time.sleep(2)
+def warm_worker_init(known=None):
+    """
+    Pool initializer: 이 프로세스의 드라이버를 배치 간에 유지한다.
+    정상 종료(pool.close/join)와 SIGTERM(pool.terminate) 모두에서 드라이버를 정리한다.
+    SIGTERM 에는 먼저 설치된 핸들러(crawl_profiler 의 샘플 저장 등)가 있으면 드라이버 정리 후 이어서 호출한다.
+    """
+    init_known_products(known)
+    _SESSION.warm = True
+    Finalize(None, _close_session, exitpriority=10)
+    try:
+        previous = signal.getsignal(signal.SIGTERM)
+    except (ValueError, AttributeError):
+        previous = None
 
-            ensure_list_view(driver, page_url=link)
+    def _on_term(signum, frame):
+        _close_session()
+        if callable(previous):
+            previous(signum, frame)
+        os._exit(0)
 
-            # 상품 리스트 탐색
-            items, used_sel = find_product_items(driver)
-            if not items:
-                continue
+    try:
+        signal.signal(signal.SIGTERM, _on_term)
+    except (ValueError, AttributeError):
+        pass
 
-            for item in items[:30]:  # 최대 30개
-                try:
-                    # ================== 이미지 ==================
-                    img_el = item.find_element(
-                        By.CSS_SELECTOR,
-                        "div.prod_main_info > div.thumb_image > a.thumb_link > img"
-                    )
-                    image = img_el.get_attribute("data-original") or img_el.get_attribute("src")
-
-                    # ================== 상품명 ==================
-                    prod_anchor = item.find_element(
-                        By.CSS_SELECTOR,
-                        "div.prod_main_info > div.prod_info > p > a"
-                    )
-                    prod_name = clean_text(prod_anchor.text)
-                    prod_link = prod_anchor.get_attribute("href") or ""
-
-                    # ================== 스펙/태그 ==================
-                    tags_css = ", ".join([
-                        "div.prod_main_info div.prod_info div.spec-box[data-simple-description-open-area='Y'] div.spec_list",
-                        "div.prod_main_info div.prod_info div.spec-box:not([style*='display:none']) div.spec_list",
-                        "div.prod_info div.spec-box[data-simple-description-open-area='Y'] div.spec_list",
-                        "div.prod_info div.spec-box:not([style*='display:none']) div.spec_list",
-                    ])
-                    tags_elem = item.find_elements(By.CSS_SELECTOR, tags_css)
-                    tags = clean_text(tags_elem[0].text if tags_elem else "")
-
-                    # ================== 가격 ==================
-                    price_els = item.find_elements(
-                        By.CSS_SELECTOR,
-                        "div.prod_main_info > div.prod_pricelist > ul > li p.price_sect > a > strong"
-                    )
-                    price = clean_text(price_els[0].text if price_els else "")
-
-                    # ================== 평점/리뷰 ==================
-                    score_els = item.find_elements(
-                        By.CSS_SELECTOR,
-                        "div.prod_info > div.prod_sub_info > div > div > a > div > span.text__score"
-                    )
-                    raw_score = clean_text(score_els[0].text if score_els else "")
-                    rating = parse_float(raw_score)
-
-                    review_els = item.find_elements(
-                        By.CSS_SELECTOR,
-                        "div.prod_info > div.prod_sub_info > div > div > a > div > div.text__review > span.text__number"
-                    )
-                    raw_review_count = clean_text(review_els[0].text if review_els else "")
-                    review_count = parse_int(raw_review_count)
-
-                    rating_weighted = None
-                    if rating is not None and review_count is not None:
-                        rating_weighted = round(rating * review_count, 2)
-
-                    # ================== 저장 ==================
-                    result["products"].append({
-                        "link": prod_link,
-                        "image": image,
-                        "prod_name": prod_name,
-                        "tags": tags,
-                        "price": price,
-                        "rating": rating,
-                        "review_count": review_count,
-                        "rating_weighted": rating_weighted,
-                        "raw_rating_text": raw_score,
-                        "raw_review_text": raw_review_count,
-                    })
+def thread_worker_init():
+    """ThreadPool initializer: 이 스레드의 드라이버를 배치 간에 유지 (close_thread_sessions 로 정리)"""
+    threading.current_thread().name = f"ItemThread-{next(_THREAD_NO)}"
+    _SESSION.warm = True
+    _SESSION.shared = True
 
-                except Exception as e:
-                    log.debug("item parse error: %s", e, exc_info=True)
-                    continue
+def close_thread_sessions():
+    """thread 실행기의 모든 스레드 세션 정리 (풀이 끝난 뒤 호출)"""
+    with _THREAD_SESSIONS_LOCK:
+        sessions = list(_THREAD_SESSIONS)
+        _THREAD_SESSIONS.clear()
+    for session in sessions:
+        session.close()
 
-            result.update({
-                "ok": True,
-                "list_selector": used_sel,
-                "product_count": len(result["products"])
-            })
-            results.append(result)
-            log.info(f"✅ {len(result['products'])}개 완료 | {prog_str} - {path[1] if len(path) > 1 else path[0]}")
+def create_pool(workers=WORKERS, known=None, warm=False, executor=None):
+    """
+    실행 방식에 맞는 워커 풀 생성. 두 풀 모두 imap_unordered/close/join/terminate 를 지원한다.
+    - process: warm=True 면 워커 프로세스가 드라이버를 배치 간에 유지 (데몬)
+    - thread: 스레드마다 드라이버를 유지하고, 상품 지문은 공유 메모리라 한 번만 설정한다
+    """
+    executor = executor or ITEM_EXECUTOR
+    if executor not in EXECUTORS:
+        log.warning(f"알 수 없는 ITEM_EXECUTOR={executor!r}, process 로 실행")
+        executor = "process"
+    if executor == "thread":
+        init_known_products(known)
+        return ThreadPool(workers, initializer=thread_worker_init)
+    if warm:
+        return Pool(workers, initializer=warm_worker_init, initargs=(known,))
+    return Pool(workers, initializer=init_known_products, initargs=(known,))
 
-        except Exception as e:
-            log.warning(f"❌ {path[-1] if path[-1] else link} 에러: {short_exception(e)}")
+def shutdown_pool(pool):
+    """정상 종료: close/join 후 thread 실행기의 드라이버 정리"""
+    pool.close()
+    pool.join()
+    if isinstance(pool, ThreadPool):
+        close_thread_sessions()
 
-    driver.quit()
-    return results
+def pool_executor(pool):
+    return "thread" if isinstance(pool, ThreadPool) else "process"
 
-# ================== 메인 ==================
-def _read_existing_results():
-    """
-    기존 결과를 로드한다. 분할 저장(manifest 기반) 또는 레거시 단일 JSON 모두 지원.
-    """
+def _pool_pids(pool):
+    """풀의 파이썬 프로세스 pid (thread 실행기는 부모 프로세스 하나)"""
+    pids = [os.getpid()]
+    for proc in getattr(pool, "_pool", None) or []:
+        pid = getattr(proc, "pid", None)
+        if pid:
+            pids.append(pid)
+    return pids
+
+def _driver_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+def _acquire_session():
+    session = _SESSION.session
+    if session is None:
+        if _SESSION.shared:
+            worker_name = f"{threading.current_thread().name}-{os.getpid()}"
+        else:
+            worker_name = f"{current_process().name}-{os.getpid()}"
+        if browser_cache.BROWSER_CACHE:
+            # 첫 브라우저 시작 때 공유 캐시를 복제하고, 세션 종료 때 반납 (재시작은 같은 복제본 사용)
+            slot = browser_cache.CacheSlot(worker_name)
+            session = BrowserSession(
+                lambda: create_driver(cache_dir=slot.acquire()), worker_name=worker_name, on_close=slot.release
+            )
+        else:
+            session = BrowserSession(create_driver, worker_name=worker_name)
+        _SESSION.session = session
+        if _SESSION.shared:
+            with _THREAD_SESSIONS_LOCK:
+                _THREAD_SESSIONS.append(session)
+    elif session._driver is not None and not _driver_alive(session._driver):
+        session.recycle("드라이버 응답 없음")
+    return session
+
+def _prefetcher(driver):
+    """현재 드라이버의 탭 파이프라인 (브라우저가 재시작되면 새로 만든다)"""
+    prefetcher = _SESSION.prefetcher
+    if prefetcher is None or prefetcher.driver is not driver:
+        prefetcher = TabPrefetcher(driver)
+        _SESSION.prefetcher = prefetcher
+    return prefetcher
+
+def _release_session(session, failed=False):
+    if _SESSION.warm and not failed:
+        return  # 다음 배치에서 재사용
+    session.close()
+
+# ================== 워커 함수 ==================
+def worker(args):
+    """링크 리스트 한 묶음을 병렬로 크롤링"""
+    fingerprints, probes = {}, set()
+    if len(args) == 6:
+        link_batch, start_index, total, skipped, fingerprints, probes = args
+    elif len(args) == 5:
+        link_batch, start_index, total, skipped, fingerprints = args
+    elif len(args) == 4:
+        link_batch, start_index, total, skipped = args
+    else:
+        link_batch, start_index, total = args
+        skipped = 0
+
+    progress_total = total - skipped
+    if progress_total <= 0:
+        progress_total = len(link_batch) or 1
+
+    if skipped:
+        progress_total_display = f"{total - skipped}"
+    else:
+        progress_total_display = str(progress_total)
     results = []
-    manifest = None
-    if MANIFEST_PATH.exists():
-        try:
-            with MANIFEST_PATH.open("r", encoding="utf-8") as mf:
-                manifest = json.load(mf)
-        except Exception as exc:
-            log.warning("manifest 읽기 실패: %s", exc)
-            manifest = None
-        if manifest:
-            for part in manifest.get("parts", []):
-                filename = part.get("file")
-                if not filename:
+
+    session = _acquire_session()
+    failed = False
+
+    # 진행도 출력 폭 계산 (예: 1250 -> 폭 5 에 맞춰 우측 언더스코어 패딩)
+    width = max(5, len(str(progress_total)))
+
+    try:
+        for idx, r in enumerate(link_batch, start=0):
+            cur = start_index + idx
+            cur_disp = f"{cur}{' ' * (width - len(str(cur)))}"
+            prog_str = f"진행도 [{cur_disp}/ {progress_total_display}]"
+            link = r.get("link")
+            path = category_tree.row_path(r)
+            result = {"link": link, "path": path, "ok": False, "products": []}
+            if r.get(category_tree.NODE_KEY) is not None:
+                # 카테고리 트리 노드 ID (저장 시 path 대신 기록)
+                result[category_tree.NODE_KEY] = r[category_tree.NODE_KEY]
+
+            driver = session.driver
+            visit_started = time.perf_counter()
+            # 이전에 목록이 없던 링크는 짧은 대기로 다시 확인 (fast-fail)
+            wait = NEGATIVE_PROBE_TIMEOUT if link in probes else WAIT_TIMEOUT
+            prefetched_s = None
+            cache_stats = None
+            try:
+                if PREFETCH_NEXT:
+                    prefetcher = _prefetcher(driver)
+                    prefetched_s = prefetcher.open(link)
+                    # 다음 링크는 다른 탭에서 로드 → 이 링크의 보기 전환/추출과 겹친다
+                    if idx + 1 < len(link_batch):
+                        prefetcher.prefetch(link_batch[idx + 1].get("link"))
+                else:
+                    driver.get(link)
+                time.sleep(max(0.0, PAGE_SETTLE_S - (prefetched_s or 0.0)))
+
+                list_view = ensure_list_view(driver, page_url=link, timeout=wait)
+
+                # 상품 리스트 탐색
+                items, used_sel = find_product_items(driver, timeout=wait)
+                if browser_cache.BROWSER_CACHE:
+                    cache_stats = browser_cache.page_stats(driver)
+                if not items:
+                    # 부모가 네거티브 캐시에 기록 (결과로는 저장하지 않음)
+                    results.append({
+                        "link": link,
+                        "path": path,
+                        "ok": False,
+                        "negative": "no_list_view" if list_view is None else "no_list",
+                        "cost_s": round(time.perf_counter() - visit_started, 2),
+                    })
+                    log.info(f"🚫 상품 목록 없음 | {prog_str} - {path[-1] if path[-1] else link}")
                     continue
-                part_path = OUTPUT_DIR / filename
-                if not part_path.exists():
+
+                # 목록 지문이 지난 실행과 같으면 추출 생략 (부모가 기존 결과를 유지)
+                fp = page_fingerprint(driver, items) if PAGE_FINGERPRINT else None
+                if fp and fingerprints.get(link) == fp:
+                    results.append({"link": link, "path": path, "ok": True, "unchanged": True})
+                    log.info(f"⏩ 변경 없음 | {prog_str} - {path[1] if len(path) > 1 else path[0]}")
                     continue
-                with part_path.open("r", encoding="utf-8") as pf:
-                    for line in pf:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            results.append(json.loads(line))
-                        except json.JSONDecodeError:
+
+                for item in items[:30]:  # 최대 30개
+                    try:
+                        # ================== 상품명 ==================
+                        prod_anchor = item.find_element(
+                            By.CSS_SELECTOR,
+                            "div.prod_main_info > div.prod_info > p > a"
+                        )
+                        prod_name = clean_text(prod_anchor.text)
+                        prod_link = prod_anchor.get_attribute("href") or ""
+
+                        # ================== 가격 ==================
+                        price_els = item.find_elements(
+                            By.CSS_SELECTOR,
+                            "div.prod_main_info > div.prod_pricelist > ul > li p.price_sect > a > strong"
+                        )
+                        price = clean_text(price_els[0].text if price_els else "")
+
+                        review_els = item.find_elements(
+                            By.CSS_SELECTOR,
+                            "div.prod_info > div.prod_sub_info > div > div > a > div > div.text__review > span.text__number"
+                        )
+                        raw_review_count = clean_text(review_els[0].text if review_els else "")
+
+                        # ================== 이미지 ==================
+                        img_el = item.find_element(
+                            By.CSS_SELECTOR,
+                            "div.prod_main_info > div.thumb_image > a.thumb_link > img"
+                        )
+                        image = img_el.get_attribute("data-original") or img_el.get_attribute("src")
+
+                        # ================== 평점/리뷰 ==================
+                        score_els = item.find_elements(
+                            By.CSS_SELECTOR,
+                            "div.prod_info > div.prod_sub_info > div > div > a > div > span.text__score"
+                        )
+                        raw_score = clean_text(score_els[0].text if score_els else "")
+                        rating = parse_float(raw_score)
+                        review_count = parse_int(raw_review_count)
+
+                        rating_weighted = None
+                        if rating is not None and review_count is not None:
+                            rating_weighted = round(rating * review_count, 2)
+
+                        product = {
+                            "link": prod_link,
+                            "image": image,
+                            "prod_name": prod_name,
+                            "tags": None,
+                            "price": price,
+                            "rating": rating,
+                            "review_count": review_count,
+                            "rating_weighted": rating_weighted,
+                            "raw_rating_text": raw_score,
+                            "raw_review_text": raw_review_count,
+                        }
+
+                        # ================== 기존 상품 ==================
+                        # 목록 필드(이름/가격/리뷰 수/평점/이미지)가 같으면 스펙/태그 파싱을 건너뛰고
+                        # 부모가 기존 tags 로 채운다 (상품마다 약 PRODUCT_REFRESH_DAYS 일에 하루는 전체 파싱)
+                        pid = product_index.product_id(prod_link)
+                        if (
+                            pid
+                            and _KNOWN_PRODUCTS.get(pid) == product_index.fingerprint(
+                                prod_name, price, raw_review_count, raw_score, image)
+                            and not product_index.refresh_due(pid)
+                        ):
+                            del product["tags"]
+                            result["products"].append(product_index.make_stub(pid, product))
                             continue
-            return results
-    if LEGACY_JSON_PATH.exists():
-        try:
-            with LEGACY_JSON_PATH.open("r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as exc:
-            log.warning("레거시 JSON 로드 실패: %s", exc)
-            return []
+
+                        # ================== 스펙/태그 ==================
+                        tags_css = ", ".join([
+                            "div.prod_main_info div.prod_info div.spec-box[data-simple-description-open-area='Y'] div.spec_list",
+                            "div.prod_main_info div.prod_info div.spec-box:not([style*='display:none']) div.spec_list",
+                            "div.prod_info div.spec-box[data-simple-description-open-area='Y'] div.spec_list",
+                            "div.prod_info div.spec-box:not([style*='display:none']) div.spec_list",
+                        ])
+                        tags_elem = item.find_elements(By.CSS_SELECTOR, tags_css)
+                        product["tags"] = clean_text(tags_elem[0].text if tags_elem else "")
+
+                        # ================== 저장 ==================
+                        result["products"].append(product)
+
+                    except Exception as e:
+                        log.debug("item parse error: %s", e, exc_info=True)
+                        continue
+
+                result.update({
+                    "ok": True,
+                    "list_selector": used_sel,
+                    "product_count": len(result["products"])
+                })
+                if fp and result["products"]:
+                    result["_page_fingerprint"] = fp  # 부모가 꺼내 지문 캐시에 저장
+                results.append(result)
+                log.info(f"✅ {len(result['products'])}개 완료 | {prog_str} - {path[1] if len(path) > 1 else path[0]}")
+
+            except Exception as e:
+                log.warning(f"❌ {path[-1] if path[-1] else link} 에러: {short_exception(e)}")
+            finally:
+                if results and results[-1].get("link") == link:
+                    # 부모가 꺼내 링크 비용 기록/미리 로드 적중 집계에 사용
+                    results[-1]["_cost_s"] = round(time.perf_counter() - visit_started, 2)
+                    if prefetched_s is not None:
+                        results[-1]["_prefetched"] = True
+                    if cache_stats is not None:
+                        results[-1]["_cache"] = cache_stats
+                # RSS 샘플링 + 메모리/페이지 기준 초과 시 브라우저 재시작
+                session.after_page()
+
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        # 예외가 워커 밖으로 나가도 브라우저는 항상 정리(또는 warm 재사용)
+        _release_session(session, failed)
     return results
 
-def _chunk_list(items, size):
-    for idx in range(0, len(items), size):
-        yield items[idx: idx + size]
+# ================== 메인 ==================
+def _last_recrawl_slice(status_path):
+    """직전 실행이 재방문한 완료 링크 조각 번호 (없으면 None)"""
+    try:
+        with status_path.open("r", encoding="utf-8") as f:
+            value = json.load(f).get("recrawl_slice")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return value if isinstance(value, int) else None
 
-def _write_sharded_results(data):
+def main(shard=None, rows=None, prev_results=None, only_links=None, pool=None):
     """
-    데이터를 JSONL 파트로 분할 저장하고 manifest/state/status를 갱신한다.
+    아이템 크롤 1회 실행. 누적 결과(이전 + 신규)를 반환한다.
+    - rows/prev_results: 데몬 등 호출자가 캐시한 링크 목록/기존 결과 (없으면 디스크에서 로드)
+    - only_links: 지정 시 해당 링크만 이전 완료 여부와 무관하게 다시 크롤
+    - pool: 호출자가 유지하는(warm) 워커 풀 (없으면 이번 실행용 풀 생성)
     """
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.datetime.now().isoformat()
-    tmp_parts = []
-    part_entries = []
-    for index, chunk in enumerate(_chunk_list(data, JSON_PART_RECORDS), start=1):
-        filename = f"part_{index:05}.jsonl"
-        final_path = OUTPUT_DIR / filename
-        tmp_path = final_path.with_suffix(final_path.suffix + ".tmp")
-        with tmp_path.open("w", encoding="utf-8") as f:
-            for row in chunk:
-                f.write(json.dumps(row, ensure_ascii=False))
-                f.write("\n")
-        tmp_parts.append((tmp_path, final_path))
-        part_entries.append({"file": filename, "count": len(chunk)})
-
-    for existing in OUTPUT_DIR.glob("part_*.jsonl"):
-        try:
-            existing.unlink()
-        except OSError:
-            pass
+    shard_index, shard_count = parse_shard_spec(shard) if shard else (0, 1)
+    sharded = shard_count > 1
+    output_dir = shard_output_dir(shard_index, shard_count) if sharded else OUTPUT_DIR
+    status_path = shard_status_path(shard_index, shard_count) if sharded else STATUS_PATH
+    manifest_path = output_dir / "manifest.json"
+    run_started = datetime.datetime.now().isoformat(timespec="seconds")
+    if not sharded:
+        reset_curves()  # 샤드는 로컬 동시 실행 시 서로의 곡선을 지우지 않도록 유지
+    if browser_cache.BROWSER_CACHE:
+        browser_cache.sweep_clones()
 
-    for tmp_path, final_path in tmp_parts:
-        tmp_path.replace(final_path)
-
-    manifest = {
-        "parts": part_entries,
-        "total_count": len(data),
-        "updated_at": timestamp,
-        "part_size_limit": JSON_PART_RECORDS,
-    }
-    tmp_manifest = MANIFEST_PATH.with_suffix(".tmp")
-    with tmp_manifest.open("w", encoding="utf-8") as mf:
-        json.dump(manifest, mf, indent=2, ensure_ascii=False)
-    tmp_manifest.replace(MANIFEST_PATH)
-
-    state = {
-        "links": [item.get("link") for item in data if isinstance(item, dict) and item.get("ok")],
-        "updated_at": timestamp,
-    }
-    tmp_state = STATE_PATH.with_suffix(".tmp")
-    with tmp_state.open("w", encoding="utf-8") as sf:
-        json.dump(state, sf, indent=2, ensure_ascii=False)
-    tmp_state.replace(STATE_PATH)
-
-    if LEGACY_JSON_PATH.exists():
-        try:
-            LEGACY_JSON_PATH.unlink()
-        except OSError:
-            pass
-
-def _write_status(processed_links, pending_links, skipped_links, total_links, eligible_links, complete_total):
-    payload = {
-        "timestamp": datetime.datetime.now().isoformat(),
-        "processed_links": processed_links,
-        "pending_links": pending_links,
-        "skipped_links": skipped_links,
-        "total_links": total_links,
-        "eligible_links": eligible_links,
-        "complete_total": complete_total,
-    }
-    tmp_status = STATUS_PATH.with_suffix(".tmp")
-    with tmp_status.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=False)
-    tmp_status.replace(STATUS_PATH)
-
-def main():
-    rows = to_list()
+    if rows is None:
+        rows = to_list()
     if not rows:
         log.warning("필터된 링크가 없습니다.")
-        return
+        return prev_results or []
 
     # 중복 제거
     uniq, seen = [], set()
@@ -449,36 +735,232 @@ def main():
             seen.add(lk)
 
     # 🔹 기존 결과 로드 및 재시작 스킵 구성
-    prev_results = _read_existing_results()
+    if prev_results is not None:
+        pass
+    elif sharded and not manifest_path.exists():
+        # 샤드 첫 실행: 정규 출력에서 이 샤드 담당분만 가져와 재시작 스킵에 사용
+        prev_results = [
+            r for r in read_existing_results()
+            if isinstance(r, dict) and link_in_shard(r.get("link"), shard_index, shard_count)
+        ]
+    else:
+        prev_results = read_existing_results(output_dir)
     prev_links = {r.get("link") for r in prev_results if isinstance(r, dict) and r.get("ok")}
+    prev_ok_links = set(prev_links)
+
+    # 🔹 목록 페이지 지문 캐시 (샤드 첫 실행은 정규 출력의 담당분을 가져옴)
+    page_fps = read_page_fingerprints(output_dir)
+    if sharded and not page_fps and not (output_dir / PAGE_FINGERPRINTS_FILE).exists():
+        page_fps = {
+            lk: fp for lk, fp in read_page_fingerprints().items()
+            if link_in_shard(lk, shard_index, shard_count)
+        }
 
     # 🔹 처리 개수 제한 (deterministic)
     total = min(SAMPLE_N, len(uniq)) if SAMPLE_N > 0 else len(uniq)
     uniq = uniq[:total]
 
+    # 🔹 샤드 분할: 카테고리 ID 해시로 이 샤드가 담당할 링크만 남김
+    if sharded:
+        uniq = [r for r in uniq if link_in_shard(r.get("link"), shard_index, shard_count)]
+        total = len(uniq)
+        log.info(f"샤드 {shard_index}/{shard_count}: 담당 링크 {total}개 → {output_dir}")
+
+    # 🔹 네거티브 캐시: 상품 목록이 없던 링크 (샤드 첫 실행은 정규 출력의 담당분을 가져옴)
+    negative = read_negative_cache(output_dir)
+    if sharded and not negative and not (output_dir / NEGATIVE_CACHE_FILE).exists():
+        negative = {
+            lk: entry for lk, entry in read_negative_cache().items()
+            if link_in_shard(lk, shard_index, shard_count)
+        }
+
+    # 🔹 지정 링크 재크롤 (데몬 작업)
+    if only_links is not None:
+        wanted = set(only_links)
+        uniq = [r for r in uniq if r.get("link") in wanted]
+        total = len(uniq)
+        prev_links = set()
+    elif RECRAWL_COMPLETED == "1":
+        prev_links = set()
+
     # 🔹 재시작 스킵 적용
     todo = [r for r in uniq if r.get("link") not in prev_links]
     skipped = len(uniq) - len(todo)
     log.info(f"총 {len(rows)}개 중 상위 {total}개 링크 병렬 점검 시작 (이전 완료 {skipped}개 스킵)")
 
-    # 🔹 병렬 처리 분할
-    chunk_size = max(1, min(BATCH_SIZE, len(todo))) if todo else 1
-    raw_chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+    # 🔹 네거티브 캐시 적용: TTL 이내는 건너뛰고, 만료된 링크는 짧은 대기로 재확인 (지정 링크는 항상 크롤)
+    negative_skipped, negative_saved_s, probes = 0, 0.0, set()
+    if negative and only_links is None and NEGATIVE_CACHE_TTL_HOURS > 0:
+        cutoff = (datetime.datetime.now() - datetime.timedelta(hours=NEGATIVE_CACHE_TTL_HOURS)).isoformat()
+        live = []
+        for r in todo:
+            entry = negative.get(r.get("link"))
+            if entry is None:
+                live.append(r)
+            elif (entry.get("last_checked") or "") > cutoff:
+                negative_skipped += 1
+                negative_saved_s += float(entry.get("cost_s") or 0)
+            else:
+                probes.add(r.get("link"))
+                live.append(r)
+        todo = live
+        log.info(
+            f"🚫 네거티브 캐시: {negative_skipped}개 건너뜀 (약 {negative_saved_s:.0f}s 절약), "
+            f"{len(probes)}개 재확인"
+        )
+
+    # 🔹 완료 링크 재방문(auto): 남은 링크가 없으면 완료 링크 한 조각을 지문 확인으로 다시 방문
+    recrawl_slice = _last_recrawl_slice(status_path)
+    if only_links is None and RECRAWL_COMPLETED == "auto" and not todo and prev_ok_links:
+        recrawl_slice = 0 if recrawl_slice is None else (recrawl_slice + 1) % RECRAWL_SLICES
+        todo = [
+            r for r in uniq
+            if r.get("link") in prev_ok_links and zlib.crc32(r["link"].encode("utf-8")) % RECRAWL_SLICES == recrawl_slice
+        ]
+        log.info(f"🔁 남은 링크 없음: 완료 링크 재방문 조각 {recrawl_slice + 1}/{RECRAWL_SLICES} ({len(todo)}개)")
+
+    # 🔹 링크별 과거 크롤 시간 (샤드 첫 실행은 정규 출력의 담당분을 가져옴)
+    link_costs = read_link_costs(output_dir)
+    if sharded and not link_costs and not (output_dir / LINK_COSTS_FILE).exists():
+        link_costs = {
+            lk: cost for lk, cost in read_link_costs().items()
+            if link_in_shard(lk, shard_index, shard_count)
+        }
+
+    # 🔹 병렬 처리 분할: 긴 작업 우선 + 점점 작아지는 배치 (ITEM_SCHEDULE=fixed 면 CSV 순서 고정 배치)
+    schedule = link_scheduler.ITEM_SCHEDULE
+    if schedule not in link_scheduler.SCHEDULES:
+        log.warning(f"알 수 없는 ITEM_SCHEDULE={schedule!r}, cost 로 실행")
+        schedule = "cost"
+    workers_hint = getattr(pool, "_processes", None) or WORKERS
+    if schedule == "cost":
+        raw_chunks = [batch for batch, _ in link_scheduler.guided_chunks(todo, link_costs, workers_hint, BATCH_SIZE)]
+    else:
+        raw_chunks = link_scheduler.fixed_chunks(todo, BATCH_SIZE)
+    est_by_link = dict(zip((r.get("link") for r in todo), link_scheduler.estimate(todo, link_costs)))
+    est_total = sum(est_by_link.values())
     # 각 청크의 시작 인덱스(1-based)와 총 개수를 함께 전달하여 전역 진행도를 계산
     chunks = []
     start = 1
+    fingerprint_checked = 0
     for batch in raw_chunks:
-        chunks.append((batch, start, total, skipped))
+        # 기존 결과가 있는 링크만 지문 비교 대상 (같으면 기존 결과를 그대로 유지)
+        batch_fps = {
+            r.get("link"): page_fps[r.get("link")]
+            for r in batch
+            if PAGE_FINGERPRINT and r.get("link") in prev_ok_links and r.get("link") in page_fps
+        }
+        fingerprint_checked += len(batch_fps)
+        batch_probes = {r.get("link") for r in batch if r.get("link") in probes}
+        chunks.append((batch, start, total, skipped, batch_fps, batch_probes))
         start += len(batch)
-    log.info(f"각 프로세스당 {chunk_size}개 링크 처리 예정")
+    if raw_chunks:
+        sizes = [len(batch) for batch in raw_chunks]
+        log.info(
+            f"배치 {len(raw_chunks)}개 ({schedule}: {max(sizes)}~{min(sizes)}개 링크), "
+            f"추정 작업량 {est_total / 60:.0f}분 → 워커 {workers_hint}개 기준 약 {est_total / 60 / workers_hint:.0f}분"
+        )
 
     # 🔹 병렬 실행
-    manager = Manager()
-    shared_results = manager.list()  # 병렬 안전 수집
-    lock = manager.Lock()
+    executor = pool_executor(pool) if pool is not None else ITEM_EXECUTOR
+    # 결과는 부모 프로세스의 수집 루프만 추가하므로 실행기/레코드 표현과 무관하게 일반 리스트 + 락
+    # (워커는 배치를 반환값으로 돌려줄 뿐 shared_results 를 직접 건드리지 않는다)
+    shared_results = []
+    lock = threading.Lock()
+
+    # 🔹 전역 상품 인덱스: 이미 알고 있는 상품은 워커가 상세 파싱을 건너뛰고 부모가 채운다
+    known_table = product_index.product_table(prev_results)
+    reused_products = 0
+    fingerprint_hits = 0
+    negative_new = 0
+    negative_recovered = 0
+    # 실행기 비교 지표: 방문 링크/초, 파이썬 프로세스(브라우저 제외) 최대 RSS
+    visited = 0
+    crawl_s = 0.0
+    prefetch_hits = 0
+    cache_totals = [0, 0, 0, 0]  # 브라우저 캐시: 적중, 측정 요청, 절약 바이트, 전송 바이트
+    # 진행/ETA: 완료된 링크의 추정 비용 합과 실제 비용 합, 꼬리 구간(놀고 있는 워커가 생긴 뒤) 길이
+    done_est_s = 0.0
+    done_actual_s = 0.0
+    chunks_done = 0
+    tail_started = None
+    tail_s = None
+    executor_rss_mb = 0.0
+    executor_workers = WORKERS
 
     pending_initial = len(todo)
-    last_checkpoint_at = 0
+    last_checkpoint_at = len(prev_results)  # 신규 결과가 CHECKPOINT_N개 쌓일 때마다 저장
+    indexed_upto = {"랭킹": 0, "검색": 0}  # 인덱스별로 반영한 current_shared 길이
+    changed_parts = set()  # 이번 실행에서 내용이 바뀐 파트 (커밋 diff 대상)
+
+    def _write_results(data):
+        report = write_sharded_results(data, output_dir)
+        changed_parts.update(report["changed"])
+        changed_parts.update(report["removed"])
+        if write_page_fingerprints(page_fps, output_dir):
+            changed_parts.add(PAGE_FINGERPRINTS_FILE)
+        if write_link_costs(link_costs, output_dir):
+            changed_parts.add(LINK_COSTS_FILE)
+        _write_negative()
+        return report
+
+    def _write_negative():
+        if write_negative_cache(negative, output_dir):
+            changed_parts.add(NEGATIVE_CACHE_FILE)
+
+    def _eta():
+        if chunks and chunks_done >= len(chunks):
+            return 0.0  # 실패한 링크는 비용이 기록되지 않으므로 완료 여부는 배치 수로 판단
+        return link_scheduler.eta_seconds(est_total - done_est_s, done_est_s, done_actual_s, executor_workers)
+
+    def _pending(current_shared):
+        return max(0, pending_initial - len(current_shared) - fingerprint_hits - negative_new)
+
+    def _change_summary():
+        return {
+            "changed_parts": len(changed_parts),
+            "changed_bytes": part_bytes(changed_parts, output_dir),
+            "reused_products": reused_products,
+            "recrawl_slice": recrawl_slice,
+            "fingerprint_checked": fingerprint_checked,
+            "fingerprint_hits": fingerprint_hits,
+            "fingerprint_hit_rate": round(fingerprint_hits / fingerprint_checked, 4) if fingerprint_checked else None,
+            "negative_cached": len(negative),
+            "negative_skipped": negative_skipped,
+            "negative_new": negative_new,
+            "negative_recovered": negative_recovered,
+            "negative_saved_s": round(negative_saved_s, 1),
+            "executor": executor,
+            "executor_workers": executor_workers,
+            "links_visited": visited,
+            "links_per_sec": round(visited / crawl_s, 3) if crawl_s else None,
+            "prefetch_hits": prefetch_hits if PREFETCH_NEXT else None,
+            **(browser_cache.summarize(cache_totals) if browser_cache.BROWSER_CACHE else {}),
+            "schedule": schedule,
+            "chunks": len(chunks),
+            "eta_s": round(_eta()) if todo else 0,
+            "tail_s": round(tail_s, 1) if tail_s is not None else None,
+            "executor_rss_mb": round(executor_rss_mb, 1) if executor_rss_mb else None,
+            "executor_rss_per_worker_mb": (
+                round(executor_rss_mb / executor_workers, 1) if executor_rss_mb and executor_workers else None
+            ),
+            "browser_memory": summarize_curves(since=run_started),
+        }
+
+    def _update_indexes(current_shared):
+        """체크포인트된 신규 결과만 랭킹/검색 인덱스에 증분 반영 (실패해도 크롤은 계속)"""
+        if sharded:
+            return  # 샤드 실행은 병합 단계에서 인덱스를 갱신한다
+        for name, index in (("랭킹", rank_index), ("검색", search_index)):
+            fresh = current_shared[indexed_upto[name]:]
+            try:
+                if not index.META_PATH.exists():
+                    index.build_index(list(prev_results) + list(current_shared))
+                elif fresh:
+                    index.update_index(fresh)
+                indexed_upto[name] = len(current_shared)
+            except Exception as exc:
+                log.warning("%s 인덱스 갱신 실패: %s", name, exc)
 
     def _maybe_checkpoint():
         nonlocal last_checkpoint_at
@@ -486,33 +968,146 @@ def main():
         if CHECKPOINT_N > 0 and current_total - last_checkpoint_at >= CHECKPOINT_N:
             with lock:
                 current_shared = list(shared_results)
-                data = list(prev_results) + current_shared
-                _write_sharded_results(data)
+                data = merge_results(prev_results, current_shared)
+                _write_results(data)
+                _update_indexes(current_shared)
                 last_checkpoint_at = current_total
-                pending_links = max(0, pending_initial - len(current_shared))
-                _write_status(len(current_shared), pending_links, skipped, len(rows), len(uniq), len(data))
-                log.info(f"💾 체크포인트 저장 ({current_total}개) → {OUTPUT_DIR}")
+                pending_links = _pending(current_shared)
+                write_status(len(current_shared), pending_links, skipped, len(rows), len(uniq), len(data),
+                             extra=_change_summary(), status_path=status_path)
+                log.info(f"💾 체크포인트 저장 ({current_total}개, 남은 시간 약 {_eta() / 60:.0f}분) → {output_dir}")
+
+    def _remember_negative(link, item):
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        entry = negative.get(link) or {"first_seen": now, "misses": 0}
+        entry.update({
+            "reason": item["negative"],
+            "last_checked": now,
+            "misses": int(entry.get("misses") or 0) + 1,
+            # 재확인은 짧은 대기로 하므로 처음 관측한 전체 대기 비용을 유지
+            "cost_s": max(float(entry.get("cost_s") or 0), float(item.get("cost_s") or 0)),
+        })
+        negative[link] = entry
+
+    def _sample_executor_rss(active_pool):
+        nonlocal executor_rss_mb
+        executor_rss_mb = max(executor_rss_mb, tree_rss_mb(_pool_pids(active_pool)))
+
+    def _collect(active_pool):
+        nonlocal reused_products, fingerprint_hits, negative_new, negative_recovered, visited, crawl_s, prefetch_hits
+        nonlocal executor_workers, done_est_s, done_actual_s, chunks_done, tail_started, tail_s
+        executor_workers = getattr(active_pool, "_processes", None) or WORKERS
+        started = time.perf_counter()
+        tail_at = link_scheduler.tail_index(len(chunks), executor_workers)
+        for batch_results in active_pool.imap_unordered(worker, chunks):
+            visited += len(batch_results)
+            crawl_s = time.perf_counter() - started
+            chunks_done += 1
+            if chunks_done == tail_at:
+                tail_started = time.perf_counter()
+            _sample_executor_rss(active_pool)
+            reused_products += product_index.resolve_stubs(batch_results, known_table)
+            compact_records.compact_records(batch_results)  # 받은 dict 를 부모에서 압축 (스텁을 채운 상품 포함)
+            with lock:
+                for item in batch_results:
+                    link = item.get("link")
+                    if item.pop("_prefetched", False):
+                        prefetch_hits += 1
+                    browser_cache.add_stats(cache_totals, item.pop("_cache", None))
+                    cost_s = item.pop("_cost_s", None)
+                    if cost_s is not None:
+                        link_scheduler.update_cost(link_costs, link, cost_s)
+                        done_actual_s += cost_s
+                        done_est_s += est_by_link.get(link, 0.0)
+                    if item.get("negative"):
+                        _remember_negative(link, item)
+                        negative_new += 1
+                        continue
+                    if negative.pop(link, None) is not None:
+                        negative_recovered += 1  # 재확인 결과 목록이 생김
+                    fp = item.pop("_page_fingerprint", None)
+                    if fp:
+                        page_fps[link] = fp
+                    if item.get("unchanged"):
+                        fingerprint_hits += 1  # 기존 결과 유지: 수집/저장하지 않음
+                        continue
+                    shared_results.append(item)
+            _maybe_checkpoint()
+        if tail_started is not None:
+            tail_s = time.perf_counter() - tail_started
 
     if todo:
-        with Pool(WORKERS) as pool:
-            for batch_results in pool.imap_unordered(worker, chunks):
-                with lock:
-                    for item in batch_results:
-                        shared_results.append(item)
-                _maybe_checkpoint()
+        if pool is not None:
+            _collect(pool)
+        else:
+            known = product_index.known_fingerprints(prev_results) if product_index.PRODUCT_SKIP_KNOWN else None
+            # 배치가 잘게 나뉘므로 cost 스케줄에서는 워커가 드라이버를 배치 간에 유지한다
+            own_pool = create_pool(WORKERS, known, warm=(schedule == "cost"), executor=executor)
+            try:
+                _collect(own_pool)
+            except BaseException:
+                own_pool.terminate()
+                close_thread_sessions()
+                raise
+            shutdown_pool(own_pool)
 
     # 🔹 최종 저장 (이전 + 신규)
     final_shared = list(shared_results)
-    final_data = list(prev_results) + final_shared
-    force_write = bool(final_shared) or not MANIFEST_PATH.exists() or LEGACY_JSON_PATH.exists()
+    final_data = merge_results(prev_results, final_shared)
+    force_write = bool(final_shared) or not manifest_path.exists() or (not sharded and LEGACY_JSON_PATH.exists())
     if force_write:
-        _write_sharded_results(final_data)
+        _write_results(final_data)
+        _update_indexes(final_shared)
     else:
         log.info("💾 신규 결과 없음, 기존 분할 파일 유지")
-    pending_links = max(0, pending_initial - len(final_shared))
-    _write_status(len(final_shared), pending_links, skipped, len(rows), len(uniq), len(final_data))
-    log.info(f"✅ 병렬 크롤링 완료: 신규 {len(final_shared)}개, 누적 {len(final_data)}개 저장 → {OUTPUT_DIR}")
+        _write_negative()
+    reap_orphans(owner_pid=OWNER_PID)
+    pending_links = _pending(final_shared)
+    change_summary = _change_summary()
+    write_status(len(final_shared), pending_links, skipped, len(rows), len(uniq), len(final_data),
+                 extra=change_summary, status_path=status_path)
+    log.info(f"✅ 병렬 크롤링 완료: 신규 {len(final_shared)}개, 누적 {len(final_data)}개 저장 → {output_dir}")
+    log.info(
+        f"💾 변경된 파트 {change_summary['changed_parts']}개, "
+        f"{change_summary['changed_bytes'] / 1024:.1f} KiB (이번 실행 커밋 대상)"
+    )
+    if fingerprint_checked:
+        log.info(
+            f"⏩ 목록 지문 적중 {fingerprint_hits}/{fingerprint_checked}개 "
+            f"({fingerprint_hits / fingerprint_checked:.1%}), 추출/저장 생략"
+        )
+    if negative_new or negative_recovered or negative_skipped:
+        log.info(
+            f"🚫 네거티브 캐시: 신규/재확인 실패 {negative_new}개, 복구 {negative_recovered}개, "
+            f"건너뜀 {negative_skipped}개 (약 {negative_saved_s:.0f}s 절약), 누적 {len(negative)}개"
+        )
+    if reused_products:
+        log.info(f"♻️ 변경 없는 기존 상품 {reused_products}개는 상세 파싱 생략")
+    if visited:
+        log.info(
+            f"⚙️ 실행기 {executor}(워커 {executor_workers}개): {change_summary['links_per_sec']} 링크/초, "
+            f"파이썬 RSS {executor_rss_mb:.0f}MB (워커당 {change_summary['executor_rss_per_worker_mb']}MB)"
+        )
+    if PREFETCH_NEXT:
+        log.info(f"🔀 다음 링크 미리 로드 적중 {prefetch_hits}/{visited}개")
+    if change_summary.get("cache_requests"):
+        log.info(
+            f"🗄️ 브라우저 캐시 적중 {change_summary['cache_hits']}/{change_summary['cache_requests']}개 요청 "
+            f"({change_summary['cache_hit_ratio']:.1%}), 절약 {change_summary['cache_saved_mb']}MB, "
+            f"전송 {change_summary['cache_fetched_mb']}MB"
+        )
+    if tail_s is not None:
+        log.info(f"⏱️ 꼬리 구간(놀고 있는 워커 발생 후 종료까지) {tail_s:.1f}s, 배치 {len(chunks)}개 ({schedule})")
+    for name, info in change_summary["browser_memory"].items():
+        log.info(
+            f"🧠 {name}: 페이지 {info['pages']}개, 최대 RSS {info['peak_rss_mb']:.0f}MB, "
+            f"재시작 {info['recycles']}회"
+        )
+    return final_data
 
 """단일 실행 엔트리"""
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="다나와 카테고리 링크 상품 크롤러")
+    parser.add_argument("--shard", default=CRAWL_SHARD, help="분할 실행 샤드 i/N (예: 0/4)")
+    cli_args = parser.parse_args()
+    main(shard=cli_args.shard or None)
@@ -0,0 +1,247 @@
+# craw/items/browser_cache.py
+"""
+크롤러 브라우저가 함께 쓰는 HTTP 디스크 캐시.
+
+- seed/: 이전 실행에서 데워진 공유 캐시. 브라우저가 직접 쓰지 않는다(읽기 전용 원본).
+- workers/<워커 이름>/: 워커마다 첫 브라우저 시작 때 seed 를 복제한 캐시 (copy-on-start).
+  크롬은 --disk-cache-dir 로 이 복제본을 쓰므로 여러 브라우저가 같은 캐시 파일을 잠그지 않는다.
+- 세션 종료 때 seed 가 없거나 BROWSER_CACHE_REFRESH_HOURS 보다 오래됐으면 복제본 하나를 새 seed 로
+  올리고(잠금 파일로 한 워커만), 나머지 복제본은 지운다.
+- seed 는 BROWSER_CACHE_MAX_MB 를 넘지 않도록 오래된(mtime) 항목부터 지운다. 크롬도 같은 값을
+  --disk-cache-size 로 받아 복제본 안에서 LRU 로 정리한다.
+
+캐시 적중률/절약 바이트는 페이지마다 Resource Timing 으로 측정한다(page_stats).
+Selenium 의존성이 없으며, 드라이버 생성은 호출자(B_in_link_get_items, 카테고리 크롤러)가 담당한다.
+"""
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+from result_store import DATA_DIR
+
+# ================== 상수 ==================
+BROWSER_CACHE = os.environ.get("BROWSER_CACHE", "1") != "0"
+CACHE_ROOT = Path(os.environ.get("BROWSER_CACHE_DIR") or DATA_DIR / "browser_cache")
+SEED_DIR = CACHE_ROOT / "seed"
+CLONES_DIR = CACHE_ROOT / "workers"
+LOCK_PATH = CACHE_ROOT / "seed.lock"
+BROWSER_CACHE_MAX_MB = float(os.environ.get("BROWSER_CACHE_MAX_MB", "256"))
+# seed 를 새 복제본으로 교체하는 주기 (0이면 seed 가 없을 때만 생성)
+BROWSER_CACHE_REFRESH_HOURS = float(os.environ.get("BROWSER_CACHE_REFRESH_HOURS", "24"))
+LOCK_STALE_S = 600   # 이보다 오래된 잠금 파일은 죽은 프로세스의 것으로 보고 무시
+
+log = logging.getLogger(__name__)
+
+# ================== 크기/정리 ==================
+def _files(root):
+    """[(경로, 크기, mtime)] — 하위 디렉터리 포함"""
+    out = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            out.append((path, stat.st_size, stat.st_mtime))
+    return out
+
+def dir_bytes(root):
+    return sum(size for _, size, _ in _files(root))
+
+def max_bytes():
+    return int(BROWSER_CACHE_MAX_MB * 1024 * 1024) if BROWSER_CACHE_MAX_MB > 0 else 0
+
+def evict(root, limit_bytes):
+    """root 전체 크기가 limit_bytes 이하가 되도록 오래된 파일부터 삭제. 지운 바이트 수 반환."""
+    if not limit_bytes:
+        return 0
+    files = _files(root)
+    total = sum(size for _, size, _ in files)
+    if total <= limit_bytes:
+        return 0
+    removed = 0
+    for path, size, _ in sorted(files, key=lambda item: item[2]):
+        if total - removed <= limit_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += size
+        except OSError:
+            continue
+    # 지운 항목이 남아 있는 인덱스는 버린다 (크롬이 다음 시작 때 디렉터리를 훑어 다시 만든다)
+    for index_dir in Path(root).rglob("index-dir"):
+        shutil.rmtree(index_dir, ignore_errors=True)
+    return removed
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+def sweep_clones():
+    """종료된 프로세스가 남긴 복제본 삭제 (워커 이름 끝의 pid 로 판단)"""
+    if not CLONES_DIR.exists():
+        return 0
+    removed = 0
+    for path in CLONES_DIR.iterdir():
+        pid = path.name.rsplit("-", 1)[-1]
+        if pid.isdigit() and _pid_alive(int(pid)):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    if removed:
+        log.info("브라우저 캐시: 남은 복제본 %d개 정리", removed)
+    return removed
+
+# ================== seed ==================
+def seed_age_hours():
+    try:
+        return (time.time() - SEED_DIR.stat().st_mtime) / 3600
+    except OSError:
+        return None
+
+def _needs_seed():
+    age = seed_age_hours()
+    if age is None:
+        return True
+    return BROWSER_CACHE_REFRESH_HOURS > 0 and age >= BROWSER_CACHE_REFRESH_HOURS
+
+def _acquire_lock():
+    try:
+        fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - LOCK_PATH.stat().st_mtime < LOCK_STALE_S:
+                return False
+            LOCK_PATH.unlink()
+        except OSError:
+            return False
+        return _acquire_lock()
+    except OSError:
+        return False
+    os.write(fd, str(os.getpid()).encode("ascii"))
+    os.close(fd)
+    return True
+
+def promote(clone_dir):
+    """복제본을 새 seed 로 교체 (크기 제한 적용). 교체했으면 True."""
+    clone_dir = Path(clone_dir)
+    if not clone_dir.exists() or not _acquire_lock():
+        return False
+    try:
+        if not _needs_seed():
+            return False  # 다른 워커가 먼저 교체
+        evict(clone_dir, max_bytes())
+        staged = CACHE_ROOT / f"seed.new-{os.getpid()}"
+        retired = CACHE_ROOT / f"seed.old-{os.getpid()}"
+        shutil.rmtree(staged, ignore_errors=True)
+        shutil.rmtree(retired, ignore_errors=True)
+        clone_dir.rename(staged)
+        if SEED_DIR.exists():
+            SEED_DIR.rename(retired)
+        staged.rename(SEED_DIR)
+        os.utime(SEED_DIR)  # 교체 시각 = seed 나이 기준
+        shutil.rmtree(retired, ignore_errors=True)
+        log.info("브라우저 캐시 seed 갱신: %.1fMB", dir_bytes(SEED_DIR) / (1024 * 1024))
+        return True
+    except OSError as exc:
+        log.warning("브라우저 캐시 seed 갱신 실패: %s", exc)
+        return False
+    finally:
+        try:
+            LOCK_PATH.unlink()
+        except OSError:
+            pass
+
+# ================== 워커 복제본 ==================
+def clone(name):
+    """seed 를 워커 전용 디렉터리로 복제 (seed 가 없거나 복제 실패면 빈 디렉터리)"""
+    dest = CLONES_DIR / name
+    shutil.rmtree(dest, ignore_errors=True)
+    if SEED_DIR.exists():
+        try:
+            shutil.copytree(SEED_DIR, dest)
+            return dest
+        except (OSError, shutil.Error) as exc:
+            # seed 교체와 겹치면 복제가 실패할 수 있다: 빈 캐시로 시작
+            log.debug("브라우저 캐시 복제 실패 (%s): %s", name, exc)
+            shutil.rmtree(dest, ignore_errors=True)
+    dest.mkdir(parents=True, exist_ok=True)
+    return dest
+
+def release(clone_dir):
+    """세션 종료: 필요하면 seed 로 올리고, 아니면 복제본 삭제"""
+    if _needs_seed() and promote(clone_dir):
+        return
+    shutil.rmtree(clone_dir, ignore_errors=True)
+
+def chrome_args(cache_dir):
+    args = [f"--disk-cache-dir={cache_dir}"]
+    if max_bytes():
+        args.append(f"--disk-cache-size={max_bytes()}")
+    return args
+
+class CacheSlot:
+    """워커 하나의 캐시 복제본: 브라우저를 처음 띄울 때 복제하고 세션을 닫을 때 반납한다"""
+
+    def __init__(self, name):
+        self.name = name
+        self.path = None
+
+    def acquire(self):
+        if self.path is None:
+            self.path = clone(self.name)
+        return self.path
+
+    def release(self):
+        path, self.path = self.path, None
+        if path is not None:
+            release(path)
+
+# ================== 적중률 측정 ==================
+# 문서/리소스별 전송 크기로 캐시 적중 판단: 전송 0 바이트(캐시) 또는 본문보다 작은 전송(304 재검증)
+# 교차 출처 리소스는 Timing-Allow-Origin 이 없으면 크기가 모두 0이라 집계에서 제외한다
+PAGE_STATS_JS = """
+var hits = 0, total = 0, saved = 0, fetched = 0;
+performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource')).forEach(function (e) {
+    var body = e.encodedBodySize || 0;
+    if (!body && !e.transferSize) return;
+    total += 1;
+    if (e.transferSize < body) { hits += 1; saved += body; }
+    fetched += e.transferSize;
+});
+return [hits, total, saved, fetched];
+"""
+
+def page_stats(driver):
+    """현재 페이지의 [캐시 적중 수, 측정 요청 수, 절약 바이트, 전송 바이트] (실패 시 None)"""
+    try:
+        stats = driver.execute_script(PAGE_STATS_JS)
+    except Exception as exc:
+        log.debug("캐시 적중률 측정 실패: %s", exc)
+        return None
+    if not isinstance(stats, (list, tuple)) or len(stats) != 4:
+        return None
+    return [int(v or 0) for v in stats]
+
+def add_stats(total, stats):
+    """page_stats 결과 누적 (total 은 길이 4 리스트)"""
+    if stats:
+        for i, value in enumerate(stats):
+            total[i] += value
+    return total
+
+def summarize(total):
+    hits, requests, saved, fetched = total
+    return {
+        "cache_hits": hits,
+        "cache_requests": requests,
+        "cache_hit_ratio": round(hits / requests, 4) if requests else None,
+        "cache_saved_mb": round(saved / (1024 * 1024), 1),
+        "cache_fetched_mb": round(fetched / (1024 * 1024), 1),
+    }
@@ -0,0 +1,342 @@
+# craw/items/browser_lifecycle.py
+"""
+크롬 브라우저 수명 관리: 프로세스 트리 RSS 샘플링, 메모리/페이지 수 기준 재시작(recycle),
+종료 시 남은 chrome/chromedriver 프로세스 정리, 워커별 메모리 곡선 기록.
+
+psutil이 있으면 사용하고, 없으면 /proc(리눅스)에서 직접 읽는다. 둘 다 없으면 메모리 기준은
+비활성화되고 페이지 수 기준만 동작한다.
+"""
+import datetime
+import json
+import logging
+import os
+import signal
+
+try:
+    import psutil
+except ImportError:  # 선택 의존성
+    psutil = None
+
+from result_store import DATA_DIR
+
+# ================== 상수 ==================
+BROWSER_MAX_RSS_MB = float(os.environ.get("BROWSER_MAX_RSS_MB", "1500"))  # 0이면 비활성
+BROWSER_MAX_PAGES = int(os.environ.get("BROWSER_MAX_PAGES", "200"))       # 0이면 비활성
+BROWSER_SAMPLE_EVERY = max(1, int(os.environ.get("BROWSER_SAMPLE_EVERY", "1")))
+MEMORY_DIR = DATA_DIR / "metrics" / "browser_memory"
+# 부모가 고아 브라우저를 찾을 때 쓰는 표식 (크롬은 알 수 없는 스위치를 무시한다)
+OWNER_SWITCH = "--crawd-owner"
+# 소유자 pid 환경변수: chromedriver 는 스위치를 받지 않으므로 물려받은 환경변수로 소유자를 식별한다
+OWNER_ENV = "CRAWD_OWNER_PID"
+
+log = logging.getLogger(__name__)
+
+# ================== 프로세스 조회 ==================
+def _proc_table():
+    """{pid: (ppid, name, cmdline)} — /proc 기반 (psutil 없을 때)"""
+    table = {}
+    if not os.path.isdir("/proc"):
+        return table
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        pid = int(entry)
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                stat = f.read().decode("utf-8", "replace")
+            name = stat[stat.index("(") + 1: stat.rindex(")")]
+            ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode("utf-8", "replace")
+        except (OSError, ValueError, IndexError):
+            continue
+        table[pid] = (ppid, name, cmdline)
+    return table
+
+def process_tree(root_pid):
+    """root_pid 와 모든 자손 pid 목록"""
+    if not root_pid:
+        return []
+    if psutil is not None:
+        try:
+            root = psutil.Process(root_pid)
+            return [root_pid] + [c.pid for c in root.children(recursive=True)]
+        except psutil.Error:
+            return []
+    table = _proc_table()
+    if root_pid not in table:
+        return []
+    children = {}
+    for pid, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+def _rss_bytes(pid):
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def tree_rss_mb(pids):
+    return sum(_rss_bytes(pid) for pid in pids) / (1024 * 1024)
+
+def memory_supported():
+    return psutil is not None or os.path.isdir("/proc")
+
+def _running(pid):
+    """좀비가 아닌 살아 있는 프로세스인지"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.Error:
+            return False
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read().decode("utf-8", "replace")
+        return stat[stat.rindex(")") + 2:].split()[0] != "Z"
+    except (OSError, ValueError, IndexError):
+        # /proc 이 없는 환경: 존재 여부만 확인
+        try:
+            os.kill(pid, 0)
+            return True
+        except OSError:
+            return False
+
+def kill_pids(pids):
+    """살아 있는 pid 에 SIGKILL (이미 종료된 pid 는 무시)"""
+    killed = 0
+    for pid in pids:
+        if pid == os.getpid() or not _running(pid):
+            continue
+        try:
+            if psutil is not None:
+                psutil.Process(pid).kill()
+            else:
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            killed += 1
+        except Exception:
+            continue
+    return killed
+
+def _environ_value(pid, key):
+    """프로세스 환경변수 값 (읽을 수 없으면 None)"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).environ().get(key)
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/environ", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    prefix = f"{key}=".encode("utf-8")
+    for item in data.split(b"\0"):
+        if item.startswith(prefix):
+            return item[len(prefix):].decode("utf-8", "replace")
+    return None
+
+def _owned(pid, name, cmd, owner_pid):
+    """크롬(OWNER_SWITCH 표식) 또는 OWNER_ENV 를 물려받은 chromedriver 인지"""
+    marker = f"{OWNER_SWITCH}={owner_pid}" if owner_pid else OWNER_SWITCH
+    if marker in cmd:
+        return True
+    if "chromedriver" not in (name or "").lower():
+        return False
+    owner = _environ_value(pid, OWNER_ENV)
+    return owner is not None and (not owner_pid or owner == str(owner_pid))
+
+def reap_orphans(owner_pid=None):
+    """
+    부모가 사라진(고아) 크롬/chromedriver 프로세스 트리를 정리한다.
+    워커가 SIGKILL/OOM 으로 죽으면 chromedriver 가 고아가 되고 그 아래 크롬은 부모(chromedriver)가
+    살아 있으므로, chromedriver 트리째 정리한다. owner_pid 를 주면 해당 소유자의 것만 정리한다.
+    """
+    orphans = []
+    if psutil is not None:
+        for proc in psutil.process_iter(["pid", "ppid", "name", "cmdline"]):
+            cmd = " ".join(proc.info.get("cmdline") or [])
+            ppid = proc.info.get("ppid") or 0
+            if (ppid <= 1 or not psutil.pid_exists(ppid)) and _owned(proc.info["pid"], proc.info.get("name"), cmd, owner_pid):
+                orphans.append(proc.info["pid"])
+    else:
+        table = _proc_table()
+        for pid, (ppid, name, cmd) in table.items():
+            if (ppid <= 1 or ppid not in table) and _owned(pid, name, cmd, owner_pid):
+                orphans.append(pid)
+    pids = []
+    for pid in orphans:
+        pids.extend(process_tree(pid))
+    killed = kill_pids(dict.fromkeys(pids))
+    if killed:
+        log.info("고아 브라우저 프로세스 %d개 정리", killed)
+    return killed
+
+# ================== 세션 ==================
+class BrowserSession:
+    """
+    드라이버 하나의 수명을 관리한다.
+    after_page()를 페이지마다 호출하면 RSS를 샘플링하고 기준 초과 시 드라이버를 재시작한다.
+    on_close 는 close() 로 세션이 끝날 때(재시작 제외) 브라우저 종료 후 호출된다.
+    """
+
+    def __init__(self, factory, worker_name=None, max_rss_mb=BROWSER_MAX_RSS_MB,
+                 max_pages=BROWSER_MAX_PAGES, sample_every=BROWSER_SAMPLE_EVERY, on_close=None):
+        self.factory = factory
+        self.on_close = on_close
+        self.worker_name = worker_name or f"worker-{os.getpid()}"
+        self.max_rss_mb = max_rss_mb
+        self.max_pages = max_pages
+        self.sample_every = sample_every
+        self._driver = None
+        self._pids = []
+        self.pages = 0          # 현재 브라우저가 처리한 페이지 수
+        self.total_pages = 0
+        self.recycles = 0
+        self.peak_rss_mb = 0.0
+        self.last_rss_mb = 0.0
+        MEMORY_DIR.mkdir(parents=True, exist_ok=True)
+        self.curve_path = MEMORY_DIR / f"{self.worker_name}.jsonl"
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = self.factory()
+            self.pages = 0
+            self._pids = self._snapshot_pids()
+            self._record("start")
+        return self._driver
+
+    def _root_pid(self):
+        try:
+            return self._driver.service.process.pid
+        except Exception:
+            return None
+
+    def _snapshot_pids(self):
+        return process_tree(self._root_pid())
+
+    def _record(self, event, rss_mb=None):
+        row = {
+            "ts": datetime.datetime.now().isoformat(timespec="seconds"),
+            "worker": self.worker_name,
+            "event": event,
+            "pages": self.total_pages,
+            "browser_pages": self.pages,
+            "rss_mb": round(rss_mb, 1) if rss_mb is not None else None,
+        }
+        try:
+            with self.curve_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+    def sample(self):
+        """현재 브라우저 프로세스 트리의 RSS(MB)를 측정해 곡선에 기록"""
+        if self._driver is None or not memory_supported():
+            return None
+        self._pids = self._snapshot_pids() or self._pids
+        rss = tree_rss_mb(self._pids)
+        self.last_rss_mb = rss
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        self._record("sample", rss)
+        return rss
+
+    def after_page(self):
+        """페이지 1개 처리 후 호출. 재시작했으면 True"""
+        if self._driver is None:
+            return False
+        self.pages += 1
+        self.total_pages += 1
+        rss = self.sample() if self.pages % self.sample_every == 0 else None
+        if self.max_rss_mb and rss is not None and rss >= self.max_rss_mb:
+            self.recycle(f"rss {rss:.0f}MB >= {self.max_rss_mb:.0f}MB")
+            return True
+        if self.max_pages and self.pages >= self.max_pages:
+            self.recycle(f"pages {self.pages} >= {self.max_pages}")
+            return True
+        return False
+
+    def recycle(self, reason):
+        log.info("♻️ 브라우저 재시작 (%s): %s", self.worker_name, reason)
+        self.recycles += 1
+        self._teardown("recycle")
+
+    def close(self):
+        if self._driver is not None:
+            self._teardown("close")
+        if self.on_close is not None:
+            try:
+                self.on_close()
+            except Exception as exc:
+                log.debug("세션 종료 콜백 실패: %s", exc)
+
+    def _teardown(self, event):
+        driver, self._driver = self._driver, None
+        if driver is None:
+            return
+        pids = self._snapshot_pids() or self._pids
+        try:
+            driver.quit()
+        except Exception as exc:
+            log.debug("driver.quit 실패: %s", exc)
+        # quit 이후에도 남은 chrome/chromedriver 프로세스 강제 종료
+        leftover = kill_pids(pids)
+        if leftover:
+            log.info("종료되지 않은 브라우저 프로세스 %d개 강제 종료 (%s)", leftover, self.worker_name)
+        self._pids = []
+        self._record(event)
+
+# ================== 집계 ==================
+def reset_curves():
+    """이번 실행의 메모리 곡선만 남도록 이전 파일 삭제"""
+    if not MEMORY_DIR.exists():
+        return
+    for path in MEMORY_DIR.glob("*.jsonl"):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+def summarize_curves(since=None):
+    """
+    워커별 메모리 곡선 파일을 요약: {worker: {pages, samples, peak_rss_mb, last_rss_mb, recycles}}
+    since(ISO 시각)를 주면 그 이후 기록만 집계한다.
+    """
+    summary = {}
+    if not MEMORY_DIR.exists():
+        return summary
+    for path in sorted(MEMORY_DIR.glob("*.jsonl")):
+        info = {"pages": 0, "samples": 0, "peak_rss_mb": 0.0, "last_rss_mb": None, "recycles": 0}
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if since and (row.get("ts") or "") < since:
+                        continue
+                    info["pages"] = max(info["pages"], row.get("pages") or 0)
+                    if row.get("event") == "recycle":
+                        info["recycles"] += 1
+                    if row.get("rss_mb") is not None:
+                        info["samples"] += 1
+                        info["last_rss_mb"] = row["rss_mb"]
+                        info["peak_rss_mb"] = max(info["peak_rss_mb"], row["rss_mb"])
+        except OSError:
+            continue
+        if info["pages"] or info["samples"]:
+            summary[path.stem] = info
+    return summary
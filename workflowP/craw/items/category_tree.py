@@ -0,0 +1,285 @@
+# craw/items/category_tree.py
+"""
+카테고리 트리: 1차~4차 경로를 정수 노드 ID 로 표현하는 압축 형식.
+
+- names:  중복 없는 카테고리 이름 목록 (문자열은 한 번만 저장, 로드 시 intern)
+- parent: 노드별 부모 노드 ID (-1 은 1차 카테고리)
+- name:   노드별 이름 인덱스 (names 의 위치)
+- rows:   카테고리 행 순서대로의 노드 ID, links: 같은 위치의 링크
+
+파일에는 이름 하나, 노드 하나([부모, 이름]), 행 하나([노드, 링크])씩 한 줄에 기록해
+카테고리가 추가/변경되면 git diff 가 해당 줄로만 나타난다.
+
+노드 ID 는 추가만 된다: 다시 만들 때 기존 트리의 노드를 그대로 두고 새 경로만 뒤에 붙이므로,
+결과 파일에 저장된 노드 ID 는 사이트에서 카테고리가 빠져도 계속 같은 경로를 가리킨다.
+카테고리 단계가 CSV/JSON 과 함께 저장하고, A_link_filter(행 로드)/B_in_link_get_items(행 → 노드)/
+result_store(결과의 path ↔ node) 가 공유한다.
+"""
+import json
+import logging
+import sys
+import zlib
+from pathlib import Path
+
+# ================== 경로/상수 ==================
+THIS_FILE = Path(__file__).resolve()
+PROJ_ROOT = THIS_FILE.parents[2]
+DATA_DIR = PROJ_ROOT / "craw" / "data"
+TREE_PATH = DATA_DIR / "danawa_category_tree.json"
+TREE_VERSION = 2
+READABLE_VERSIONS = (1, 2)   # 1: parent/name/rows/links 를 각각 한 줄 배열로 저장하던 형식
+DEPTH = 4
+LEVEL_KEYS = tuple(f"{i}차" for i in range(1, DEPTH + 1))
+NODE_KEY = "node"   # 행/결과 안의 노드 ID 키
+
+log = logging.getLogger(__name__)
+
+# ================== 트리 ==================
+class CategoryTree:
+    def __init__(self, names=(), parent=(), name=(), rows=(), links=(), source=None):
+        self.names = [sys.intern(n) for n in names]
+        self.parent = list(parent)
+        self.name = list(name)
+        self.rows = list(rows)
+        self.links = list(links)
+        self.source = source
+        self._name_ids = {n: i for i, n in enumerate(self.names)}
+        self._children = {(p, n): node for node, (p, n) in enumerate(zip(self.parent, self.name))}
+        self._paths = {}
+
+    def __len__(self):
+        return len(self.parent)
+
+    def _intern(self, text):
+        name_id = self._name_ids.get(text)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(sys.intern(text))
+            self._name_ids[text] = name_id
+        return name_id
+
+    def add(self, path):
+        """경로(빈 문자열로 채운 1차~4차)의 노드 ID. 없으면 추가. 빈 경로/중간이 빈 경로는 None."""
+        node = -1
+        for text in _trim(path):
+            if not text:
+                return None
+            key = (node, self._intern(text))
+            child = self._children.get(key)
+            if child is None:
+                child = len(self.parent)
+                self.parent.append(node)
+                self.name.append(key[1])
+                self._children[key] = child
+            node = child
+        return node if node >= 0 else None
+
+    def find(self, path):
+        """경로의 노드 ID (트리에 없으면 None)"""
+        node = -1
+        for text in _trim(path):
+            name_id = self._name_ids.get(text) if text else None
+            if name_id is None:
+                return None
+            node = self._children.get((node, name_id))
+            if node is None:
+                return None
+        return node if node >= 0 else None
+
+    def path(self, node):
+        """노드 ID → DEPTH 길이로 채운 경로 리스트 (범위 밖이면 None)"""
+        cached = self._paths.get(node)
+        if cached is None:
+            if not isinstance(node, int) or not 0 <= node < len(self.parent):
+                return None
+            parts = []
+            cur = node
+            while cur >= 0:
+                parts.append(self.names[self.name[cur]])
+                cur = self.parent[cur]
+            parts.reverse()
+            cached = tuple(parts + [""] * (DEPTH - len(parts)))
+            self._paths[node] = cached
+        return list(cached)
+
+    def iter_rows(self):
+        """카테고리 행을 CSV 행과 같은 dict 로 (노드 ID 포함, 원래 순서 유지)"""
+        for node, link in zip(self.rows, self.links):
+            row = dict(zip(LEVEL_KEYS, self.path(node)))
+            row["link"] = link
+            row[NODE_KEY] = node
+            yield row
+
+    def to_payload(self):
+        payload = {"version": TREE_VERSION}
+        if self.source:
+            payload["source"] = self.source
+        payload["names"] = self.names
+        payload["nodes"] = [[p, n] for p, n in zip(self.parent, self.name)]
+        payload["rows"] = [[node, link] for node, link in zip(self.rows, self.links)]
+        return payload
+
+def _trim(path):
+    parts = list(path or ())[:DEPTH]
+    while parts and not parts[-1]:
+        parts.pop()
+    return parts
+
+def row_path(row):
+    return [row.get(key, "") or "" for key in LEVEL_KEYS]
+
+# ================== 생성 ==================
+def from_rows(rows, base=None, source=None):
+    """
+    카테고리 행(1차~4차, link)으로 트리 생성.
+    base 가 있으면 그 노드/이름 ID 를 유지하고 새 경로만 추가한다 (행/링크 테이블은 새로 구성).
+    """
+    if base is not None:
+        tree = CategoryTree(base.names, base.parent, base.name, source=source)
+    else:
+        tree = CategoryTree(source=source)
+    skipped = 0
+    for row in rows:
+        node = tree.add(row_path(row))
+        if node is None:
+            skipped += 1
+            continue
+        tree.rows.append(node)
+        tree.links.append(row.get("link", "") or "")
+    if skipped:
+        log.warning("카테고리 트리: 경로가 비었거나 중간이 빈 행 %d개 제외", skipped)
+    return tree
+
+def source_signature(path):
+    """원본 CSV 의 크기/crc32 — 트리가 CSV 와 같은 내용에서 만들어졌는지 확인용"""
+    try:
+        data = Path(path).read_bytes()
+    except OSError:
+        return None
+    return {"file": Path(path).name, "size": len(data), "crc32": zlib.crc32(data)}
+
+def prefix_signature(tree, nodes):
+    """앞쪽 nodes 개 노드의 (부모, 이름) crc32 — 저장된 노드 ID 가 같은 경로를 가리키는지 확인용"""
+    crc = 0
+    for node in range(min(nodes, len(tree))):
+        crc = zlib.crc32(f"{tree.parent[node]}\x1f{tree.names[tree.name[node]]}\x1e".encode("utf-8"), crc)
+    return crc
+
+def is_fresh(tree, csv_path):
+    if tree is None or not tree.source:
+        return False
+    try:
+        if Path(csv_path).stat().st_size != tree.source.get("size"):
+            return False
+    except OSError:
+        # CSV 가 없으면 트리만으로 충분
+        return True
+    return source_signature(csv_path) == tree.source
+
+# ================== 저장/로드 ==================
+_CACHE = {"key": None, "tree": None}
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+def encode(tree):
+    """최상위 키마다 한 줄, 리스트 키는 원소마다 한 줄 (JSON 으로 그대로 읽힘)"""
+    items = list(tree.to_payload().items())
+    lines = ["{"]
+    for i, (key, value) in enumerate(items):
+        tail = "," if i < len(items) - 1 else ""
+        if isinstance(value, list) and value:
+            lines.append(f"{_dumps(key)}:[")
+            lines.extend(_dumps(v) + "," for v in value[:-1])
+            lines.append(_dumps(value[-1]))
+            lines.append("]" + tail)
+        else:
+            lines.append(f"{_dumps(key)}:{_dumps(value)}{tail}")
+    lines.append("}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def decode(data):
+    payload = json.loads(data)
+    version = payload.get("version")
+    if version not in READABLE_VERSIONS:
+        raise ValueError(f"지원하지 않는 카테고리 트리 버전: {version!r}")
+    if version == 1:
+        parent, name = payload.get("parent") or [], payload.get("name") or []
+        rows, links = payload.get("rows") or [], payload.get("links") or []
+    else:
+        nodes, table = payload.get("nodes") or [], payload.get("rows") or []
+        parent, name = [p for p, _ in nodes], [n for _, n in nodes]
+        rows, links = [r for r, _ in table], [lk for _, lk in table]
+    return CategoryTree(payload.get("names") or [], parent, name, rows, links, payload.get("source"))
+
+def load(path=TREE_PATH):
+    """트리 로드 (파일 mtime/크기 기준 캐시). 없거나 손상되면 None."""
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if _CACHE["key"] == key:
+        return _CACHE["tree"]
+    try:
+        tree = decode(path.read_bytes())
+    except (OSError, ValueError, TypeError) as exc:
+        log.warning("카테고리 트리 로드 실패: %s", exc)
+        return None
+    _CACHE["key"], _CACHE["tree"] = key, tree
+    return tree
+
+def save(tree, path=TREE_PATH):
+    """원자적 저장. 내용이 같으면 파일을 건드리지 않고 False."""
+    path = Path(path)
+    payload = encode(tree)
+    try:
+        if path.read_bytes() == payload:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(payload)
+    tmp_path.replace(path)
+    return True
+
+def rebuild(rows, csv_path=None, path=TREE_PATH):
+    """기존 트리의 노드 ID 를 유지한 채 rows 로 트리를 다시 만들어 저장"""
+    tree = from_rows(rows, base=load(path), source=source_signature(csv_path) if csv_path else None)
+    save(tree, path)
+    return tree
+
+# ================== 결과 레코드 ==================
+def compact_record(record, tree):
+    """저장용: path 를 노드 ID 로 바꾼 레코드 사본 (트리에 없는 경로면 원본 그대로)"""
+    if tree is None or not isinstance(record, dict) or "path" not in record:
+        return record
+    path = record["path"]
+    node = record.get(NODE_KEY)
+    if node is None or tree.path(node) != path:
+        node = tree.find(path)
+        if node is None or tree.path(node) != path:
+            return record
+    out = {}
+    for key, value in record.items():
+        if key == "path":
+            out[NODE_KEY] = node
+        elif key != NODE_KEY:
+            out[key] = value
+    return out
+
+def expand_record(record, tree):
+    """로드용: 노드 ID 만 있는 레코드에 path 복원 (compact_record 의 역변환, node 는 유지)"""
+    if not isinstance(record, dict) or NODE_KEY not in record or "path" in record:
+        return record
+    path = tree.path(record[NODE_KEY]) if tree is not None else None
+    if path is None:
+        return record
+    out = {}
+    for key, value in record.items():
+        if key == NODE_KEY:
+            out["path"] = path
+        out[key] = value
+    return out
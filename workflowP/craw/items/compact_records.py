@@ -0,0 +1,150 @@
+# craw/items/compact_records.py
+"""
+아이템 결과의 메모리/IPC 압축 표현.
+
+- Product: 상품 dict(PRODUCT_FIELDS 10개 키)와 같은 읽기 전용 매핑이지만 __slots__ 로 저장하고,
+  링크/이미지 URL 은 자주 나오는 앞부분(URL_PREFIXES)을 번호로 바꿔 나머지만 보관한다.
+  키 순서가 PRODUCT_FIELDS 와 같은 상품만 변환하므로 JSON 으로 저장하면(json_default) 원래 dict 와 같은 바이트가 된다.
+- 카테고리 경로/가격/평점 텍스트 등 반복되는 짧은 문자열은 intern 해 레코드 간에 공유한다.
+- 워커 → 부모 전송은 기존처럼 dict 리스트를 Pool 이 pickle 한다. 부모가 받은 배치를 compact_records 로 변환한다
+  (값 튜플만 marshal 로 보내는 방식은 부모의 Product 생성까지 합치면 pickle 보다 느렸다).
+
+COMPACT_RECORDS=0 이면 모든 함수가 입력을 그대로 돌려준다 (기존 dict 경로).
+Selenium/파일 I/O 의존성이 없다.
+"""
+import os
+import re
+import sys
+from collections.abc import Mapping
+
+# ================== 상수 ==================
+COMPACT_RECORDS = os.environ.get("COMPACT_RECORDS", "1") != "0"
+PRODUCT_FIELDS = (
+    "link", "image", "prod_name", "tags", "price", "rating", "review_count", "rating_weighted",
+    "raw_rating_text", "raw_review_text",
+)
+# 앞에서부터 처음 맞는 항목 사용 (긴 것을 먼저). 번호는 프로세스 안에서만 쓰이고 저장/전송되지 않는다.
+URL_PREFIXES = (
+    "https://prod.danawa.com/bridge/loadingBridge.html?",
+    "https://prod.danawa.com/bridge/go_link_goods.php?",
+    "https://prod.danawa.com/info/?",
+    "https://prod.danawa.com/",
+    "https://img.danawa.com/prod_img/500000/",
+    "//img.danawa.com/prod_img/500000/",
+    "https://img.danawa.com/",
+    "//img.danawa.com/",
+    "https://cimg.cowave.kr/image/",
+    "//cimg.cowave.kr/image/",
+)
+INTERN_MAX_LEN = 32              # 이보다 짧은 텍스트 필드는 intern (가격/평점/리뷰 수 텍스트 등)
+_RECORD_INTERN_KEYS = ("list_selector",)
+_PLAIN_FIELDS = frozenset(PRODUCT_FIELDS[2:])
+# 접두사마다 그룹 하나: match.lastindex - 1 = URL_PREFIXES 번호 (startswith 반복보다 빠름)
+_PREFIX_RE = re.compile("|".join(f"({re.escape(prefix)})" for prefix in URL_PREFIXES))
+
+# ================== URL ==================
+def _split(url):
+    if url.__class__ is str:
+        match = _PREFIX_RE.match(url)
+        if match:
+            return match.lastindex - 1, url[match.end():]
+    return -1, url
+
+def _join(prefix, rest):
+    return rest if prefix < 0 else URL_PREFIXES[prefix] + rest
+
+def _intern(value):
+    return sys.intern(value) if value.__class__ is str and len(value) < INTERN_MAX_LEN else value
+
+# ================== 상품 ==================
+class Product(Mapping):
+    """상품 하나: PRODUCT_FIELDS 순서의 dict 와 같은 읽기 전용 매핑 (__slots__ 저장)"""
+
+    __slots__ = (
+        "_link_prefix", "_link", "_image_prefix", "_image", "prod_name", "tags", "price", "rating",
+        "review_count", "rating_weighted", "raw_rating_text", "raw_review_text",
+    )
+
+    def __init__(self, link, image, prod_name, tags, price, rating, review_count, rating_weighted,
+                 raw_rating_text, raw_review_text):
+        self._link_prefix, self._link = _split(link)
+        self._image_prefix, self._image = _split(image)
+        self.prod_name = prod_name
+        self.tags = tags
+        self.price = _intern(price)
+        self.rating = rating
+        self.review_count = review_count
+        self.rating_weighted = rating_weighted
+        self.raw_rating_text = _intern(raw_rating_text)
+        self.raw_review_text = _intern(raw_review_text)
+
+    def __getitem__(self, key):
+        if key == "link":
+            return _join(self._link_prefix, self._link)
+        if key == "image":
+            return _join(self._image_prefix, self._image)
+        if key in _PLAIN_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in PRODUCT_FIELDS
+
+    def __iter__(self):
+        return iter(PRODUCT_FIELDS)
+
+    def __len__(self):
+        return len(PRODUCT_FIELDS)
+
+    def __repr__(self):
+        return f"Product({dict(self)!r})"
+
+    def as_tuple(self):
+        """PRODUCT_FIELDS 순서의 원래 값 (pickle/JSON 용)"""
+        return (
+            _join(self._link_prefix, self._link), _join(self._image_prefix, self._image), self.prod_name,
+            self.tags, self.price, self.rating, self.review_count, self.rating_weighted,
+            self.raw_rating_text, self.raw_review_text,
+        )
+
+    def __reduce__(self):
+        # pickle 될 때(Pool 인자, record_bench 의 Manager 리스트 등) dict 대신 값 튜플 하나 (접두사 번호는 보내지 않는다)
+        return Product, self.as_tuple()
+
+def compact_product(product):
+    """키가 정확히 PRODUCT_FIELDS 순서인 상품 dict 만 Product 로 (스텁/참조/기타는 그대로)"""
+    if type(product) is dict and len(product) == len(PRODUCT_FIELDS) and tuple(product) == PRODUCT_FIELDS:
+        return Product(*product.values())
+    return product
+
+def json_default(obj):
+    """json.dumps(default=...) — Product 를 원래 키 순서의 dict 로"""
+    if isinstance(obj, Product):
+        return dict(zip(PRODUCT_FIELDS, obj.as_tuple()))
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# ================== 결과 레코드 ==================
+def _intern_record(record):
+    path = record.get("path")
+    if isinstance(path, list):
+        record["path"] = [sys.intern(p) if isinstance(p, str) else p for p in path]
+    for key in _RECORD_INTERN_KEYS:
+        value = record.get(key)
+        if isinstance(value, str):
+            record[key] = sys.intern(value)
+
+def compact_record(record):
+    """결과 레코드의 상품을 Product 로 바꾸고 경로 문자열을 intern (레코드를 직접 수정해 반환)"""
+    if not COMPACT_RECORDS or not isinstance(record, dict):
+        return record
+    _intern_record(record)
+    products = record.get("products")
+    if products:
+        record["products"] = [compact_product(p) for p in products]
+    return record
+
+def compact_records(records):
+    if COMPACT_RECORDS:
+        for record in records:
+            compact_record(record)
+    return records
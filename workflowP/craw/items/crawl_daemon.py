@@ -0,0 +1,294 @@
+# craw/items/crawl_daemon.py
+"""
+아이템 크롤 데몬: 워커 프로세스와 크롬을 살려 둔 채(warm) 작업 큐 디렉터리의 크롤 작업을 처리한다.
+
+- 한 번 띄운 Pool(WORKERS) 의 각 프로세스(ITEM_EXECUTOR=thread 면 각 스레드)가 드라이버를 작업 간에 재사용한다.
+- 링크 목록(CSV)과 기존 결과는 메모리에 캐시하고, 파일이 바뀐 경우에만 다시 읽는다.
+- 작업은 QUEUE_DIR/incoming/*.json 파일로 들어오며, 처리 후 done/ 으로 옮겨 결과를 기록한다.
+
+작업 종류:
+    {"type": "cycle"}                               전체 미완료 링크 크롤 (B_in_link_get_items 1회 실행과 동일)
+    {"type": "categories", "names": ["가전 · TV"]}  경로에 해당 이름(또는 "1차 > 2차" 접두어)이 있는 링크 재크롤
+    {"type": "link", "link": "https://..."}         단일 링크 재크롤
+    {"type": "shutdown"}                            데몬 종료
+
+사용 예:
+    python crawl_daemon.py serve
+    python crawl_daemon.py serve --cycles 2 --cycle-delay 60 --exit-when-done
+    python crawl_daemon.py submit link "https://prod.danawa.com/list/?cate=11254120" --wait
+    python crawl_daemon.py submit categories "AI > AI 노트북" --wait
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import signal
+import sys
+import time
+import uuid
+
+import A_link_filter
+import B_in_link_get_items as items
+from result_store import DATA_DIR, MANIFEST_PATH, read_existing_results
+from rank_index import category_name
+import product_index
+
+# ================== 상수 ==================
+QUEUE_DIR = DATA_DIR / "crawl_queue"
+INCOMING_DIR = QUEUE_DIR / "incoming"
+RUNNING_DIR = QUEUE_DIR / "running"
+DONE_DIR = QUEUE_DIR / "done"
+POLL_INTERVAL = float(os.environ.get("DAEMON_POLL_INTERVAL", "1.0"))
+JOB_TYPES = ("cycle", "categories", "link", "shutdown")
+
+log = logging.getLogger("crawl_daemon")
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+def _write_json(path, payload):
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    tmp.replace(path)
+
+# ================== 작업 제출 ==================
+def submit_job(job):
+    """작업 파일을 incoming/ 에 원자적으로 생성하고 작업 ID를 반환"""
+    if job.get("type") not in JOB_TYPES:
+        raise ValueError(f"알 수 없는 작업 종류: {job.get('type')}")
+    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+    job_id = job.get("id") or f"{datetime.datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    job = {**job, "id": job_id, "submitted_at": datetime.datetime.now().isoformat()}
+    _write_json(INCOMING_DIR / f"{job_id}.json", job)
+    return job_id
+
+def wait_job(job_id, timeout=0):
+    """done/ 에 결과가 생길 때까지 대기 (timeout=0 이면 무제한)"""
+    done_path = DONE_DIR / f"{job_id}.json"
+    deadline = time.time() + timeout if timeout else None
+    while not done_path.exists():
+        if deadline and time.time() > deadline:
+            return None
+        time.sleep(POLL_INTERVAL)
+    with done_path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+# ================== 데몬 ==================
+class CrawlDaemon:
+    def __init__(self, workers=items.WORKERS):
+        self.workers = workers
+        self.pool = None
+        self.rows = None
+        self.rows_mtime = None
+        self.results = None
+        self.results_mtime = None
+        self.stopping = False
+
+    # ---- 캐시 ----
+    def _rows(self):
+        mtime = _mtime(A_link_filter.CSV_PATH)
+        if self.rows is None or mtime != self.rows_mtime:
+            self.rows = A_link_filter.to_list()
+            self.rows_mtime = mtime
+            log.info("링크 목록 로드: %d개", len(self.rows))
+        return self.rows
+
+    def _results(self):
+        mtime = _mtime(MANIFEST_PATH)
+        if self.results is None or mtime != self.results_mtime:
+            self.results = read_existing_results()
+            self.results_mtime = mtime
+            log.info("기존 결과 로드: %d개", len(self.results))
+        return self.results
+
+    def _select_links(self, job):
+        rows = self._rows()
+        if job["type"] == "link":
+            # 필터된 링크 목록(CSV)에 있는 링크만 크롤 대상이 된다
+            return [job["link"]] if any(r.get("link") == job.get("link") for r in rows) else []
+        names = [n.strip() for n in job.get("names") or [] if n and n.strip()]
+        selected = []
+        for r in rows:
+            path = [r.get(f"{i}차", "") for i in range(1, 5)]
+            full = category_name(path)
+            if any(n in path or full.startswith(n) for n in names):
+                selected.append(r.get("link"))
+        return selected
+
+    # ---- 실행 ----
+    def run_job(self, job):
+        started = time.perf_counter()
+        job_type = job.get("type")
+        only_links = None
+        if job_type in ("categories", "link"):
+            only_links = self._select_links(job)
+            if not only_links:
+                return {"ok": False, "error": "대상 링크 없음", "links": 0}
+        before = len(self._results())
+        final_data = items.main(
+            rows=self._rows(),
+            prev_results=self._results(),
+            only_links=only_links,
+            pool=self.pool,
+        )
+        self.results = final_data
+        self.results_mtime = _mtime(MANIFEST_PATH)
+        return {
+            "ok": True,
+            "links": len(only_links) if only_links is not None else None,
+            "total_before": before,
+            "total_after": len(final_data),
+            "elapsed_s": round(time.perf_counter() - started, 2),
+        }
+
+    def _claim_next(self):
+        """
+        처리할 수 있는 첫 작업을 running/ 으로 가져온다: (경로, 작업, None).
+        not_before 가 아직 안 된 작업은 건너뛰어 뒤의 작업을 막지 않는다.
+        가져올 작업이 없으면 (None, None, 대기 중인 작업의 가장 이른 not_before 또는 None).
+        """
+        next_due = None
+        now = time.time()
+        for path in sorted(INCOMING_DIR.glob("*.json")):
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    peek = json.load(f)
+            except FileNotFoundError:
+                continue  # 다른 데몬이 먼저 가져감
+            except Exception:
+                peek = None  # 파싱 실패: 가져가서 실패로 기록
+            not_before = peek.get("not_before") if isinstance(peek, dict) else None
+            if not_before and now < not_before:
+                next_due = not_before if next_due is None else min(next_due, not_before)
+                continue
+            target = RUNNING_DIR / path.name
+            try:
+                path.replace(target)
+            except OSError:
+                continue  # 다른 데몬이 먼저 가져감
+            try:
+                with target.open("r", encoding="utf-8") as f:
+                    return target, json.load(f), None
+            except Exception as exc:
+                log.warning("작업 파일 파싱 실패(%s): %s", target.name, exc)
+                self._finish(target, {"id": target.stem}, {"ok": False, "error": str(exc)})
+        return None, None, next_due
+
+    def _finish(self, running_path, job, outcome):
+        _write_json(DONE_DIR / running_path.name, {
+            **job,
+            "finished_at": datetime.datetime.now().isoformat(),
+            "result": outcome,
+        })
+        running_path.unlink(missing_ok=True)
+
+    def _requeue_stale(self):
+        """이전 데몬이 처리 중 종료된 작업을 다시 대기열로 돌린다."""
+        for path in RUNNING_DIR.glob("*.json"):
+            path.replace(INCOMING_DIR / path.name)
+
+    def serve(self, exit_when_done=False):
+        for d in (INCOMING_DIR, RUNNING_DIR, DONE_DIR):
+            d.mkdir(parents=True, exist_ok=True)
+        self._requeue_stale()
+
+        log.info("🚀 크롤 데몬 시작: 워커 %d개 (queue=%s)", self.workers, QUEUE_DIR)
+        # 시작 시점의 기존 상품 지문을 워커에 넘겨 변경 없는 상품의 상세 파싱을 건너뛴다
+        known = product_index.known_fingerprints(self._results()) if product_index.PRODUCT_SKIP_KNOWN else None
+        # ITEM_EXECUTOR=thread 면 워커가 한 프로세스 안의 스레드 (드라이버는 스레드별로 유지)
+        self.pool = items.create_pool(self.workers, known, warm=True)
+
+        # 워커 생성 이후에 설치해야 워커 프로세스가 부모의 핸들러를 물려받지 않는다
+        def _stop(signum, frame):
+            self.stopping = True
+
+        signal.signal(signal.SIGINT, _stop)
+        signal.signal(signal.SIGTERM, _stop)
+        try:
+            while not self.stopping:
+                running_path, job, next_due = self._claim_next()
+                if job is None:
+                    if exit_when_done and next_due is None:
+                        break
+                    # 처리할 작업이 없을 때만 대기 (예약된 cycle 이 있어도 새 작업은 다음 폴링에 바로 처리)
+                    wait = POLL_INTERVAL if next_due is None else min(POLL_INTERVAL, next_due - time.time())
+                    time.sleep(max(0.0, wait))
+                    continue
+                if job.get("type") == "shutdown":
+                    self._finish(running_path, job, {"ok": True})
+                    break
+                log.info("▶ 작업 시작: %s (%s)", job.get("id"), job.get("type"))
+                try:
+                    outcome = self.run_job(job)
+                except Exception as exc:
+                    log.exception("작업 실패: %s", job.get("id"))
+                    outcome = {"ok": False, "error": str(exc)}
+                self._finish(running_path, job, outcome)
+                log.info("■ 작업 종료: %s → %s", job.get("id"), outcome)
+        finally:
+            # close/join: 워커가 정상 종료하며 Finalize로 드라이버를 정리한다 (스레드 워커는 일괄 정리)
+            items.shutdown_pool(self.pool)
+            log.info("크롤 데몬 종료")
+
+# ================== CLI ==================
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s][%(processName)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(description="warm 브라우저 크롤 데몬")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve", help="데몬 실행")
+    p_serve.add_argument("--workers", type=int, default=items.WORKERS)
+    p_serve.add_argument("--cycles", type=int, default=0, help="시작 시 cycle 작업 N개를 등록")
+    p_serve.add_argument("--cycle-delay", type=int, default=0, help="등록한 cycle 작업 간 간격(초)")
+    p_serve.add_argument("--exit-when-done", action="store_true", help="대기열이 비면 종료")
+    p_submit = sub.add_parser("submit", help="작업 등록")
+    p_submit.add_argument("type", choices=JOB_TYPES)
+    p_submit.add_argument("targets", nargs="*", help="link: URL / categories: 카테고리 이름 또는 경로 접두어")
+    p_submit.add_argument("--wait", action="store_true", help="완료까지 대기 후 결과 출력")
+    p_submit.add_argument("--timeout", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "serve":
+        queued = [
+            p for d in (INCOMING_DIR, RUNNING_DIR) if d.exists() for p in d.glob("*.json")
+        ]
+        if args.cycles and queued:
+            # 재시도로 다시 실행된 경우: 남아 있는 작업만 이어서 처리
+            log.info("대기 중인 작업 %d개가 있어 cycle 작업을 새로 등록하지 않습니다", len(queued))
+        else:
+            base = time.time()
+            for n in range(args.cycles):
+                submit_job({"type": "cycle", "not_before": base + n * args.cycle_delay})
+        CrawlDaemon(workers=args.workers).serve(exit_when_done=args.exit_when_done)
+        return 0
+
+    job = {"type": args.type}
+    if args.type == "link":
+        if len(args.targets) != 1:
+            parser.error("link 작업은 URL 하나가 필요합니다.")
+        job["link"] = args.targets[0]
+    elif args.type == "categories":
+        if not args.targets:
+            parser.error("categories 작업은 카테고리 이름이 하나 이상 필요합니다.")
+        job["names"] = args.targets
+    job_id = submit_job(job)
+    print(job_id)
+    if args.wait:
+        done = wait_job(job_id, args.timeout)
+        if done is None:
+            print("시간 초과")
+            return 1
+        print(json.dumps(done.get("result"), ensure_ascii=False, indent=2))
+        return 0 if (done.get("result") or {}).get("ok") else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
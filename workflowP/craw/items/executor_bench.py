@@ -0,0 +1,152 @@
+# craw/items/executor_bench.py
+"""
+아이템 단계 실행기 벤치마크: 프로세스 Pool vs 스레드 풀 (실제 크롬 사용).
+
+같은 카테고리 링크 앞부분 N개를 실행기마다 별도 프로세스에서 크롤하고 다음을 측정한다.
+결과 파일(quick_text_probe_parallel)은 건드리지 않는다.
+
+- 처리량: 방문 링크/초, 첫 배치까지 걸린 시간(워커/드라이버 기동 포함)
+- 파이썬 메모리: 부모 + 워커 프로세스 최대 RSS, 풀 생성 전 대비 워커당 증가분 (브라우저 제외)
+- 브라우저 메모리: 워커별 크롬 프로세스 트리 최대 RSS 평균 (browser_lifecycle 메모리 곡선)
+
+사용 예:
+    python executor_bench.py                          # process, thread 각각 40개 링크
+    python executor_bench.py --links 100 --workers 4 --executors thread,process
+    PREFETCH_NEXT=1 python executor_bench.py        # 탭 더블 버퍼링 켠 상태로 비교
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from result_store import DATA_DIR
+from browser_lifecycle import summarize_curves, tree_rss_mb
+
+# ================== 상수 ==================
+BENCH_PATH = DATA_DIR / "metrics" / "executor_bench.json"
+DEFAULT_LINKS = 40
+
+# ================== 측정 ==================
+def run_executor(executor, n_links, workers, batch_size):
+    """현재 프로세스에서 한 실행기로 n_links 개 링크 크롤 (결과는 저장하지 않음)"""
+    import B_in_link_get_items as items
+    from A_link_filter import to_list
+
+    rows = to_list()[:n_links]
+    chunks = [
+        (rows[i:i + batch_size], i + 1, len(rows), 0)
+        for i in range(0, len(rows), batch_size)
+    ]
+    since = datetime.datetime.now().isoformat(timespec="seconds")
+    base_rss = tree_rss_mb([os.getpid()])
+
+    started = time.perf_counter()
+    pool = items.create_pool(workers, None, warm=True, executor=executor)
+    visited = ok = prefetched = 0
+    first_batch_s = None
+    peak_rss = base_rss
+    try:
+        for batch_results in pool.imap_unordered(items.worker, chunks):
+            if first_batch_s is None:
+                first_batch_s = time.perf_counter() - started
+            visited += len(batch_results)
+            ok += sum(1 for r in batch_results if r.get("ok"))
+            prefetched += sum(1 for r in batch_results if r.get("_prefetched"))
+            peak_rss = max(peak_rss, tree_rss_mb(items._pool_pids(pool)))
+        elapsed = time.perf_counter() - started
+    finally:
+        items.shutdown_pool(pool)
+
+    browsers = summarize_curves(since=since)
+    browser_peaks = [info["peak_rss_mb"] for info in browsers.values() if info["samples"]]
+    return {
+        "executor": executor,
+        "workers": workers,
+        "links": visited,
+        "ok": ok,
+        "elapsed_s": round(elapsed, 1),
+        "first_batch_s": round(first_batch_s, 1) if first_batch_s is not None else None,
+        "links_per_sec": round(visited / elapsed, 3) if elapsed else None,
+        "prefetch_hits": prefetched if items.PREFETCH_NEXT else None,
+        "python_rss_mb": round(peak_rss, 1),
+        "python_rss_per_worker_mb": round(max(0.0, peak_rss - base_rss) / max(1, workers), 1),
+        "browser_rss_per_worker_mb": (
+            round(sum(browser_peaks) / len(browser_peaks), 1) if browser_peaks else None
+        ),
+    }
+
+# ================== 출력 ==================
+def print_table(rows):
+    header = (
+        f"{'executor':>9} {'workers':>7} {'links':>6} {'ok':>5} {'elapsed(s)':>10} {'first(s)':>8} "
+        f"{'links/s':>8} {'py RSS':>8} {'py/worker':>9} {'chrome/worker':>13}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['executor']:>9} 실패: {row['error']}")
+            continue
+        print(
+            f"{row['executor']:>9} {row['workers']:>7} {row['links']:>6} {row['ok']:>5} {row['elapsed_s']:>10} "
+            f"{row['first_batch_s'] or '-':>8} {row['links_per_sec'] or '-':>8} {row['python_rss_mb']:>8} "
+            f"{row['python_rss_per_worker_mb']:>9} {row['browser_rss_per_worker_mb'] or '-':>13}"
+        )
+
+# ================== CLI ==================
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="아이템 단계 실행기(process/thread) 벤치마크")
+    parser.add_argument("--executors", default="process,thread", help="비교할 실행기 목록")
+    parser.add_argument("--links", type=int, default=DEFAULT_LINKS, help="크롤할 링크 수 (목록 앞부분)")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WORKERS", "4")))
+    parser.add_argument("--batch-size", type=int, default=int(os.environ.get("BATCH_SIZE", "10")))
+    parser.add_argument("--out", type=Path, default=BENCH_PATH, help="결과 JSON 경로")
+    parser.add_argument("--one", default=None, help=argparse.SUPPRESS)  # 내부용: 단일 실행기 실행
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    if args.one is not None:
+        result = run_executor(args.one, max(1, args.links), max(1, args.workers), max(1, args.batch_size))
+        print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    executors = [e.strip() for e in args.executors.split(",") if e.strip()]
+    rows = []
+    for executor in executors:
+        print(f"▶ {executor}: 링크 {args.links}개, 워커 {args.workers}개", flush=True)
+        cmd = [
+            sys.executable, str(Path(__file__).resolve()),
+            "--one", executor, "--links", str(args.links),
+            "--workers", str(args.workers), "--batch-size", str(args.batch_size),
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        row = {"executor": executor}
+        try:
+            row.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+        except (IndexError, json.JSONDecodeError):
+            row["error"] = (proc.stderr.strip().splitlines() or [f"exit {proc.returncode}"])[-1]
+        rows.append(row)
+
+    print()
+    print_table(rows)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with args.out.open("w", encoding="utf-8") as f:
+        json.dump({
+            "config": {
+                "links": args.links, "workers": args.workers, "batch_size": args.batch_size,
+                "prefetch_next": os.environ.get("PREFETCH_NEXT", "0") == "1",
+            },
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "results": rows,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\n결과 저장: {args.out}")
+    return 1 if any(row.get("error") for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
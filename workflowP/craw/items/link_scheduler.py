@@ -0,0 +1,106 @@
+# craw/items/link_scheduler.py
+"""
+아이템 단계 작업 분배: 링크별 과거 크롤 시간으로 긴 작업부터(LPT) 배치를 만들고,
+남은 작업량에 비례해 배치를 점점 작게 나눈다(guided scheduling).
+
+- 배치는 imap_unordered 로 비어 있는 워커가 하나씩 가져가므로(동적 분배) 느린 카테고리가
+  한 배치에 몰려 실행 끝에 워커 하나만 남는 꼬리 지연이 줄어든다.
+- 링크 비용은 실행마다 관측값으로 갱신되어 출력 디렉터리(link_costs.json)에 저장된다.
+  관측값이 저장값과 크게 다르지 않으면 갱신하지 않아 커밋 diff 를 줄인다.
+
+Selenium/파일 I/O 의존성이 없으며, 저장은 result_store 가 담당한다.
+"""
+import os
+import statistics
+
+# ================== 상수 ==================
+# cost: 비용 기준 긴 작업 우선 + 점점 작아지는 배치 | fixed: CSV 순서 BATCH_SIZE 고정 배치 (기존 방식)
+ITEM_SCHEDULE = os.environ.get("ITEM_SCHEDULE", "cost").strip().lower()
+SCHEDULES = ("cost", "fixed")
+# 기록이 없을 때의 링크 비용(초). 기록이 있으면 기록의 중앙값을 쓴다.
+DEFAULT_COST_S = float(os.environ.get("LINK_COST_DEFAULT_S", "8"))
+# 배치 하나가 남은 작업량(워커당)에서 차지하는 비율의 역수: 클수록 배치가 잘다
+GUIDED_FACTOR = max(1.0, float(os.environ.get("SCHEDULE_GUIDED_FACTOR", "2")))
+COST_SMOOTHING = 0.5      # 새 관측값 가중치 (지수 이동 평균)
+COST_MIN_CHANGE = 0.25    # 관측값이 저장값과 이 비율 미만으로 다르면 잡음으로 보고 저장값 유지
+
+# ================== 비용 ==================
+def default_cost(costs):
+    """기록이 없는 링크의 추정 비용"""
+    values = [v for v in costs.values() if isinstance(v, (int, float)) and v > 0]
+    return statistics.median(values) if values else DEFAULT_COST_S
+
+def estimate(rows, costs):
+    """rows 순서대로의 추정 비용(초) 리스트"""
+    fallback = default_cost(costs)
+    out = []
+    for row in rows:
+        value = costs.get(row.get("link"))
+        out.append(float(value) if isinstance(value, (int, float)) and value > 0 else fallback)
+    return out
+
+def update_cost(costs, link, observed_s):
+    """
+    관측값을 지수 이동 평균으로 반영. 저장값이 바뀌었으면 True.
+    임계값은 평활값이 아니라 관측값 자체의 상대 변화에 적용한다
+    (평활값에 적용하면 가중치 0.5 로 변화가 절반이 되어 50% 미만의 변동은 영영 반영되지 않음).
+    """
+    if not link or observed_s is None or observed_s <= 0:
+        return False
+    old = costs.get(link)
+    if not isinstance(old, (int, float)) or old <= 0:
+        costs[link] = round(observed_s, 1)
+        return True
+    if abs(observed_s - old) / old < COST_MIN_CHANGE:
+        return False
+    new = (1 - COST_SMOOTHING) * old + COST_SMOOTHING * observed_s
+    costs[link] = round(new, 1)
+    return True
+
+# ================== 배치 ==================
+def fixed_chunks(rows, batch_size):
+    """기존 방식: 입력 순서대로 batch_size 개씩"""
+    size = max(1, min(batch_size, len(rows))) if rows else 1
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+def guided_chunks(rows, costs, workers, max_batch):
+    """
+    긴 작업부터 정렬한 뒤, 배치마다 (남은 추정 비용 / (워커 수 × GUIDED_FACTOR)) 만큼 채운다.
+    실행 초반에는 배치가 커서(최대 max_batch) 브라우저 재사용/미리 로드 이득을 유지하고,
+    끝으로 갈수록 한 링크 단위까지 작아져 워커들이 거의 동시에 끝난다.
+    반환: [(배치 rows, 배치 추정 비용)]
+    """
+    est = estimate(rows, costs)
+    order = sorted(range(len(rows)), key=lambda i: -est[i])  # 안정 정렬: 같은 비용은 입력 순서 유지
+    remaining = sum(est)
+    workers = max(1, workers)
+    max_batch = max(1, max_batch)
+    chunks, batch, batch_cost = [], [], 0.0
+    target = None
+    for i in order:
+        if target is None:
+            target = remaining / (workers * GUIDED_FACTOR)
+        batch.append(rows[i])
+        batch_cost += est[i]
+        if batch_cost >= target or len(batch) >= max_batch:
+            chunks.append((batch, batch_cost))
+            remaining -= batch_cost
+            batch, batch_cost, target = [], 0.0, None
+    if batch:
+        chunks.append((batch, batch_cost))
+    return chunks
+
+# ================== 진행/ETA ==================
+def eta_seconds(remaining_est_s, done_est_s, done_actual_s, workers):
+    """
+    남은 추정 비용을 지금까지의 (실제/추정) 비율로 보정해 워커 수로 나눈 남은 시간(초).
+    아직 완료된 작업이 없으면 추정 비용 그대로 사용.
+    """
+    if remaining_est_s <= 0:
+        return 0.0
+    ratio = done_actual_s / done_est_s if done_est_s > 0 and done_actual_s > 0 else 1.0
+    return remaining_est_s * ratio / max(1, workers)
+
+def tail_index(n_chunks, workers):
+    """이 개수의 배치가 끝나면 남은 배치 < 워커 수 → 놀고 있는 워커가 생기기 시작 (꼬리 구간 시작)"""
+    return max(1, n_chunks - max(1, workers) + 1)
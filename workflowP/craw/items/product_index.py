@@ -0,0 +1,228 @@
+# craw/items/product_index.py
+"""
+전역 상품 인덱스: 상품 브리지 링크의 pcode 로 상품을 식별하고, 여러 카테고리
+(예: "로켓배송관" 미러 카테고리)에 중복으로 실린 상품의 속성을 한 번만 저장한다.
+
+- 상품 ID: pcode(+ link_pcode) 또는 go_link_goods 의 link_prod_c
+- 두 개 이상의 카테고리 결과에서 참조되는 상품만 인덱스에 저장하고, 결과에는
+  {"id": ..., <인덱스 값과 다른 필드>} 형태의 참조만 남긴다.
+  한 카테고리에서만 나오는 상품은 참조가 오히려 더 크므로 결과에 그대로 둔다.
+- 메모리상의 결과 형식은 바뀌지 않는다: 저장 시 dedupe_records, 로드 시 expand_records.
+  상품은 dict 또는 compact_records.Product(같은 키의 읽기 전용 매핑)일 수 있어 Mapping 으로 다룬다.
+
+Selenium/파일 I/O 의존성이 없으며, 디스크 레이아웃은 result_store 가 담당한다.
+"""
+import json
+import os
+import time
+import zlib
+from collections.abc import Mapping
+from urllib.parse import urlparse, parse_qs
+
+# ================== 상수 ==================
+# 상품 인덱스 파트 수 (상품 ID 해시 기준, 결과 파트와 별개)
+PRODUCT_PART_COUNT = max(1, int(os.environ.get("PRODUCT_PART_COUNT", "16")))
+PRODUCT_PART_PREFIX = "products_"
+# 이미 알고 있고 변하지 않은 상품은 워커가 상세 필드 파싱을 건너뛴다 (0이면 항상 전체 파싱)
+# 트레이드오프: 지문(이름/가격/리뷰 수/평점 텍스트/이미지)이 같으면 스펙/태그(tags)는 기존 값을 그대로 쓰므로
+# 목록의 스펙만 바뀐 상품은 다음 강제 재파싱(PRODUCT_REFRESH_DAYS)까지 이전 값이 남는다.
+PRODUCT_SKIP_KNOWN = os.environ.get("PRODUCT_SKIP_KNOWN", "1") != "0"
+# 지문이 같아도 상품마다 약 N일에 하루(상품 ID 와 날짜의 해시로 정함)는 전체 파싱 (0이면 강제 재파싱 없음)
+PRODUCT_REFRESH_DAYS = max(0, int(os.environ.get("PRODUCT_REFRESH_DAYS", "7")))
+
+REF_KEY = "id"          # 결과 파일 안의 상품 참조 키
+UNSET_KEY = "_unset"    # 인덱스 값에는 있지만 해당 결과에는 없던 필드
+STUB_KEY = "_known"     # 워커가 파싱을 건너뛴 상품 표식 (부모가 resolve_stubs 로 채움)
+
+# ================== 상품 ID ==================
+def product_id(link):
+    """상품 브리지 링크에서 상품 ID 추출 (식별 불가면 None)"""
+    if not link:
+        return None
+    try:
+        query = parse_qs(urlparse(link).query)
+    except ValueError:
+        return None
+    pcode = (query.get("pcode") or [""])[0]
+    if pcode:
+        # 같은 pcode 라도 link_pcode(판매 옵션)가 다르면 상품명/가격이 다르다
+        link_pcode = (query.get("link_pcode") or [""])[0]
+        return f"{pcode}-{link_pcode}" if link_pcode else pcode
+    return (query.get("link_prod_c") or [None])[0]
+
+def fingerprint(prod_name, price, raw_review_text, raw_rating_text="", image=""):
+    """변경 감지용 지문: 목록에서 싸게 읽을 수 있는 필드만 사용 (비싼 스펙/태그 텍스트는 제외)"""
+    fields = (prod_name or "", price or "", raw_review_text or "", raw_rating_text or "", image or "")
+    return zlib.crc32("\x1f".join(fields).encode("utf-8"))
+
+def refresh_due(pid, now=None):
+    """
+    지문과 무관하게 오늘 전체 파싱할 상품인지. (상품 ID, UTC 날짜) 해시로 정해 상태 없이 동작하며
+    링크 방문 주기와 맞물려 특정 상품이 계속 빠지는 일이 없다 (방문한 날마다 약 1/N 확률).
+    """
+    if PRODUCT_REFRESH_DAYS <= 0:
+        return False
+    day = int((time.time() if now is None else now) // 86400)
+    return zlib.crc32(f"{pid}\x1f{day}".encode("utf-8")) % PRODUCT_REFRESH_DAYS == 0
+
+def part_for(pid):
+    return zlib.crc32(pid.encode("utf-8")) % PRODUCT_PART_COUNT
+
+def part_filename(index):
+    return f"{PRODUCT_PART_PREFIX}{index:05}.jsonl"
+
+# ================== 저장 형식 변환 ==================
+def build_index(records, category_of):
+    """
+    결정적 순서로 정렬된 records 에서 두 곳 이상에서 참조되는 상품의 인덱스를 만든다.
+    반환: {pid: {"categories": [...], "attrs": {...}}} (attrs 는 처음 등장한 값)
+    """
+    seen = {}
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        category = category_of(record.get("link"))
+        for product in record.get("products") or []:
+            if not isinstance(product, Mapping) or REF_KEY in product:
+                continue
+            pid = product_id(product.get("link"))
+            if not pid:
+                continue
+            entry = seen.get(pid)
+            if entry is None:
+                seen[pid] = {"categories": {category}, "records": {record.get("link")}, "attrs": product}
+            else:
+                entry["categories"].add(category)
+                entry["records"].add(record.get("link"))
+    return {
+        pid: {"categories": sorted(entry["categories"]), "attrs": dict(entry["attrs"])}
+        for pid, entry in seen.items()
+        if len(entry["records"]) > 1
+    }
+
+def _to_ref(product, pid, attrs):
+    ref = {REF_KEY: pid}
+    for key, value in product.items():
+        if key not in attrs or attrs[key] != value:
+            ref[key] = value
+    unset = [key for key in attrs if key not in product]
+    if unset:
+        ref[UNSET_KEY] = unset
+    return ref
+
+def dedupe_record(record, index):
+    """인덱스에 있는 상품을 참조로 바꾼 레코드 사본 (바뀔 게 없으면 원본 그대로)"""
+    products = record.get("products") if isinstance(record, dict) else None
+    if not products or not index:
+        return record
+    out, replaced = [], False
+    for product in products:
+        pid = product_id(product.get("link")) if isinstance(product, Mapping) and REF_KEY not in product else None
+        entry = index.get(pid) if pid else None
+        if entry is None:
+            out.append(product)
+            continue
+        out.append(_to_ref(product, pid, entry["attrs"]))
+        replaced = True
+    return {**record, "products": out} if replaced else record
+
+def _from_ref(ref, attrs):
+    unset = set(ref.get(UNSET_KEY) or ())
+    product = {key: ref.get(key, value) for key, value in attrs.items() if key not in unset}
+    for key, value in ref.items():
+        if key not in product and key not in (REF_KEY, UNSET_KEY):
+            product[key] = value
+    return product
+
+def expand_record(record, attrs_by_id):
+    """참조를 인덱스 속성으로 되돌린 레코드 (dedupe_record 의 역변환)"""
+    products = record.get("products") if isinstance(record, dict) else None
+    if not products or not any(isinstance(p, Mapping) and REF_KEY in p for p in products):
+        return record
+    out = []
+    for product in products:
+        if isinstance(product, Mapping) and REF_KEY in product:
+            attrs = attrs_by_id.get(product[REF_KEY])
+            if attrs is None:
+                # 인덱스 파트가 없으면 참조에 남은 필드만으로 복원
+                attrs = {}
+            product = _from_ref(product, attrs)
+        out.append(product)
+    return {**record, "products": out}
+
+def index_part_lines(index):
+    """인덱스를 상품 ID 해시 기준 JSONL 파트 줄 목록으로 직렬화: {filename: [줄, ...]} (압축은 result_store 담당)"""
+    buckets = {}
+    for pid in sorted(index):
+        entry = index[pid]
+        line = json.dumps({REF_KEY: pid, "categories": entry["categories"], **entry["attrs"]}, ensure_ascii=False)
+        buckets.setdefault(part_for(pid), []).append(line)
+    return {part_filename(i): lines for i, lines in buckets.items()}
+
+def decode_index_line(line):
+    """인덱스 파트 한 줄 → (pid, categories, attrs)"""
+    row = json.loads(line)
+    pid = row.pop(REF_KEY)
+    categories = row.pop("categories", [])
+    return pid, categories, row
+
+# ================== 재파싱 생략 ==================
+def known_fingerprints(records):
+    """기존 결과의 {상품 ID: 지문} — 워커가 변경 없는 상품의 상세 파싱을 건너뛰는 데 사용"""
+    known = {}
+    for record in records or []:
+        if not isinstance(record, dict):
+            continue
+        for product in record.get("products") or []:
+            if not isinstance(product, Mapping):
+                continue
+            pid = product_id(product.get("link"))
+            if pid:
+                known[pid] = fingerprint(
+                    product.get("prod_name"), product.get("price"), product.get("raw_review_text"),
+                    product.get("raw_rating_text"), product.get("image"),
+                )
+    return known
+
+def product_table(records):
+    """{상품 ID: 상품 dict} — 뒤에 나온 레코드 값이 우선 (resolve_stubs 용)"""
+    table = {}
+    for record in records or []:
+        if not isinstance(record, dict):
+            continue
+        for product in record.get("products") or []:
+            if isinstance(product, Mapping):
+                pid = product_id(product.get("link"))
+                if pid:
+                    table[pid] = product
+    return table
+
+def make_stub(pid, product):
+    """목록에서 읽은 필드(tags 제외 전부)를 담은 스텁 — 부모가 tags 만 기존 상품에서 채운다"""
+    return {STUB_KEY: pid, **product}
+
+def resolve_stubs(records, table):
+    """워커가 남긴 스텁을 기존 상품 속성으로 채운다. 채운 스텁 개수 반환."""
+    resolved = 0
+    for record in records:
+        products = record.get("products") if isinstance(record, dict) else None
+        if not products:
+            continue
+        for i, product in enumerate(products):
+            if not isinstance(product, Mapping) or STUB_KEY not in product:
+                continue
+            stub = dict(product)
+            pid = stub.pop(STUB_KEY)
+            known = table.get(pid)
+            if known is not None:
+                products[i] = {**known, **stub}
+                resolved += 1
+            else:
+                # 테이블에 없는 경우(드묾): 목록에서 읽은 필드만 남긴다
+                products[i] = {
+                    "link": stub.get("link"), "image": stub.get("image"), "prod_name": stub.get("prod_name"),
+                    "tags": "", "price": stub.get("price"), "rating": stub.get("rating"),
+                    "review_count": stub.get("review_count"), "rating_weighted": stub.get("rating_weighted"),
+                    "raw_rating_text": stub.get("raw_rating_text", ""), "raw_review_text": stub.get("raw_review_text"),
+                }
+    return resolved
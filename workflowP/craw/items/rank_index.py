@@ -0,0 +1,358 @@
+# craw/items/rank_index.py
+"""
+크롤 결과 위에 미리 계산된 랭킹 인덱스(평점가중 상위 / 최저가)를 유지한다.
+
+- 카테고리(결과 레코드 1개 = 카테고리 링크 1개)별 상품 표와 두 가지 정렬 순서를
+  해시 버킷 파일에 저장한다.
+- 1차 카테고리별로는 상위 후보(RANK_TOP_N * RANK_RESERVE_FACTOR개)만 저장하고,
+  후보가 부족해질 때만 해당 1차 카테고리를 버킷에서 재구성한다.
+- B_in_link_get_items 체크포인트마다 update_index(신규 결과)로 증분 갱신된다.
+
+사용 예:
+    python rank_index.py build
+    python rank_index.py top --first "가전 · TV" -n 10
+    python rank_index.py cheapest --category "AI > AI 노트북 > 인텔 NPU"
+"""
+import argparse
+import hashlib
+import heapq
+import json
+import logging
+import os
+import re
+import sys
+import time
+import datetime
+from collections.abc import Mapping
+
+from result_store import DATA_DIR, read_existing_results
+
+# ================== 상수 ==================
+INDEX_DIR = DATA_DIR / "rank_index"
+META_PATH = INDEX_DIR / "meta.json"
+RANK_TOP_N = max(1, int(os.environ.get("RANK_TOP_N", "50")))
+RANK_RESERVE_FACTOR = max(1, int(os.environ.get("RANK_RESERVE_FACTOR", "4")))
+RANK_BUCKETS = max(1, int(os.environ.get("RANK_BUCKETS", "256")))
+
+KINDS = ("top_rated", "cheapest")
+ENTRY_FIELDS = (
+    "prod_name",
+    "price",
+    "rating",
+    "review_count",
+    "rating_weighted",
+    "link",
+    "image",
+)
+
+log = logging.getLogger(__name__)
+
+# ================== 유틸 ==================
+def price_value(price):
+    """가격 문자열("12,340원")을 정수로 변환 (없으면 None)"""
+    if not price:
+        return None
+    digits = re.sub(r"[^\d]", "", str(price))
+    if not digits:
+        return None
+    value = int(digits)
+    return value if value > 0 else None
+
+def category_name(path):
+    """경로 리스트를 "1차 > 2차 > ..." 문자열로 변환"""
+    return " > ".join(p for p in (path or []) if p)
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def _bucket_file(category_link):
+    bucket = int(_digest(category_link)[:8], 16) % RANK_BUCKETS
+    return INDEX_DIR / f"bucket_{bucket:03}.json"
+
+def _first_file(first):
+    return INDEX_DIR / f"first_{_digest(first)[:12]}.json"
+
+def _load_json(path, default):
+    if not path.exists():
+        return default
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as exc:
+        log.warning("랭킹 인덱스 파일 읽기 실패(%s): %s", path.name, exc)
+        return default
+
+def _dump_json(path, payload):
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    tmp.replace(path)
+
+def _score(entry, kind):
+    """클수록 상위인 정렬 점수 (대상이 아니면 None)"""
+    if kind == "top_rated":
+        if entry.get("rating_weighted") is None:
+            return None
+        return [entry["rating_weighted"], entry.get("review_count") or 0]
+    if entry.get("price_value") is None:
+        return None
+    return [-entry["price_value"], 0]
+
+def _rank(entries, kind, n):
+    """entries 중 kind 기준 상위 n개를 반환"""
+    pool = [e for e in entries if _score(e, kind) is not None]
+    return heapq.nlargest(n, pool, key=lambda e: _score(e, kind))
+
+# ================== 카테고리 엔트리 ==================
+def _category_entry(record):
+    """결과 레코드 1개를 버킷에 저장할 카테고리 엔트리로 변환"""
+    path = record.get("path") or []
+    name = category_name(path)
+    table = []
+    for product in record.get("products") or []:
+        if not isinstance(product, Mapping):
+            continue
+        entry = {field: product.get(field) for field in ENTRY_FIELDS}
+        entry["price_value"] = price_value(product.get("price"))
+        entry["category"] = name
+        entry["category_link"] = record.get("link")
+        table.append(entry)
+    order = {}
+    for kind in KINDS:
+        ranked = _rank(table, kind, RANK_TOP_N)
+        ids = {id(e): i for i, e in enumerate(table)}
+        order[kind] = [ids[id(e)] for e in ranked]
+    return {
+        "link": record.get("link"),
+        "path": path,
+        "name": name,
+        "products": table,
+        "order": order,
+    }
+
+def _category_top(entry, kind, n=None):
+    table = entry.get("products") or []
+    idxs = entry.get("order", {}).get(kind) or []
+    if n is not None:
+        idxs = idxs[:n]
+    return [table[i] for i in idxs if 0 <= i < len(table)]
+
+# ================== 인덱스 갱신 ==================
+def _empty_meta():
+    return {"categories": {}, "names": {}, "firsts": {}, "updated_at": None, "top_n": RANK_TOP_N}
+
+def load_meta():
+    meta = _load_json(META_PATH, None)
+    if not meta:
+        return _empty_meta()
+    return meta
+
+def _rebuild_first(first, meta, bucket_cache):
+    """버킷 전체에서 해당 1차 카테고리의 후보를 다시 모은다 (후보 부족 시에만 호출)"""
+    per_kind = {kind: [] for kind in KINDS}
+    for link, info in meta["categories"].items():
+        if info.get("first") != first:
+            continue
+        bucket_path = INDEX_DIR / info["bucket"]
+        bucket = bucket_cache.get(bucket_path)
+        if bucket is None:
+            bucket = _load_json(bucket_path, {})
+            bucket_cache[bucket_path] = bucket
+        entry = bucket.get(link)
+        if not entry:
+            continue
+        for kind in KINDS:
+            per_kind[kind].extend(_category_top(entry, kind))
+    return per_kind
+
+def _trim(candidates, kind, reserve, floor):
+    """
+    후보를 reserve개(동점은 함께 유지)로 자르고 새 floor를 계산한다.
+    저장된 후보는 항상 floor보다 점수가 높다는 불변식을 유지한다.
+    """
+    ranked = _rank(candidates, kind, len(candidates))
+    end = reserve
+    if end >= len(ranked):
+        return ranked, floor
+    last = _score(ranked[end - 1], kind)
+    while end < len(ranked) and _score(ranked[end], kind) == last:
+        end += 1
+    if end < len(ranked):
+        floor = _score(ranked[end], kind)
+    return ranked[:end], floor
+
+def update_index(records):
+    """
+    신규/갱신 결과 레코드로 인덱스를 증분 갱신한다.
+    같은 카테고리 링크가 다시 들어오면 이전 엔트리를 대체한다.
+    """
+    latest = {}
+    for r in records:
+        if isinstance(r, dict) and r.get("ok") and r.get("link"):
+            latest[r["link"]] = r  # 같은 배치 안의 중복 링크는 마지막 결과만 사용
+    records = list(latest.values())
+    if not records:
+        return 0
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    meta = load_meta()
+    reserve = RANK_TOP_N * RANK_RESERVE_FACTOR
+
+    # 1) 버킷 파일 갱신 (버킷 단위로 한 번씩만 읽고 쓴다)
+    bucket_cache = {}
+    touched_buckets = set()
+    replaced = {}  # first -> 대체된 카테고리 링크 집합
+    added = {}     # first -> 새 카테고리 엔트리 목록
+    for record in records:
+        entry = _category_entry(record)
+        link = entry["link"]
+        first = (entry["path"] or [""])[0]
+        bucket_path = _bucket_file(link)
+        bucket = bucket_cache.get(bucket_path)
+        if bucket is None:
+            bucket = _load_json(bucket_path, {})
+            bucket_cache[bucket_path] = bucket
+        previous = meta["categories"].get(link)
+        if previous:
+            replaced.setdefault(previous.get("first", ""), set()).add(link)
+        bucket[link] = entry
+        touched_buckets.add(bucket_path)
+        meta["categories"][link] = {"first": first, "bucket": bucket_path.name}
+        if entry["name"]:
+            meta["names"][entry["name"]] = link
+        added.setdefault(first, []).append(entry)
+    for bucket_path in touched_buckets:
+        _dump_json(bucket_path, bucket_cache[bucket_path])
+
+    # 2) 1차 카테고리 후보 갱신
+    for first in set(replaced) | set(added):
+        first_path = _first_file(first)
+        current = _load_json(first_path, {"first": first, "count": 0})
+        gone = replaced.get(first, set())
+        fresh = added.get(first, [])
+        rebuild = False
+        ranked = {}
+        for kind in KINDS:
+            # floor: 잘려나간 후보 중 최고 점수. 저장된 후보는 모두 floor보다 높다.
+            floor = current.get(f"{kind}_floor")
+            kept = [e for e in current.get(kind, []) if e.get("category_link") not in gone]
+            if floor is not None and len(kept) < RANK_TOP_N:
+                # 제거로 후보가 부족해졌고 잘려나간 후보가 있으므로 top-N을 보장할 수 없음
+                rebuild = True
+                break
+            candidates = kept
+            for entry in fresh:
+                for e in _category_top(entry, kind):
+                    if floor is None or _score(e, kind) > floor:
+                        candidates.append(e)
+            ranked[kind] = _trim(candidates, kind, reserve, floor)
+        if rebuild:
+            candidates = _rebuild_first(first, meta, bucket_cache)
+            ranked = {kind: _trim(candidates[kind], kind, reserve, None) for kind in KINDS}
+        payload = {"first": first}
+        for kind in KINDS:
+            payload[kind], payload[f"{kind}_floor"] = ranked[kind]
+        payload["count"] = sum(1 for info in meta["categories"].values() if info.get("first") == first)
+        _dump_json(first_path, payload)
+        meta["firsts"][first] = first_path.name
+
+    meta["updated_at"] = datetime.datetime.now().isoformat()
+    meta["top_n"] = RANK_TOP_N
+    _dump_json(META_PATH, meta)
+    return len(records)
+
+def build_index(records=None):
+    """전체 결과로 인덱스를 처음부터 다시 만든다."""
+    if records is None:
+        records = read_existing_results()
+    if INDEX_DIR.exists():
+        for path in INDEX_DIR.glob("*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    return update_index(records)
+
+# ================== 조회 API ==================
+def _resolve_category(meta, category):
+    if category in meta["categories"]:
+        return category
+    return meta["names"].get(category)
+
+def query(kind, category=None, first=None, n=10):
+    """
+    랭킹 조회. category(링크 또는 "1차 > 2차 ..." 경로) 또는 first(1차 이름) 중 하나를 지정한다.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"알 수 없는 랭킹 종류: {kind}")
+    meta = load_meta()
+    if category:
+        link = _resolve_category(meta, category)
+        if not link:
+            return []
+        info = meta["categories"][link]
+        bucket = _load_json(INDEX_DIR / info["bucket"], {})
+        entry = bucket.get(link)
+        return _category_top(entry, kind, n) if entry else []
+    if first:
+        filename = meta["firsts"].get(first)
+        if not filename:
+            return []
+        payload = _load_json(INDEX_DIR / filename, {})
+        return payload.get(kind, [])[:n]
+    raise ValueError("category 또는 first 중 하나는 지정해야 합니다.")
+
+def top_rated(category=None, first=None, n=10):
+    return query("top_rated", category=category, first=first, n=n)
+
+def cheapest(category=None, first=None, n=10):
+    return query("cheapest", category=category, first=first, n=n)
+
+# ================== CLI ==================
+def _print_entries(entries, kind):
+    for rank, e in enumerate(entries, start=1):
+        metric = e.get("rating_weighted") if kind == "top_rated" else e.get("price")
+        print(f"{rank:>3}. [{metric}] {e.get('prod_name')} | {e.get('category')}")
+
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(description="크롤 결과 랭킹 인덱스")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="전체 결과로 인덱스 재구성")
+    for kind, cmd in (("top_rated", "top"), ("cheapest", "cheapest")):
+        p = sub.add_parser(cmd, help=f"{kind} 랭킹 조회")
+        p.add_argument("--category", help="카테고리 링크 또는 '1차 > 2차 > ...' 경로")
+        p.add_argument("--first", help="1차 카테고리 이름")
+        p.add_argument("-n", type=int, default=10)
+        p.add_argument("--json", action="store_true", help="JSON으로 출력")
+        p.set_defaults(kind=kind)
+    sub.add_parser("firsts", help="인덱스된 1차 카테고리 목록")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        started = time.perf_counter()
+        count = build_index()
+        log.info("✅ 랭킹 인덱스 구성 완료: 카테고리 %d개 (%.1fs) → %s",
+                 count, time.perf_counter() - started, INDEX_DIR)
+        return 0
+    if args.cmd == "firsts":
+        for first in sorted(load_meta()["firsts"]):
+            print(first)
+        return 0
+    if not args.category and not args.first:
+        parser.error("--category 또는 --first 를 지정하세요.")
+    started = time.perf_counter()
+    entries = query(args.kind, category=args.category, first=args.first, n=args.n)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps(entries, ensure_ascii=False, indent=2))
+    else:
+        _print_entries(entries, args.kind)
+        print(f"({len(entries)}건, {elapsed_ms:.1f}ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# craw/items/record_bench.py
+"""
+결과 레코드 표현 벤치마크: dict (기존) vs compact_records (Product).
+
+링크 1,000개 기준으로 다음을 측정한다 (브라우저/디스크 없음).
+
+- 워커 → 부모 IPC: 배치(BATCH_SIZE 링크)마다 Pool 과 같은 ForkingPickler 로 직렬화 + 역직렬화한 시간/바이트
+  (두 방식 모두 dict 를 보내고, compact 는 부모가 받은 뒤 Product 로 바꾸는 시간 포함)
+- 수집: shared_results(부모의 일반 리스트)에 레코드를 하나씩 추가하고 체크포인트처럼 list() 로 복사하는 시간.
+  비교용으로 이전 process 실행기의 Manager 리스트(레코드마다 pickle 이 두 번) 수집도 측정한다 (크롤러는 쓰지 않음)
+- 부모 메모리: 디스크에서 읽은 것과 같은 레코드를 보관할 때의 tracemalloc 증가량
+- JSON 출력: 두 표현을 result_store 와 같은 방식으로 직렬화한 바이트가 같은지
+
+사용 예:
+    python record_bench.py                       # 가짜 결과 1000 링크 × 30 상품
+    python record_bench.py --links 2000 --products 40
+    python record_bench.py --real                # 현재 결과 파일(quick_text_probe_parallel)을 1000 링크까지 반복
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+from multiprocessing import Manager
+from multiprocessing.reduction import ForkingPickler
+from pathlib import Path
+
+import compact_records
+from result_store import DATA_DIR, read_existing_results
+from scale_bench import generate_records
+
+# ================== 상수 ==================
+BENCH_PATH = DATA_DIR / "metrics" / "record_bench.json"
+PER_LINKS = 1000
+REPEAT = 3
+
+# ================== 데이터 ==================
+def _json_lines(n_links, products, real):
+    """레코드를 저장 형식(JSON 줄)으로 — 매 측정마다 새 dict 를 만들기 위해 줄로 보관"""
+    if real:
+        compact_records.COMPACT_RECORDS = False  # 원본 dict 로 읽기
+        base = [r for r in read_existing_results() if isinstance(r, dict) and r.get("products")]
+        compact_records.COMPACT_RECORDS = True
+        if not base:
+            raise SystemExit("결과 파일에 상품이 있는 레코드가 없습니다")
+        rows = [base[i % len(base)] for i in range(n_links)]
+    else:
+        rows = list(generate_records(n_links, products))
+    return [json.dumps(row, ensure_ascii=False) for row in rows]
+
+def _load(lines, compact):
+    records = [json.loads(line) for line in lines]
+    return compact_records.compact_records(records) if compact else records
+
+# ================== 측정 ==================
+def _best(fn):
+    times = []
+    for _ in range(REPEAT):
+        gc.collect()
+        started = time.perf_counter()
+        size = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), size
+
+def measure_ipc(lines, batch_size, compact):
+    batches = [lines[i:i + batch_size] for i in range(0, len(lines), batch_size)]
+    decoded = [[json.loads(line) for line in batch] for batch in batches]
+
+    def run():
+        size = 0
+        for batch in decoded:
+            data = ForkingPickler.dumps(batch)
+            size += len(data)
+            received = pickle.loads(data)
+            if compact:
+                compact_records.compact_records(received)
+        return size
+
+    return _best(run)
+
+def measure_collect(lines, compact, manager=None):
+    records = _load(lines, compact)
+
+    def run():
+        shared = [] if manager is None else manager.list()
+        for record in records:
+            shared.append(record)
+        list(shared)
+        return 0 if manager is None else sum(len(ForkingPickler.dumps(record)) for record in records)
+
+    return _best(run)
+
+def measure_memory(lines, compact):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = _load(lines, compact)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del records
+    return used
+
+def same_json(lines):
+    plain = [json.dumps(r, ensure_ascii=False) for r in _load(lines, False)]
+    compact = [json.dumps(r, ensure_ascii=False, default=compact_records.json_default) for r in _load(lines, True)]
+    return plain == compact
+
+def run(n_links, products, batch_size, real):
+    lines = _json_lines(n_links, products, real)
+    scale = PER_LINKS / len(lines)
+    rows = []
+    manager = Manager()
+    try:
+        for name, compact, via_manager in (("dict+Manager", False, True), ("dict", False, False), ("compact", True, False)):
+            ipc_s, ipc_bytes = measure_ipc(lines, batch_size, compact)
+            collect_s, collect_bytes = measure_collect(lines, compact, manager if via_manager else None)
+            memory = measure_memory(lines, compact)
+            rows.append({
+                "mode": name,
+                "ipc_ms_per_1k": round(ipc_s * scale * 1000, 1),
+                "ipc_kib_per_1k": round(ipc_bytes * scale / 1024, 1),
+                "collect_ms_per_1k": round(collect_s * scale * 1000, 1),
+                "collect_pickle_kib_per_1k": round(collect_bytes * scale / 1024, 1),
+                "memory_mib_per_1k": round(memory * scale / (1024 * 1024), 2),
+            })
+    finally:
+        manager.shutdown()
+    return {"rows": rows, "json_identical": same_json(lines), "links": len(lines)}
+
+# ================== 출력 ==================
+def print_table(rows):
+    header = (
+        f"{'mode':>16} {'IPC ms/1k':>10} {'IPC KiB/1k':>11} {'수집 ms/1k':>10} {'수집 KiB/1k':>11} {'mem MiB/1k':>11}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['mode']:>16} {row['ipc_ms_per_1k']:>10} {row['ipc_kib_per_1k']:>11} "
+            f"{row['collect_ms_per_1k']:>10} {row['collect_pickle_kib_per_1k']:>11} {row['memory_mib_per_1k']:>11}"
+        )
+
+# ================== CLI ==================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="결과 레코드 표현(dict vs compact) 벤치마크")
+    parser.add_argument("--links", type=int, default=PER_LINKS, help="측정할 링크 수 (결과는 1000 링크 기준으로 환산)")
+    parser.add_argument("--products", type=int, default=30, help="링크당 상품 수 (가짜 데이터)")
+    parser.add_argument("--batch-size", type=int, default=int(os.environ.get("BATCH_SIZE", "10")))
+    parser.add_argument("--real", action="store_true", help="현재 결과 파일의 레코드를 반복해서 사용")
+    parser.add_argument("--out", type=Path, default=BENCH_PATH, help="결과 JSON 경로")
+    args = parser.parse_args(argv)
+
+    result = run(max(1, args.links), max(1, args.products), max(1, args.batch_size), args.real)
+    print_table(result["rows"])
+    print(f"\nJSON 출력 동일: {result['json_identical']}")
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with args.out.open("w", encoding="utf-8") as f:
+        json.dump({
+            "config": {"links": result["links"], "products": args.products, "batch_size": args.batch_size,
+                       "source": "real" if args.real else "synthetic"},
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "results": result["rows"],
+            "json_identical": result["json_identical"],
+        }, f, indent=2, ensure_ascii=False)
+    print(f"결과 저장: {args.out}")
+    return 0 if result["json_identical"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
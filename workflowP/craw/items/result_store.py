@@ -0,0 +1,546 @@
+# craw/items/result_store.py
+"""
+아이템 크롤 결과(quick_text_probe_parallel) 저장/로드 계층.
+Selenium 의존성 없이 분할 JSONL 파트, manifest/state/status 파일을 다룬다.
+
+결과/상품 인덱스 파트는 RESULT_CODEC(gzip 기본, zstd, plain)으로 압축한 JSONL 이다.
+쓰기(PartWriter)와 읽기(iter_part_lines) 모두 줄 단위 스트리밍이며, 읽기는 확장자로 코덱을
+판단하므로 이전의 압축하지 않은 파트(.jsonl)도 그대로 읽힌다.
+"""
+import gzip
+import io
+import logging
+import json
+import os
+import re
+import zlib
+import datetime
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # 선택 의존성 (RESULT_CODEC=zstd)
+    zstandard = None
+
+import product_index
+import category_tree
+import compact_records
+
+# ================== 경로/상수 ==================
+THIS_FILE = Path(__file__).resolve()
+PROJ_ROOT = THIS_FILE.parents[2]
+DATA_DIR = PROJ_ROOT / "craw" / "data"
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+OUTPUT_DIR = DATA_DIR / "quick_text_probe_parallel"
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+LEGACY_JSON_PATH = DATA_DIR / "quick_text_probe_parallel.json"
+MANIFEST_PATH = OUTPUT_DIR / "manifest.json"
+STATE_PATH = OUTPUT_DIR / "state.json"
+STATUS_PATH = DATA_DIR / "quick_text_probe_parallel.status.json"
+# 카테고리 링크별 목록 페이지 지문 (출력 디렉터리에 함께 저장되어 실행 간 유지)
+PAGE_FINGERPRINTS_FILE = "page_fingerprints.json"
+# 상품 목록이 없는 링크(허브/빈 카테고리)의 실패 사유/시각
+NEGATIVE_CACHE_FILE = "negative_cache.json"
+# 링크별 크롤 시간(초, 지수 이동 평균) — 긴 작업 우선 스케줄링용
+LINK_COSTS_FILE = "link_costs.json"
+# 카테고리 ID 해시로 나누는 파트 수. 결과가 늘어도 같은 카테고리는 항상 같은 파트에 저장된다.
+JSON_SHARD_COUNT = max(1, int(os.environ.get("JSON_SHARD_COUNT", "16")))
+SHARDING_SCHEME = "category-crc32"
+# 파트 압축 코덱: gzip(기본) | zstd(zstandard 패키지 필요) | plain(압축 없음)
+RESULT_CODEC = os.environ.get("RESULT_CODEC", "gzip").strip().lower()
+CODEC_SUFFIX = {"plain": "", "gzip": ".gz", "zstd": ".zst"}
+GZIP_LEVEL = int(os.environ.get("RESULT_GZIP_LEVEL", "3"))   # 3: 6 대비 파일은 약 15% 크지만 압축 시간은 절반
+ZSTD_LEVEL = int(os.environ.get("RESULT_ZSTD_LEVEL", "10"))
+WRITE_BUFFER_BYTES = 256 * 1024   # 압축기에 넘기기 전에 모으는 크기 (줄마다 압축기 호출 방지)
+
+CATEGORY_ID_RE = re.compile(r"[?&]cate=(\d+)")
+SHARD_SPEC_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+log = logging.getLogger(__name__)
+
+# ================== 로드 ==================
+def read_existing_results(output_dir=OUTPUT_DIR):
+    """
+    기존 결과를 로드한다. 분할 저장(manifest 기반) 또는 레거시 단일 JSON 모두 지원.
+    """
+    results = []
+    manifest = None
+    attrs_by_id = {}
+    tree = None
+    manifest_path = output_dir / "manifest.json"
+    if manifest_path.exists():
+        try:
+            with manifest_path.open("r", encoding="utf-8") as mf:
+                manifest = json.load(mf)
+        except Exception as exc:
+            log.warning("manifest 읽기 실패: %s", exc)
+            manifest = None
+        if manifest:
+            if manifest.get("products"):
+                attrs_by_id = read_product_index(output_dir, manifest)
+            if manifest.get("category_tree"):
+                # 결과에는 path 대신 카테고리 트리 노드 ID 가 저장되어 있다
+                tree = _load_category_tree(manifest["category_tree"])
+            for part in manifest.get("parts", []):
+                filename = part.get("file")
+                if not filename:
+                    continue
+                part_path = output_dir / filename
+                if not part_path.exists():
+                    continue
+                for line in iter_part_lines(part_path):
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    record = product_index.expand_record(record, attrs_by_id)
+                    # 상품은 __slots__ 레코드로, 경로 문자열은 intern 해서 보관 (메모리 절약)
+                    results.append(compact_records.compact_record(category_tree.expand_record(record, tree)))
+            return results
+    if output_dir == OUTPUT_DIR and LEGACY_JSON_PATH.exists():
+        try:
+            with LEGACY_JSON_PATH.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as exc:
+            log.warning("레거시 JSON 로드 실패: %s", exc)
+            return []
+    return results
+
+def _load_category_tree(info):
+    """manifest 에 기록된 노드들이 지금 트리에서도 같은 경로인지 확인 후 트리 반환 (아니면 None)"""
+    tree = category_tree.load()
+    nodes = info.get("nodes", 0)
+    if tree is None or len(tree) < nodes or category_tree.prefix_signature(tree, nodes) != info.get("crc32"):
+        # 노드 ID 를 잘못된 경로로 풀지 않도록 복원하지 않는다 (레코드에는 node 만 남음)
+        log.error("카테고리 트리(%s)가 결과 저장 시점과 달라 path 를 복원하지 않습니다", category_tree.TREE_PATH.name)
+        return None
+    return tree
+
+def read_product_index(output_dir=OUTPUT_DIR, manifest=None, with_categories=False):
+    """
+    전역 상품 인덱스 로드: {상품 ID: 속성}.
+    with_categories=True 면 {상품 ID: {"categories": [...], "attrs": {...}}}.
+    """
+    if manifest is None:
+        try:
+            with (output_dir / "manifest.json").open("r", encoding="utf-8") as mf:
+                manifest = json.load(mf)
+        except Exception:
+            return {}
+    table = {}
+    for part in (manifest.get("products") or {}).get("parts", []):
+        part_path = output_dir / (part.get("file") or "")
+        if not part.get("file") or not part_path.exists():
+            continue
+        for line in iter_part_lines(part_path):
+            try:
+                pid, categories, attrs = product_index.decode_index_line(line)
+            except (json.JSONDecodeError, KeyError):
+                continue
+            table[pid] = {"categories": categories, "attrs": attrs} if with_categories else attrs
+    return table
+
+# ================== 파트 코덱 ==================
+def resolve_codec(codec=None):
+    """사용할 코덱 (zstd 인데 zstandard 가 없으면 gzip)"""
+    codec = (codec or RESULT_CODEC).strip().lower()
+    if codec not in CODEC_SUFFIX:
+        log.warning("알 수 없는 RESULT_CODEC=%r, gzip 으로 저장", codec)
+        return "gzip"
+    if codec == "zstd" and zstandard is None:
+        log.warning("zstandard 패키지가 없어 gzip 으로 저장")
+        return "gzip"
+    return codec
+
+def codec_for(filename):
+    """파일 이름(확장자)으로 코덱 판단"""
+    for codec, suffix in CODEC_SUFFIX.items():
+        if suffix and str(filename).endswith(suffix):
+            return codec
+    return "plain"
+
+def open_part(path):
+    """파트 파일을 코덱에 맞는 텍스트 스트림으로 연다"""
+    codec = codec_for(path.name)
+    if codec == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"{path.name}: zstd 파트를 읽으려면 zstandard 패키지가 필요합니다")
+        reader = zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return path.open("r", encoding="utf-8")
+
+def iter_part_lines(path):
+    """파트의 비어 있지 않은 줄을 스트리밍으로 (압축이 잘린 파일은 읽은 데까지)"""
+    try:
+        with open_part(path) as pf:
+            for line in pf:
+                line = line.strip()
+                if line:
+                    yield line
+    except (EOFError, OSError, zlib.error) as exc:
+        log.warning("%s 읽기 중단: %s", path.name, exc)
+
+class PartWriter:
+    """
+    JSONL 파트 스트리밍 writer: 줄을 코덱으로 바로 압축해 임시 파일에 쓰고,
+    close() 에서 기존 파일과 바이트가 다를 때만 원자적으로 교체한다.
+    gzip 은 mtime=0/파일명 없이 쓰므로 같은 내용이면 같은 바이트가 된다 (변경 없는 파트는 커밋 diff 없음).
+    """
+
+    def __init__(self, path, codec="plain"):
+        self.path = path
+        self.codec = codec
+        self.tmp_path = path.with_suffix(path.suffix + ".tmp")
+        self.count = 0
+        self.raw_bytes = 0
+        self._buffer = []
+        self._buffered = 0
+        self._file = self.tmp_path.open("wb")
+        if codec == "gzip":
+            self._out = gzip.GzipFile(filename="", mode="wb", fileobj=self._file, compresslevel=GZIP_LEVEL, mtime=0)
+        elif codec == "zstd":
+            self._out = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self._file)
+        else:
+            self._out = self._file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+    def write(self, line):
+        data = (line + "\n").encode("utf-8")
+        self._buffer.append(data)
+        self._buffered += len(data)
+        self.count += 1
+        self.raw_bytes += len(data)
+        if self._buffered >= WRITE_BUFFER_BYTES:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._out.write(b"".join(self._buffer))
+            self._buffer, self._buffered = [], 0
+
+    def _finish(self):
+        self._flush()
+        if self.codec == "gzip":
+            self._out.close()  # fileobj 는 닫지 않는다
+        elif self.codec == "zstd":
+            self._out.flush(zstandard.FLUSH_FRAME)
+        self._file.close()
+
+    def close(self):
+        """파일을 교체했으면 True (내용이 같으면 임시 파일만 지우고 False)"""
+        self._finish()
+        if _same_file(self.tmp_path, self.path):
+            self.tmp_path.unlink()
+            return False
+        self.tmp_path.replace(self.path)
+        return True
+
+    def abort(self):
+        try:
+            self._file.close()
+        finally:
+            self.tmp_path.unlink(missing_ok=True)
+
+def _same_file(path_a, path_b, chunk=1024 * 1024):
+    try:
+        if path_a.stat().st_size != path_b.stat().st_size:
+            return False
+        with path_a.open("rb") as fa, path_b.open("rb") as fb:
+            while True:
+                a, b = fa.read(chunk), fb.read(chunk)
+                if a != b:
+                    return False
+                if not a:
+                    return True
+    except OSError:
+        return False
+
+def _lines_signature(lines):
+    """(crc32, 바이트 수) — 압축 전 내용 기준. manifest 값과 같으면 파트를 다시 쓰지 않는다."""
+    crc, size = 0, 0
+    for line in lines:
+        data = (line + "\n").encode("utf-8")
+        crc = zlib.crc32(data, crc)
+        size += len(data)
+    return crc, size
+
+def _write_part(output_dir, filename, lines, codec, previous):
+    """
+    파트 하나 저장: manifest 의 이전 항목(crc32/줄 수/코덱/파일 크기)이 같으면 압축 없이 건너뛴다.
+    반환: (manifest 항목, 파일을 새로 썼는지)
+    """
+    path = output_dir / filename
+    crc, raw_bytes = _lines_signature(lines)
+    entry = {"file": filename, "count": len(lines), "codec": codec, "raw_bytes": raw_bytes, "crc32": crc}
+    if previous and all(previous.get(key) == entry[key] for key in ("count", "codec", "raw_bytes", "crc32")):
+        try:
+            if path.stat().st_size == previous.get("bytes"):
+                entry["bytes"] = previous["bytes"]
+                return entry, False
+        except OSError:
+            pass
+    with PartWriter(path, codec) as writer:
+        for line in lines:
+            writer.write(line)
+        written = writer.close()
+    entry["bytes"] = path.stat().st_size
+    return entry, written
+
+def _read_manifest(output_dir):
+    try:
+        with (output_dir / "manifest.json").open("r", encoding="utf-8") as mf:
+            return json.load(mf)
+    except Exception:
+        return None
+
+def merge_results(prev_results, new_results):
+    """링크 기준으로 결과를 합친다. 같은 링크는 새 결과가 이전 결과를 대체(위치는 유지)."""
+    merged = {}
+    for row in list(prev_results) + list(new_results):
+        if isinstance(row, dict):
+            merged[row.get("link")] = row
+    return list(merged.values())
+
+# ================== 샤딩 ==================
+def category_id(link):
+    """카테고리 링크에서 cate= 값을 추출 (없으면 링크 자체)"""
+    if not link:
+        return ""
+    match = CATEGORY_ID_RE.search(link)
+    return match.group(1) if match else link
+
+def shard_for(link, shard_count=JSON_SHARD_COUNT):
+    """카테고리 ID의 안정 해시(crc32)로 파트 번호(0-based)를 결정"""
+    return zlib.crc32(category_id(link).encode("utf-8")) % shard_count
+
+def parse_shard_spec(spec):
+    """"i/N" 문자열을 (i, N)으로 변환 (0 <= i < N)"""
+    match = SHARD_SPEC_RE.match(spec or "")
+    if not match:
+        raise ValueError(f"샤드 지정 형식은 i/N 입니다: {spec!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"샤드 번호 범위 오류: {spec!r}")
+    return index, count
+
+def link_in_shard(link, index, count):
+    """크롤 링크 분할: 카테고리 ID 해시가 index에 해당하는 링크만 해당 샤드가 담당"""
+    return count <= 1 or shard_for(link, count) == index
+
+def shard_output_dir(index, count):
+    return DATA_DIR / f"{OUTPUT_DIR.name}.shard-{index}-of-{count}"
+
+def shard_status_path(index, count):
+    return DATA_DIR / f"{OUTPUT_DIR.name}.shard-{index}-of-{count}.status.json"
+
+def _record_sort_key(row):
+    link = row.get("link") or ""
+    return (category_id(link), link)
+
+def _part_lines(rows):
+    """파트 하나를 결정적 순서의 JSONL 줄 목록으로 직렬화"""
+    return [
+        json.dumps(row, ensure_ascii=False, default=compact_records.json_default)
+        for row in sorted(rows, key=_record_sort_key)
+    ]
+
+def part_filename(index, codec="plain"):
+    return f"part_{index:05}.jsonl{CODEC_SUFFIX[codec]}"
+
+def _write_if_changed(path, payload):
+    """내용이 같으면 건드리지 않고 False, 다르면 원자적으로 교체 후 True"""
+    if _same_content(path, payload):
+        return False
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_bytes(payload)
+    tmp_path.replace(path)
+    return True
+
+def _remove_stale(output_dir, pattern, keep):
+    removed = []
+    for existing in output_dir.glob(pattern):
+        if existing.name in keep:
+            continue
+        try:
+            existing.unlink()
+            removed.append(existing.name)
+        except OSError:
+            pass
+    return removed
+
+def _same_content(path, payload):
+    try:
+        if path.stat().st_size != len(payload):
+            return False
+        return path.read_bytes() == payload
+    except OSError:
+        return False
+
+# ================== 저장 ==================
+def write_sharded_results(data, output_dir=OUTPUT_DIR):
+    """
+    데이터를 카테고리 해시 기준 JSONL 파트로 분할 저장하고 manifest/state를 갱신한다.
+    내용이 바뀐 파트만 다시 쓰며(RESULT_CODEC 으로 압축), 변경된 파일/바이트 수를 반환한다.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / "manifest.json"
+    state_path = output_dir / "state.json"
+    timestamp = datetime.datetime.now().isoformat()
+    codec = resolve_codec()
+    previous = _read_manifest(output_dir) or {}
+    prev_entries = {
+        entry.get("file"): entry
+        for entry in list(previous.get("parts") or []) + list((previous.get("products") or {}).get("parts") or [])
+    }
+
+    # 여러 카테고리에 중복된 상품은 전역 인덱스에 한 번만 저장하고 결과에는 참조만 남긴다
+    rows_sorted = sorted((row for row in data if isinstance(row, dict)), key=_record_sort_key)
+    shared_products = product_index.build_index(rows_sorted, category_id)
+    # 카테고리 경로는 공유 카테고리 트리의 노드 ID 로 저장 (트리에 없는 경로는 그대로)
+    tree = category_tree.load()
+
+    buckets = {}
+    for row in rows_sorted:
+        record = product_index.dedupe_record(category_tree.compact_record(row, tree), shared_products)
+        buckets.setdefault(shard_for(row.get("link")), []).append(record)
+
+    part_entries = []
+    changed = []
+    bytes_written = 0
+    for index in sorted(buckets):
+        filename = part_filename(index, codec)
+        entry, written = _write_part(output_dir, filename, _part_lines(buckets[index]), codec, prev_entries.get(filename))
+        part_entries.append(entry)
+        if written:
+            changed.append(filename)
+            bytes_written += entry["bytes"]
+
+    product_entries = []
+    for base_name, lines in sorted(product_index.index_part_lines(shared_products).items()):
+        filename = base_name + CODEC_SUFFIX[codec]
+        entry, written = _write_part(output_dir, filename, lines, codec, prev_entries.get(filename))
+        product_entries.append(entry)
+        if written:
+            changed.append(filename)
+            bytes_written += entry["bytes"]
+
+    # 코덱이 바뀌면 확장자가 달라지므로 이전 코덱의 파트도 여기서 지워진다
+    removed = _remove_stale(output_dir, "part_*.jsonl*", {entry["file"] for entry in part_entries})
+    removed += _remove_stale(
+        output_dir, f"{product_index.PRODUCT_PART_PREFIX}*.jsonl*", {entry["file"] for entry in product_entries}
+    )
+
+    manifest = {
+        "parts": part_entries,
+        "total_count": sum(entry["count"] for entry in part_entries),
+        "updated_at": timestamp,
+        "sharding": SHARDING_SCHEME,
+        "shard_count": JSON_SHARD_COUNT,
+        "codec": codec,
+        "products": {
+            "parts": product_entries,
+            "total_count": len(shared_products),
+            "part_count": product_index.PRODUCT_PART_COUNT,
+        },
+    }
+    if tree is not None:
+        manifest["category_tree"] = {
+            "file": category_tree.TREE_PATH.name,
+            "nodes": len(tree),
+            "crc32": category_tree.prefix_signature(tree, len(tree)),
+        }
+    tmp_manifest = manifest_path.with_suffix(".tmp")
+    with tmp_manifest.open("w", encoding="utf-8") as mf:
+        json.dump(manifest, mf, indent=2, ensure_ascii=False)
+    tmp_manifest.replace(manifest_path)
+
+    state = {
+        "links": sorted(item.get("link") for item in data if isinstance(item, dict) and item.get("ok")),
+        "updated_at": timestamp,
+    }
+    tmp_state = state_path.with_suffix(".tmp")
+    with tmp_state.open("w", encoding="utf-8") as sf:
+        json.dump(state, sf, indent=2, ensure_ascii=False)
+    tmp_state.replace(state_path)
+
+    if output_dir == OUTPUT_DIR and LEGACY_JSON_PATH.exists():
+        try:
+            LEGACY_JSON_PATH.unlink()
+        except OSError:
+            pass
+
+    return {"changed": changed, "removed": removed, "bytes_written": bytes_written}
+
+def part_bytes(filenames, output_dir=OUTPUT_DIR):
+    """현재 디스크에 있는 파트 파일들의 바이트 합계"""
+    total = 0
+    for filename in filenames:
+        try:
+            total += (output_dir / filename).stat().st_size
+        except OSError:
+            continue
+    return total
+
+def _read_keyed(output_dir, filename, key):
+    path = output_dir / filename
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f).get(key) or {}
+    except Exception as exc:
+        log.warning("%s 읽기 실패: %s", filename, exc)
+        return {}
+
+def _write_keyed(output_dir, filename, key, mapping):
+    """정렬 저장 (타임스탬프 없음 → 내용이 같으면 파일도 그대로). 변경 여부 반환."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps({key: dict(sorted(mapping.items()))}, indent=2, ensure_ascii=False)
+    return _write_if_changed(output_dir / filename, (payload + "\n").encode("utf-8"))
+
+def read_page_fingerprints(output_dir=OUTPUT_DIR):
+    """{카테고리 링크: 목록 페이지 지문}"""
+    return _read_keyed(output_dir, PAGE_FINGERPRINTS_FILE, "pages")
+
+def write_page_fingerprints(fingerprints, output_dir=OUTPUT_DIR):
+    return _write_keyed(output_dir, PAGE_FINGERPRINTS_FILE, "pages", fingerprints)
+
+def read_negative_cache(output_dir=OUTPUT_DIR):
+    """{카테고리 링크: {"reason", "first_seen", "last_checked", "misses", "cost_s"}}"""
+    return _read_keyed(output_dir, NEGATIVE_CACHE_FILE, "links")
+
+def write_negative_cache(entries, output_dir=OUTPUT_DIR):
+    return _write_keyed(output_dir, NEGATIVE_CACHE_FILE, "links", entries)
+
+def read_link_costs(output_dir=OUTPUT_DIR):
+    """{카테고리 링크: 크롤 시간(초)}"""
+    return _read_keyed(output_dir, LINK_COSTS_FILE, "links")
+
+def write_link_costs(costs, output_dir=OUTPUT_DIR):
+    return _write_keyed(output_dir, LINK_COSTS_FILE, "links", costs)
+
+def write_status(processed_links, pending_links, skipped_links, total_links, eligible_links, complete_total,
+                 extra=None, status_path=STATUS_PATH):
+    payload = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "processed_links": processed_links,
+        "pending_links": pending_links,
+        "skipped_links": skipped_links,
+        "total_links": total_links,
+        "eligible_links": eligible_links,
+        "complete_total": complete_total,
+    }
+    if extra:
+        payload.update(extra)
+    tmp_status = status_path.with_suffix(".tmp")
+    with tmp_status.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    tmp_status.replace(status_path)
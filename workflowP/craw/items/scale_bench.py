@@ -0,0 +1,295 @@
+# craw/items/scale_bench.py
+"""
+아이템 단계 저장 계층 규모 벤치마크 (브라우저 없음).
+
+실제 결과와 같은 형태의 가짜 결과(카테고리 링크 × 상품 N개)를 생성해
+result_store 의 체크포인트/재시작 경로에 규모별로 흘려 보내고 다음을 측정한다.
+
+- 체크포인트 지연: 수집 리스트 복사 + merge_results + write_sharded_results
+  (코퍼스 크기별 표본 측정 → 전체 실행의 누적 체크포인트 시간 추정)
+- 수집 리스트(B_in_link_get_items 와 같은 일반 리스트): 배치 append 비용, list() 복사 시간
+- 재시작 시간: read_existing_results + 완료 링크 집합 + 상품 지문 구성
+- 디스크: 결과 파트 / 상품 인덱스 / state.json / manifest 바이트
+- 최대 RSS: 규모마다 별도 프로세스에서 실행해 분리 측정
+
+사용 예:
+    python scale_bench.py                         # 0.1x, 1x, 10x (기준 6800 링크 × 30 상품)
+    python scale_bench.py --scales 1,10,100 --links 6800 --products 30
+    python scale_bench.py --scales 0.05 --keep    # 생성된 출력 디렉터리 유지
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from result_store import DATA_DIR, read_existing_results, merge_results, write_sharded_results
+import product_index
+
+# ================== 상수 ==================
+BASE_LINKS = 6800
+BASE_PRODUCTS = 30
+BENCH_PATH = DATA_DIR / "metrics" / "scale_bench.json"
+SAMPLE_FRACTIONS = (0.1, 0.25, 0.5, 1.0)  # 체크포인트 지연을 측정할 코퍼스 진행 지점
+LIST_SELECTOR = "div.main_prodlist.main_prodlist_list > ul > li"
+
+WORDS = [
+    "삼성전자", "LG전자", "애플", "로지텍", "다이슨", "필립스", "쿠쿠", "샤오미", "무선", "블루투스",
+    "게이밍", "노트북", "모니터", "키보드", "마우스", "이어폰", "청소기", "공기청정기", "화이트", "블랙",
+    "대용량", "초경량", "프리미엄", "2024년형", "정품", "1+1", "스탠드", "충전식", "가정용", "휴대용",
+]
+TAGS = ["무선", "USB-C", "정격출력: 30W", "무게: 1.2kg", "색상: 화이트", "KC인증", "방수: IPX4", "배터리: 5000mAh"]
+
+# ================== 가짜 데이터 ==================
+def _product(rng, cate, pcode=None):
+    pcode = pcode or rng.randrange(10_000_000, 30_000_000)
+    link_pcode = f"V{rng.randrange(10**10, 10**11)}"
+    rating = round(rng.uniform(3.0, 5.0), 1) if rng.random() < 0.7 else None
+    reviews = rng.randrange(1, 20000) if rating is not None else None
+    price = rng.randrange(1000, 3_000_000) // 10 * 10
+    return {
+        "link": (
+            f"https://prod.danawa.com/bridge/loadingBridge.html?cate1={cate // 1000}&cate2={cate % 1000}"
+            f"&link_pcode={link_pcode}&pcode={pcode}&cmpnyc=TP40F&safe_trade=4&fee_type=T"
+        ),
+        "image": f"//img.danawa.com/prod_img/500000/{pcode % 1000:03}/{pcode}_1.jpg?shrink=130:130",
+        "prod_name": " ".join(rng.choice(WORDS) for _ in range(rng.randrange(4, 9))),
+        "tags": " / ".join(rng.sample(TAGS, rng.randrange(2, 6))),
+        "price": f"{price:,}",
+        "rating": rating,
+        "review_count": reviews,
+        "rating_weighted": round(rating * reviews, 2) if rating is not None else None,
+        "raw_rating_text": f"{rating}" if rating is not None else "",
+        "raw_review_text": f"({reviews:,})" if reviews is not None else "",
+    }
+
+def generate_records(n_links, products_per_link, dup_ratio=0.1, seed=0):
+    """
+    실제 결과 형태의 레코드를 순서대로 생성한다.
+    dup_ratio 비율의 카테고리는 앞선 카테고리의 상품을 그대로 싣는다(로켓배송관 같은 미러).
+    """
+    rng = random.Random(seed)
+    recent = []
+    for i in range(n_links):
+        cate = 10_000_000 + i * 7
+        if recent and rng.random() < dup_ratio:
+            products = [dict(p) for p in rng.choice(recent)]
+        else:
+            products = [_product(rng, cate) for _ in range(products_per_link)]
+        recent.append(products)
+        if len(recent) > 200:
+            recent.pop(0)
+        yield {
+            "link": f"https://prod.danawa.com/list/?cate={cate}",
+            "path": [f"대분류{i % 20}", f"중분류{i % 300}", f"소분류{i}", ""],
+            "ok": True,
+            "products": products,
+            "list_selector": LIST_SELECTOR,
+            "product_count": len(products),
+        }
+
+# ================== 측정 ==================
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 리눅스는 KiB, macOS 는 바이트 단위
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def _dir_bytes(path, pattern):
+    return sum(p.stat().st_size for p in path.glob(pattern))
+
+def _fit_linear(points):
+    """[(n, seconds)] → (a, b) 최소제곱 a + b*n"""
+    if len(points) < 2:
+        return (points[0][1] if points else 0.0), 0.0
+    mean_n = sum(n for n, _ in points) / len(points)
+    mean_t = sum(t for _, t in points) / len(points)
+    var = sum((n - mean_n) ** 2 for n, _ in points)
+    b = sum((n - mean_n) * (t - mean_t) for n, t in points) / var if var else 0.0
+    return mean_t - b * mean_n, b
+
+def next_batch(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            break
+    return batch
+
+def run_scale(n_links, products_per_link, checkpoint_n, batch_size, dup_ratio, seed, out_dir):
+    """한 규모를 현재 프로세스에서 실행하고 측정값 dict 반환"""
+    shared = []
+    checkpoint_points, first_writes = [], []
+    sample_at = sorted({max(batch_size, int(n_links * f)) for f in SAMPLE_FRACTIONS})
+    append_s = 0.0
+    copy_s = 0.0
+    count = 0
+
+    def _checkpoint():
+        nonlocal copy_s
+        started = time.perf_counter()
+        current = list(shared)
+        copied = time.perf_counter()
+        data = merge_results([], current)
+        write_sharded_results(data, out_dir)
+        copy_s = copied - started
+        return time.perf_counter() - started
+
+    batch = []
+    records = generate_records(n_links, products_per_link, dup_ratio, seed)
+    for record in records:
+        batch.append(record)
+        if len(batch) < batch_size and count + len(batch) < n_links:
+            continue
+        started = time.perf_counter()
+        for item in batch:  # B_in_link_get_items._collect 와 같은 방식의 append
+            shared.append(item)
+        append_s += time.perf_counter() - started
+        count += len(batch)
+        batch = []
+        if sample_at and count >= sample_at[0]:
+            sample_at.pop(0)
+            # 첫 기록(모든 파트 쓰기) 후 배치 하나를 더 넣어 정상 상태의 증분 체크포인트를 측정
+            first_writes.append((count, round(_checkpoint(), 4)))
+            for item in next_batch(records, batch_size):
+                shared.append(item)
+                count += 1
+            checkpoint_points.append((count, _checkpoint()))
+
+    started = time.perf_counter()
+    resumed = read_existing_results(out_dir)
+    prev_links = {r.get("link") for r in resumed if isinstance(r, dict) and r.get("ok")}
+    known = product_index.known_fingerprints(resumed)
+    resume_s = time.perf_counter() - started
+
+    # 실제 실행은 CHECKPOINT_N 링크마다 체크포인트 → 코퍼스 크기에 비례하는 지연의 누적 추정
+    a, b = _fit_linear(checkpoint_points)
+    n_checkpoints = count // checkpoint_n if checkpoint_n > 0 else 0
+    est_total = n_checkpoints * a + b * checkpoint_n * n_checkpoints * (n_checkpoints + 1) / 2
+
+    return {
+        "links": count,
+        "products": count * products_per_link,
+        "checkpoint_s": [[n, round(t, 4)] for n, t in checkpoint_points],
+        "first_write_s": first_writes,
+        "checkpoint_last_s": round(checkpoint_points[-1][1], 4) if checkpoint_points else None,
+        "list_copy_last_s": round(copy_s, 4),
+        "estimated_total_checkpoint_s": round(est_total, 1),
+        "append_us_per_link": round(append_s / max(1, count) * 1e6, 1),
+        "resume_s": round(resume_s, 3),
+        "resumed_links": len(prev_links),
+        "known_products": len(known),
+        "disk": {
+            "parts": _dir_bytes(out_dir, "part_*.jsonl*"),
+            "product_index": _dir_bytes(out_dir, f"{product_index.PRODUCT_PART_PREFIX}*.jsonl*"),
+            "state": _dir_bytes(out_dir, "state.json"),
+            "manifest": _dir_bytes(out_dir, "manifest.json"),
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+# ================== 출력 ==================
+def _fmt_bytes(n):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.1f}{unit}" if unit != "B" else f"{n}B"
+        n /= 1024
+    return f"{n:.1f}GiB"
+
+def print_table(rows):
+    header = (
+        f"{'scale':>6} {'links':>8} {'ckpt(s)':>8} {'copy(s)':>8} {'run ckpt(s)':>12} "
+        f"{'resume(s)':>9} {'disk':>10} {'state':>9} {'RSS(MB)':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if row.get("error"):
+            print(f"{row['scale']:>6} 실패: {row['error']}")
+            continue
+        disk = row["disk"]
+        print(
+            f"{row['scale']:>6} {row['links']:>8} {row['checkpoint_last_s']:>8} {row['list_copy_last_s']:>8} "
+            f"{row['estimated_total_checkpoint_s']:>12} {row['resume_s']:>9} "
+            f"{_fmt_bytes(sum(disk.values())):>10} {_fmt_bytes(disk['state']):>9} "
+            f"{row['peak_rss_mb'] or '-':>8}"
+        )
+
+# ================== CLI ==================
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="아이템 저장 계층 규모 벤치마크")
+    parser.add_argument("--scales", default="0.1,1,10", help="기준 링크 수 대비 배수 목록 (예: 1,10,100)")
+    parser.add_argument("--links", type=int, default=BASE_LINKS, help="1배 기준 링크 수")
+    parser.add_argument("--products", type=int, default=BASE_PRODUCTS, help="링크당 상품 수")
+    parser.add_argument("--checkpoint-n", type=int, default=int(os.environ.get("CHECKPOINT_N", "10")))
+    parser.add_argument("--batch-size", type=int, default=int(os.environ.get("BATCH_SIZE", "10")))
+    parser.add_argument("--dup-ratio", type=float, default=0.1, help="미러(중복 상품) 카테고리 비율")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", type=Path, default=None, help="출력 디렉터리 위치 (기본: 임시 디렉터리)")
+    parser.add_argument("--keep", action="store_true", help="생성한 출력 디렉터리를 지우지 않음")
+    parser.add_argument("--out", type=Path, default=BENCH_PATH, help="결과 JSON 경로")
+    parser.add_argument("--one", type=float, default=None, help=argparse.SUPPRESS)  # 내부용: 단일 규모 실행
+    parser.add_argument("--one-dir", type=Path, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    if args.one is not None:
+        result = run_scale(
+            max(1, int(args.links * args.one)), args.products, args.checkpoint_n,
+            max(1, args.batch_size), args.dup_ratio, args.seed, args.one_dir,
+        )
+        print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    scales = [float(s) for s in args.scales.split(",") if s.strip()]
+    rows = []
+    for scale in scales:
+        out_dir = Path(tempfile.mkdtemp(prefix=f"scale_bench_{scale:g}x_", dir=args.workdir))
+        print(f"▶ {scale:g}x: {int(args.links * scale)}개 링크 × {args.products}개 상품 → {out_dir}", flush=True)
+        cmd = [
+            sys.executable, str(Path(__file__).resolve()),
+            "--one", str(scale), "--one-dir", str(out_dir),
+            "--links", str(args.links), "--products", str(args.products),
+            "--checkpoint-n", str(args.checkpoint_n), "--batch-size", str(args.batch_size),
+            "--dup-ratio", str(args.dup_ratio), "--seed", str(args.seed),
+        ]
+        started = time.perf_counter()
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        row = {"scale": f"{scale:g}x", "elapsed_s": round(time.perf_counter() - started, 1)}
+        try:
+            row.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+        except (IndexError, json.JSONDecodeError):
+            row["error"] = (proc.stderr.strip().splitlines() or [f"exit {proc.returncode}"])[-1]
+        rows.append(row)
+        if not args.keep:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    print()
+    print_table(rows)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    with args.out.open("w", encoding="utf-8") as f:
+        json.dump({
+            "config": {
+                "links": args.links, "products": args.products, "checkpoint_n": args.checkpoint_n,
+                "batch_size": args.batch_size, "dup_ratio": args.dup_ratio, "seed": args.seed,
+            },
+            "results": rows,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\n결과 저장: {args.out}")
+    return 1 if any(row.get("error") for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
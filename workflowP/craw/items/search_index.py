@@ -0,0 +1,500 @@
+# craw/items/search_index.py
+"""
+크롤 결과 상품명/태그 전문 검색 인덱스.
+
+- 토큰: NFKC + 소문자로 정규화한 뒤 단어(문자/숫자 연속)마다 2글자 n-gram. 띄어쓰기/조사와 무관하게
+  한국어 부분 일치가 된다("트레이닝 조거" → 트레, 레이, 이닝, 조거). 한 글자 단어는 그대로 토큰.
+- 저장: 체크포인트마다 신규 결과로 변경 불가 세그먼트 파일(seg_NNNNN.bin)을 하나 추가한다.
+  세그먼트는 정렬된 term 해시 배열 / 포스팅(문서 번호 << 2 | 필드 비트) / 문서별 카테고리·길이 /
+  저장 필드(JSON) 구역으로 된 고정 레이아웃이라 mmap 으로 열어 복사 없이 이진 탐색한다.
+- 같은 카테고리 링크가 다시 들어오면 이전 세그먼트의 해당 카테고리 문서는 meta 의 dead 목록으로 지운다.
+  세그먼트가 SEARCH_MAX_SEGMENTS 를 넘거나 지워진 문서가 절반을 넘으면 살아 있는 문서로 하나로 합친다.
+- 점수: 포스팅이 적은(드문) 토큰에서 후보를 모으고, 나머지 토큰은 후보가 적으면 이진 탐색·많으면 포스팅을 훑어 확인한다.
+  일치한 토큰 수(SEARCH_MIN_MATCH 비율 이상) → BM25(상품명 일치는 가중치 2) 순, 상위 후보는 단어 포함 여부로 재정렬.
+- B_in_link_get_items 체크포인트와 shard_merge 에서 update_index(신규 결과)로 증분 갱신된다.
+
+사용 예:
+    python search_index.py build
+    python search_index.py query "트레이닝 조거" -n 10
+    python search_index.py query "무선 청소기" --category "가전 · TV" --json
+"""
+import argparse
+import bisect
+import datetime
+import hashlib
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
+from array import array
+from collections.abc import Mapping
+
+from product_index import product_id
+from rank_index import category_name, price_value
+from result_store import DATA_DIR, read_existing_results
+
+# ================== 상수 ==================
+INDEX_DIR = DATA_DIR / "search_index"
+META_PATH = INDEX_DIR / "meta.json"
+CATEGORIES_PATH = INDEX_DIR / "categories.json"   # 카테고리 링크 → [세그먼트, 번호, 문서 수] (갱신 때만 사용)
+SEARCH_MAX_SEGMENTS = max(1, int(os.environ.get("SEARCH_MAX_SEGMENTS", "8")))
+# 질의 토큰 중 이 비율 이상 포함한 문서만 결과 (1이면 모든 토큰 포함)
+SEARCH_MIN_MATCH = min(1.0, max(0.0, float(os.environ.get("SEARCH_MIN_MATCH", "0.75"))))
+
+GRAM = 2
+MAGIC = b"SRCHIDX1"
+HEADER = struct.Struct("<8sIIII4x")   # magic, term 수, 문서 수, 포스팅 수, 저장 필드 바이트
+NAME_BIT, TAGS_BIT = 1, 2
+NAME_WEIGHT = 2.0
+BM25_K1, BM25_B = 1.2, 0.75
+WORD_BOOST = 1.5                      # 질의 단어가 상품명/태그에 그대로 있으면 재정렬 때 가중
+RERANK_MIN = 50
+SCAN_RATIO = 16                       # 후보 수 × 이 값이 포스팅보다 많으면 이진 탐색 대신 포스팅을 훑는다
+# 저장 필드 순서 (세그먼트 안의 JSON 배열)
+STORED_FIELDS = ("link", "image", "prod_name", "tags", "price", "rating_weighted", "review_count", "category")
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+log = logging.getLogger(__name__)
+
+# ================== 토큰 ==================
+def normalize(text):
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+def words(text):
+    return _WORD_RE.findall(normalize(text))
+
+def grams(text):
+    """텍스트의 n-gram 토큰 집합"""
+    out = set()
+    for word in words(text):
+        if len(word) <= GRAM:
+            out.add(word)
+            continue
+        for i in range(len(word) - GRAM + 1):
+            out.add(word[i:i + GRAM])
+    return out
+
+def term_key(gram):
+    """토큰 → 64비트 키 (세그먼트의 정렬된 term 배열에 저장)"""
+    return int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+
+# ================== 파일 유틸 ==================
+def _load_json(path, default):
+    if not path.exists():
+        return default
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as exc:
+        log.warning("검색 인덱스 파일 읽기 실패(%s): %s", path.name, exc)
+        return default
+
+def _dump_json(path, payload):
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    tmp.replace(path)
+
+def _empty_meta():
+    return {
+        "segments": [], "next_segment": 0, "generation": 0, "gram": GRAM,
+        "byteorder": sys.byteorder, "updated_at": None,
+    }
+
+def load_meta():
+    meta = _load_json(META_PATH, None)
+    if not meta:
+        return _empty_meta()
+    if meta.get("gram") != GRAM or meta.get("byteorder") != sys.byteorder:
+        log.warning("검색 인덱스 형식이 다릅니다: build 로 다시 만드세요")
+        return _empty_meta()
+    return meta
+
+# ================== 세그먼트 ==================
+def _stored(record, product):
+    return [
+        product.get("link"), product.get("image"), product.get("prod_name"), product.get("tags"),
+        product.get("price"), product.get("rating_weighted"), product.get("review_count"),
+        category_name(record.get("path")),
+    ]
+
+def write_segment(path, categories):
+    """
+    categories: [(카테고리 링크, [저장 필드 리스트, ...])] — 순서 = 세그먼트 안 카테고리 번호.
+    반환: (문서 수, 토큰 수 합계)
+    """
+    postings = {}
+    keys = {}
+    doc_cat, doc_len, offsets = array("I"), array("I"), array("I", [0])
+    blob = bytearray()
+    doc_id = 0
+    for cat, (_, docs) in enumerate(categories):
+        for stored in docs:
+            fields = dict.fromkeys(grams(stored[2]), NAME_BIT)
+            for gram in grams(stored[3]):
+                fields[gram] = fields.get(gram, 0) | TAGS_BIT
+            for gram, bits in fields.items():
+                key = keys.get(gram)
+                if key is None:
+                    key = keys[gram] = term_key(gram)
+                plist = postings.get(key)
+                if plist is None:
+                    plist = postings[key] = array("I")
+                plist.append(doc_id << 2 | bits)
+            doc_cat.append(cat)
+            doc_len.append(len(fields))
+            blob += json.dumps(stored, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            offsets.append(len(blob))
+            doc_id += 1
+    term_keys = array("Q", sorted(postings))
+    ranges, flat = array("I"), array("I")
+    for key in term_keys:
+        plist = postings[key]
+        ranges.append(len(flat))
+        ranges.append(len(plist))
+        flat.extend(plist)
+
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, len(term_keys), doc_id, len(flat), len(blob)))
+        for part in (term_keys, ranges, flat, doc_cat, doc_len, offsets):
+            part.tofile(f)
+        f.write(blob)
+    tmp.replace(path)
+    return doc_id, sum(doc_len)
+
+class Segment:
+    """세그먼트 파일 하나를 mmap 으로 연 읽기 전용 뷰"""
+
+    def __init__(self, path, dead=()):
+        self.path = path
+        self.dead = frozenset(dead)
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_terms, n_docs, n_postings, blob_bytes = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"검색 세그먼트 형식 아님: {path.name}")
+        self.n_docs = n_docs
+        self._views = [memoryview(self._map)]
+        self._pos = HEADER.size
+        self.keys = self._section(n_terms, "Q")
+        self.ranges = self._section(n_terms * 2, "I")
+        self.postings = self._section(n_postings, "I")
+        self.doc_cat = self._section(n_docs, "I")
+        self.doc_len = self._section(n_docs, "I")
+        self.offsets = self._section(n_docs + 1, "I")
+        self._blob = self._pos
+
+    def _section(self, count, fmt):
+        size = count * struct.calcsize(fmt)
+        part = self._views[0][self._pos:self._pos + size]
+        view = part.cast(fmt)
+        self._views += [part, view]
+        self._pos += size
+        return view
+
+    def lookup(self, key):
+        """term 키의 포스팅 범위 (시작, 끝) — 없으면 None"""
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            start = self.ranges[2 * i]
+            return start, start + self.ranges[2 * i + 1]
+        return None
+
+    def find(self, span, doc_id):
+        """포스팅 범위 안에서 문서의 필드 비트 (없으면 0)"""
+        i = bisect.bisect_left(self.postings, doc_id << 2, span[0], span[1])
+        if i < span[1] and self.postings[i] >> 2 == doc_id:
+            return self.postings[i] & 3
+        return 0
+
+    def live(self, doc_id):
+        return self.doc_cat[doc_id] not in self.dead
+
+    def doc(self, doc_id):
+        start = self._blob + self.offsets[doc_id]
+        end = self._blob + self.offsets[doc_id + 1]
+        return json.loads(self._map[start:end].decode("utf-8"))
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+
+# ================== 인덱스 갱신 ==================
+def _segment_info(meta, filename):
+    for info in meta["segments"]:
+        if info["file"] == filename:
+            return info
+    return None
+
+def _add_segment(meta, cats, categories):
+    filename = f"seg_{meta['next_segment']:05}.bin"
+    meta["next_segment"] += 1
+    docs, total = write_segment(INDEX_DIR / filename, categories)
+    meta["segments"].append({"file": filename, "docs": docs, "grams": total, "dead": [], "dead_docs": 0})
+    for ordinal, (link, stored) in enumerate(categories):
+        cats[link] = [filename, ordinal, len(stored)]
+    return docs
+
+def _needs_merge(meta):
+    docs = sum(info["docs"] for info in meta["segments"])
+    dead = sum(info["dead_docs"] for info in meta["segments"])
+    return len(meta["segments"]) > SEARCH_MAX_SEGMENTS or (len(meta["segments"]) > 1 and dead * 2 > docs)
+
+def _merge(meta, cats):
+    """살아 있는 문서를 모두 새 세그먼트 하나로 합친다 (저장 필드에서 다시 토큰화)"""
+    owners = {(filename, ordinal): link for link, (filename, ordinal, _) in cats.items()}
+    live = {link: [] for link in cats}
+    for info in meta["segments"]:
+        segment = Segment(INDEX_DIR / info["file"], info["dead"])
+        try:
+            for doc_id in range(segment.n_docs):
+                link = owners.get((info["file"], segment.doc_cat[doc_id]))
+                if link is not None and segment.live(doc_id):
+                    live[link].append(segment.doc(doc_id))
+        finally:
+            segment.close()
+    meta["segments"] = []
+    cats.clear()
+    _add_segment(meta, cats, list(live.items()))
+
+def _sweep(meta):
+    """meta 에 없는 세그먼트 파일 삭제 (병합으로 대체된 것/중단된 갱신의 잔여물)"""
+    keep = {info["file"] for info in meta["segments"]}
+    for path in INDEX_DIR.glob("seg_*"):
+        if path.name not in keep:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+def update_index(records):
+    """
+    신규/갱신 결과 레코드로 인덱스를 증분 갱신한다 (세그먼트 하나 추가).
+    같은 카테고리 링크가 다시 들어오면 이전 세그먼트의 문서를 지운다.
+    """
+    latest = {}
+    for r in records:
+        if isinstance(r, dict) and r.get("ok") and r.get("link"):
+            latest[r["link"]] = r  # 같은 배치 안의 중복 링크는 마지막 결과만 사용
+    if not latest:
+        return 0
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    meta = load_meta()
+    cats = _load_json(CATEGORIES_PATH, {"generation": 0, "links": {}})
+    if cats.get("generation") != meta["generation"]:
+        # 이전 갱신이 중간에 멈춤: 다음 호출에서 전체 재구성되도록 meta 를 지운다
+        log.warning("검색 인덱스 상태가 맞지 않아 재구성이 필요합니다")
+        META_PATH.unlink(missing_ok=True)
+        return 0
+    links = cats["links"]
+
+    categories = []
+    for link, record in latest.items():
+        previous = links.get(link)
+        if previous:
+            info = _segment_info(meta, previous[0])
+            if info is not None and previous[1] not in info["dead"]:
+                info["dead"].append(previous[1])
+                info["dead_docs"] += previous[2]
+        stored = [
+            _stored(record, p) for p in record.get("products") or []
+            if isinstance(p, Mapping) and p.get("prod_name")
+        ]
+        categories.append((link, stored))
+    docs = _add_segment(meta, links, categories)
+    if _needs_merge(meta):
+        _merge(meta, links)
+
+    meta["generation"] += 1
+    meta["updated_at"] = datetime.datetime.now().isoformat()
+    _dump_json(CATEGORIES_PATH, {"generation": meta["generation"], "links": links})
+    _dump_json(META_PATH, meta)
+    _sweep(meta)
+    return docs
+
+def build_index(records=None):
+    """전체 결과로 인덱스를 처음부터 다시 만든다."""
+    if records is None:
+        records = read_existing_results()
+    if INDEX_DIR.exists():
+        for path in INDEX_DIR.iterdir():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    return update_index(records)
+
+# ================== 조회 API ==================
+class SearchIndex:
+    """meta 의 세그먼트를 mmap 으로 열어 둔 검색기 (여러 번 조회할 때 재사용, with 로 닫기)"""
+
+    def __init__(self):
+        meta = load_meta()
+        self.segments = []
+        for info in meta["segments"]:
+            try:
+                self.segments.append(Segment(INDEX_DIR / info["file"], info["dead"]))
+            except (OSError, ValueError) as exc:
+                log.warning("검색 세그먼트 열기 실패(%s): %s", info["file"], exc)
+        docs = sum(info["docs"] for info in meta["segments"])
+        self.docs = docs - sum(info["dead_docs"] for info in meta["segments"])
+        self._total = max(1, docs)
+        self._avg_len = sum(info["grams"] for info in meta["segments"]) / self._total or 1.0
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _candidates(self, keys):
+        """[(일치 토큰 수, 점수, 세그먼트 번호, 문서 번호)]"""
+        spans = [[seg.lookup(key) for key in keys] for seg in self.segments]
+        idf = []
+        for i in range(len(keys)):
+            df = sum(seg_spans[i][1] - seg_spans[i][0] for seg_spans in spans if seg_spans[i])
+            idf.append(math.log(1 + (self._total - df + 0.5) / (df + 0.5)))
+        need = max(1, math.ceil(len(keys) * SEARCH_MIN_MATCH))
+        found = []
+        for s, (seg, seg_spans) in enumerate(zip(self.segments, spans)):
+            # 드문 토큰부터: need 개를 채우려면 앞의 (토큰 수 - need + 1)개 중 하나는 반드시 포함한다
+            order = sorted((i for i in range(len(keys)) if seg_spans[i]), key=lambda i: seg_spans[i][1] - seg_spans[i][0])
+            if len(order) < need:
+                continue
+            seeds, rest = order[:len(order) - need + 1], order[len(order) - need + 1:]
+            hits = {}  # 문서 번호 -> [일치 토큰 수, 필드 가중 idf 합]
+            for i in seeds:
+                start, end = seg_spans[i]
+                name_w, tags_w = idf[i] * NAME_WEIGHT, idf[i]
+                for value in seg.postings[start:end].tolist():
+                    entry = hits.get(value >> 2)
+                    if entry is None:
+                        entry = hits[value >> 2] = [0, 0.0]
+                    entry[0] += 1
+                    entry[1] += name_w if value & NAME_BIT else tags_w
+            for i in rest:
+                start, end = seg_spans[i]
+                name_w, tags_w = idf[i] * NAME_WEIGHT, idf[i]
+                if len(hits) * SCAN_RATIO < end - start:
+                    # 후보가 적으면 후보마다 이진 탐색
+                    for doc_id, entry in hits.items():
+                        bits = seg.find(seg_spans[i], doc_id)
+                        if bits:
+                            entry[0] += 1
+                            entry[1] += name_w if bits & NAME_BIT else tags_w
+                    continue
+                for value in seg.postings[start:end].tolist():
+                    entry = hits.get(value >> 2)
+                    if entry is not None:
+                        entry[0] += 1
+                        entry[1] += name_w if value & NAME_BIT else tags_w
+            for doc_id, (count, weight) in hits.items():
+                if count < need or not seg.live(doc_id):
+                    continue
+                # 토큰 빈도를 1로 둔 BM25: 문서 길이(토큰 수) 보정은 문서마다 한 번
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * seg.doc_len[doc_id] / self._avg_len)
+                found.append((count, weight * (BM25_K1 + 1) / (1 + norm), s, doc_id))
+        return found
+
+    def search(self, text, n=10, category=None):
+        """
+        상품명/태그 검색. 일치 토큰 수 → 점수 순으로 n개 (같은 상품은 한 번).
+        category: "1차 > 2차 ..." 경로 앞부분으로 결과 제한.
+        """
+        keys = [term_key(gram) for gram in sorted(grams(text))]
+        if not keys or not self.segments:
+            return []
+        query_words = words(text)
+        window = max(n * 4, RERANK_MIN)
+        results, seen = [], set()
+        found = self._candidates(keys)
+        ranked = heapq.nlargest(window, found) if category is None else sorted(found, reverse=True)
+        for count, score, s, doc_id in ranked:
+            doc = dict(zip(STORED_FIELDS, self.segments[s].doc(doc_id)))
+            name = doc.get("category") or ""
+            if category and name != category and not name.startswith(category + " > "):
+                continue
+            pid = product_id(doc.get("link")) or doc.get("link")
+            if pid in seen:
+                continue
+            seen.add(pid)
+            haystack = normalize(f"{doc.get('prod_name') or ''} {doc.get('tags') or ''}")
+            if query_words and all(word in haystack for word in query_words):
+                score *= WORD_BOOST
+            doc["price_value"] = price_value(doc.get("price"))
+            doc["score"] = round(score, 3)
+            doc["matched"] = count
+            results.append(doc)
+            if len(results) >= window:
+                break
+        results.sort(key=lambda d: (d["matched"], d["score"]), reverse=True)
+        return results[:n]
+
+def search(text, n=10, category=None):
+    """한 번 조회 (세그먼트를 열고 닫는다)"""
+    with SearchIndex() as index:
+        return index.search(text, n=n, category=category)
+
+# ================== CLI ==================
+def _print_entries(entries):
+    for rank, e in enumerate(entries, start=1):
+        print(f"{rank:>3}. [{e.get('price') or '-'}] {e.get('prod_name')} | {e.get('category')} ({e['score']})")
+
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(description="크롤 결과 상품명 검색 인덱스")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("build", help="전체 결과로 인덱스 재구성")
+    p = sub.add_parser("query", help="상품명/태그 검색")
+    p.add_argument("text")
+    p.add_argument("--category", help="'1차 > 2차 > ...' 경로 앞부분으로 제한")
+    p.add_argument("-n", type=int, default=10)
+    p.add_argument("--json", action="store_true", help="JSON으로 출력")
+    sub.add_parser("stats", help="세그먼트/문서 수")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        started = time.perf_counter()
+        count = build_index()
+        log.info("✅ 검색 인덱스 구성 완료: 상품 %d개 (%.1fs) → %s", count, time.perf_counter() - started, INDEX_DIR)
+        return 0
+    if args.cmd == "stats":
+        meta = load_meta()
+        for info in meta["segments"]:
+            size = (INDEX_DIR / info["file"]).stat().st_size
+            print(f"{info['file']}: 문서 {info['docs']}개 (삭제 {info['dead_docs']}), {size / 1024:.0f} KiB")
+        print(f"갱신: {meta['updated_at']}")
+        return 0
+    started = time.perf_counter()
+    entries = search(args.text, n=args.n, category=args.category)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        print(json.dumps(entries, ensure_ascii=False, indent=2))
+    else:
+        _print_entries(entries)
+        print(f"({len(entries)}건, {elapsed_ms:.1f}ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
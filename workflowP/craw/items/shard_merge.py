@@ -0,0 +1,189 @@
+# craw/items/shard_merge.py
+"""
+`--shard i/N` 로 나눠 크롤한 샤드 출력들을 정규 레이아웃(quick_text_probe_parallel/)으로 병합한다.
+
+사용 예:
+    python shard_merge.py merge --shards 4
+    python shard_merge.py merge --shards 4 --out /tmp/merged --no-base
+    python shard_merge.py verify /tmp/single /tmp/merged
+"""
+import argparse
+import json
+import logging
+import shutil
+import sys
+from pathlib import Path
+
+from result_store import (
+    OUTPUT_DIR,
+    STATUS_PATH,
+    read_existing_results,
+    write_sharded_results,
+    write_status,
+    part_bytes,
+    read_page_fingerprints,
+    write_page_fingerprints,
+    read_negative_cache,
+    write_negative_cache,
+    read_link_costs,
+    write_link_costs,
+    shard_output_dir,
+    shard_status_path,
+    link_in_shard,
+)
+import rank_index
+import search_index
+import product_index
+
+log = logging.getLogger(__name__)
+
+STATUS_SUM_FIELDS = ("processed_links", "pending_links", "skipped_links", "eligible_links")
+
+def _read_json(path):
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as exc:
+        log.warning("JSON 읽기 실패(%s): %s", path, exc)
+        return None
+
+def merge_shards(count, out_dir=OUTPUT_DIR, status_path=STATUS_PATH, use_base=True, clean=False):
+    """
+    샤드 0..count-1 의 출력을 링크 기준으로 합쳐 out_dir에 저장한다.
+    use_base=True면 out_dir의 기존 결과 위에 샤드 결과를 덮어쓴다(샤드 결과 우선).
+    """
+    merged = {}
+    if use_base:
+        for record in read_existing_results(out_dir):
+            if isinstance(record, dict) and record.get("link"):
+                merged[record["link"]] = record
+    base_count = len(merged)
+    page_fps = read_page_fingerprints(out_dir) if use_base else {}
+    negative = read_negative_cache(out_dir) if use_base else {}
+    link_costs = read_link_costs(out_dir) if use_base else {}
+
+    statuses, missing, shard_records = [], [], []
+    for index in range(count):
+        shard_dir = shard_output_dir(index, count)
+        if not (shard_dir / "manifest.json").exists():
+            missing.append(index)
+            log.warning("샤드 %d/%d 출력이 없습니다: %s", index, count, shard_dir)
+            continue
+        records = read_existing_results(shard_dir)
+        for record in records:
+            if isinstance(record, dict) and record.get("link"):
+                merged[record["link"]] = record
+        shard_records.extend(records)
+        page_fps.update(read_page_fingerprints(shard_dir))
+        # 샤드 캐시가 기준 출력보다 최신: 샤드에서 복구된 링크는 샤드 쪽에서 이미 빠져 있다
+        shard_negative = read_negative_cache(shard_dir)
+        for link in [lk for lk in negative if link_in_shard(lk, index, count)]:
+            if link not in shard_negative:
+                negative.pop(link)
+        negative.update(shard_negative)
+        link_costs.update(read_link_costs(shard_dir))
+        status_file = shard_status_path(index, count)
+        status = _read_json(status_file) if status_file.exists() else None
+        if status:
+            statuses.append(status)
+        log.info("샤드 %d/%d: %d개 레코드 병합", index, count, len(records))
+
+    data = list(merged.values())
+    report = write_sharded_results(data, out_dir)
+    write_page_fingerprints(page_fps, out_dir)
+    write_negative_cache(negative, out_dir)
+    write_link_costs(link_costs, out_dir)
+    totals = {field: sum(int(s.get(field) or 0) for s in statuses) for field in STATUS_SUM_FIELDS}
+    write_status(
+        totals["processed_links"],
+        totals["pending_links"],
+        totals["skipped_links"],
+        max((int(s.get("total_links") or 0) for s in statuses), default=0),
+        totals["eligible_links"],
+        len(data),
+        extra={
+            "merged_shards": count - len(missing),
+            "missing_shards": missing,
+            "changed_parts": len(report["changed"]) + len(report["removed"]),
+            "changed_bytes": part_bytes(report["changed"], out_dir),
+        },
+        status_path=status_path,
+    )
+    if out_dir == OUTPUT_DIR:
+        for name, index in (("랭킹", rank_index), ("검색", search_index)):
+            try:
+                if index.META_PATH.exists():
+                    index.update_index(shard_records)
+                else:
+                    index.build_index(data)  # 캐시된 인덱스가 없으면 샤드 결과만으로 만들지 않고 전체로
+            except Exception as exc:
+                log.warning("%s 인덱스 갱신 실패: %s", name, exc)
+
+    if clean and not missing:
+        for index in range(count):
+            shutil.rmtree(shard_output_dir(index, count), ignore_errors=True)
+            shard_status_path(index, count).unlink(missing_ok=True)
+
+    log.info(
+        "✅ 샤드 병합 완료: 기존 %d개 + 샤드 %d개 레코드 → 누적 %d개 (변경 파트 %d개) → %s",
+        base_count, len(shard_records), len(data), len(report["changed"]), out_dir,
+    )
+    return {"total": len(data), "missing": missing, **report}
+
+def verify_identical(dir_a, dir_b):
+    """두 출력 디렉터리의 파트/상품 인덱스 파일과 상태 링크가 바이트 단위로 같은지 확인. 차이 목록 반환."""
+    diffs = []
+    patterns = ("part_*", f"{product_index.PRODUCT_PART_PREFIX}*")
+    parts_a = {p.name: p for pattern in patterns for p in dir_a.glob(pattern)}
+    parts_b = {p.name: p for pattern in patterns for p in dir_b.glob(pattern)}
+    for name in sorted(set(parts_a) ^ set(parts_b)):
+        diffs.append(f"한쪽에만 존재: {name}")
+    for name in sorted(set(parts_a) & set(parts_b)):
+        if parts_a[name].read_bytes() != parts_b[name].read_bytes():
+            diffs.append(f"내용 다름: {name}")
+    state_a = _read_json(dir_a / "state.json") or {}
+    state_b = _read_json(dir_b / "state.json") or {}
+    if state_a.get("links") != state_b.get("links"):
+        diffs.append("state.json 링크 목록 다름")
+    return diffs
+
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(description="샤드 크롤 출력 병합/검증")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_merge = sub.add_parser("merge", help="샤드 출력을 정규 레이아웃으로 병합")
+    p_merge.add_argument("--shards", type=int, required=True, help="샤드 개수 N")
+    p_merge.add_argument("--out", type=Path, default=OUTPUT_DIR, help="병합 출력 디렉터리")
+    p_merge.add_argument("--no-base", action="store_true", help="출력 디렉터리의 기존 결과를 무시")
+    p_merge.add_argument("--clean", action="store_true", help="병합 후 샤드 출력 삭제")
+    p_verify = sub.add_parser("verify", help="두 출력 디렉터리가 동일한지 확인")
+    p_verify.add_argument("dir_a", type=Path)
+    p_verify.add_argument("dir_b", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "merge":
+        out_dir = args.out.resolve()
+        status_path = STATUS_PATH if out_dir == OUTPUT_DIR else out_dir / "status.json"
+        result = merge_shards(
+            args.shards,
+            out_dir=out_dir,
+            status_path=status_path,
+            use_base=not args.no_base,
+            clean=args.clean,
+        )
+        return 1 if result["missing"] else 0
+
+    diffs = verify_identical(args.dir_a, args.dir_b)
+    for line in diffs:
+        print(f"✖ {line}")
+    if diffs:
+        return 1
+    print(f"✔ 동일: {args.dir_a} == {args.dir_b}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
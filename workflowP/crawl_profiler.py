@@ -0,0 +1,288 @@
+# crawl_profiler.py
+"""
+daily_crawl 단계용 샘플링 프로파일러.
+
+스테이지 스크립트를 이 모듈로 감싸 실행하면, 별도 스레드가 PROFILE_INTERVAL_MS 마다 모든 스레드의
+파이썬 스택을 수집해 flamegraph 호환 folded 형식(`a;b;c 밀리초`)으로 저장한다.
+각 샘플은 직전 샘플 이후 실제 경과 시간(ms)으로 가중되므로 GIL 경합으로 샘플이 늦어져도 시간이 보존된다.
+fork 된 Pool 워커/Manager 프로세스에서도 자동으로 다시 시작되며, 워커가 terminate 로 종료돼도
+남도록 PROFILE_FLUSH_S 마다 파일을 갱신한다.
+
+사용 예:
+    python crawl_profiler.py run --out-dir daily_crawl.profile --stage items -- craw/items/B_in_link_get_items.py
+    python crawl_profiler.py summary daily_crawl.profile --top 20
+    flamegraph.pl daily_crawl.profile/items#1.MainProcess-1234.folded > items.svg
+"""
+import argparse
+import os
+import runpy
+import signal
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from multiprocessing import current_process
+from multiprocessing.util import Finalize, register_after_fork
+from pathlib import Path
+
+# ================== 상수 ==================
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "10"))
+PROFILE_FLUSH_S = float(os.environ.get("PROFILE_FLUSH_S", "5"))
+FOLDED_SUFFIX = ".folded"
+
+_STDLIB = str(Path(sysconfig.get_paths()["stdlib"]).resolve())
+_LABELS = {}
+
+# 시간 분류: 스택에 해당 라벨이 있으면 그 분류 (위에서부터 우선)
+CATEGORIES = (
+    ("webdriver", ("selenium/", "urllib3/", "http/client.py")),
+    ("json", ("json/encoder.py", "json/decoder.py", "_encode_part", "read_existing_results", "write_sharded_results")),
+)
+# 리프 프레임이 이 파일들이면 대기(락/큐/IPC/select)로 본다
+WAIT_FILES = (
+    "threading.py", "queue.py", "selectors.py", "multiprocessing/connection.py", "multiprocessing/queues.py",
+    "multiprocessing/pool.py", "multiprocessing/synchronize.py", "multiprocessing/popen_fork.py",
+    "multiprocessing/managers.py", "subprocess.py", "socket.py", "ssl.py",
+)
+
+# ================== 수집 ==================
+def _short_path(filename):
+    try:
+        path = str(Path(filename).resolve())
+    except (OSError, ValueError):
+        return filename
+    marker = "site-packages" + os.sep
+    if marker in path:
+        return path.split(marker, 1)[1].replace(os.sep, "/")
+    if path.startswith(_STDLIB + os.sep):
+        return path[len(_STDLIB) + 1:].replace(os.sep, "/")
+    return Path(path).name
+
+def _label(code):
+    label = _LABELS.get(code)
+    if label is None:
+        label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        _LABELS[code] = label
+    return label
+
+class SamplingProfiler:
+    def __init__(self, out_dir, stage, interval_ms=PROFILE_INTERVAL_MS, flush_s=PROFILE_FLUSH_S):
+        self.out_dir = Path(out_dir)
+        self.stage = stage
+        self.interval = max(0.001, interval_ms / 1000.0)
+        self.flush_s = flush_s
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        # 재진입 가능: 정상 종료 중 flush 도중 SIGTERM 핸들러가 다시 flush 할 수 있다
+        self._lock = threading.RLock()
+        self._thread = None
+
+    @property
+    def path(self):
+        # 파일명은 flush 시점에 결정 (fork 직후에는 프로세스 이름이 아직 정해지지 않음)
+        return self.out_dir / f"{self.stage}.{current_process().name}-{os.getpid()}{FOLDED_SUFFIX}"
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="crawl-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self.flush()
+
+    def _sample(self, weight_ms):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(f"[{names.get(ident, ident)}]")
+            key = ";".join(reversed(stack))
+            with self._lock:
+                self.stacks[key] += weight_ms
+
+    def _run(self):
+        last = time.monotonic()
+        next_flush = last + self.flush_s
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            weight_ms = max(1, round((now - last) * 1000))
+            last = now
+            try:
+                self._sample(weight_ms)
+            except Exception:
+                continue
+            if self.flush_s and time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_s
+
+    def flush(self):
+        with self._lock:
+            if not self.stacks:
+                return
+            lines = [f"{stack} {count}" for stack, count in sorted(self.stacks.items())]
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path = self.path
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            tmp.replace(path)
+        except OSError:
+            pass
+
+_ACTIVE = {"profiler": None}
+
+def _restart_in_child():
+    """fork 된 자식(Pool 워커 등): 부모 샘플은 버리고 새 프로파일러 스레드 시작"""
+    parent = _ACTIVE["profiler"]
+    if parent is None:
+        return
+    profiler = SamplingProfiler(parent.out_dir, parent.stage, parent.interval * 1000, parent.flush_s)
+    _ACTIVE["profiler"] = profiler
+    profiler.start()
+
+    # pool.terminate() 의 SIGTERM 에도 저장 후 기본 동작으로 종료
+    def _on_term(signum, frame):
+        # stop()(스레드 join)은 정상 종료 처리 도중 끼어들 수 있어 저장만 한다
+        profiler.flush()
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+    try:
+        signal.signal(signal.SIGTERM, _on_term)
+    except (ValueError, AttributeError):
+        pass  # 메인 스레드가 아닌 곳에서 fork 된 경우: 주기적 저장에 의존
+
+def _register_child_finalizer(_parent):
+    """
+    multiprocessing 자식 시작 시 호출: 정상 종료(pool.close/join) 때 마지막 샘플까지 저장.
+    Process._bootstrap 이 fork 직후 finalizer 목록을 비우므로 at-fork 훅이 아니라 여기서 등록한다.
+    """
+    profiler = _ACTIVE["profiler"]
+    if profiler is not None:
+        Finalize(None, profiler.stop, exitpriority=0)
+
+def run_script(out_dir, stage, script, script_args):
+    """script 를 __main__ 으로 실행하면서 프로파일링"""
+    script = str(Path(script).resolve())
+    sys.argv = [script, *script_args]
+    sys.path.insert(0, str(Path(script).parent))
+    profiler = SamplingProfiler(out_dir, stage)
+    _ACTIVE["profiler"] = profiler
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_in_child)
+    register_after_fork(profiler, _register_child_finalizer)
+    profiler.start()
+    try:
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        if _ACTIVE["profiler"] is profiler:
+            profiler.stop()
+
+# ================== 요약 ==================
+def _leaf_file(stack):
+    leaf = stack.rsplit(";", 1)[-1]
+    if "(" in leaf:
+        return leaf[leaf.rfind("(") + 1:].rsplit(":", 1)[0]
+    return ""
+
+def categorize(stack):
+    for name, needles in CATEGORIES:
+        if any(needle in stack for needle in needles):
+            return name
+    if _leaf_file(stack).endswith(WAIT_FILES):
+        return "waiting"
+    return "python"
+
+def read_folded(path):
+    stacks = Counter()
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+    return stacks
+
+def summarize(profile_dir, top_n=15):
+    """
+    프로파일 디렉터리 요약:
+    {"files": [{file, seconds, categories}], "categories": {...}, "hotspots": [(leaf, ms, seconds, category)]}
+    가중치(ms)를 초로 환산한다(스레드별 벽시계 시간).
+    """
+    scale = 1 / 1000.0
+    files, totals, leaves = [], Counter(), Counter()
+    leaf_category = {}
+    for path in sorted(Path(profile_dir).glob(f"*{FOLDED_SUFFIX}")):
+        stacks = read_folded(path)
+        per_category = Counter()
+        for stack, count in stacks.items():
+            category = categorize(stack)
+            per_category[category] += count
+            leaf = stack.rsplit(";", 1)[-1]
+            leaves[leaf] += count
+            leaf_category.setdefault(leaf, category)
+        totals.update(per_category)
+        total_ms = sum(stacks.values())
+        files.append({
+            "file": path.name,
+            "seconds": round(total_ms * scale, 1),
+            "categories": {k: round(v * scale, 1) for k, v in per_category.most_common()},
+        })
+    hotspots = [
+        (leaf, count, round(count * scale, 1), leaf_category.get(leaf, ""))
+        for leaf, count in leaves.most_common(top_n)
+    ]
+    return {
+        "files": files,
+        "categories": {k: round(v * scale, 1) for k, v in totals.most_common()},
+        "hotspots": hotspots,
+    }
+
+def summary_markdown(summary, title="Profile hotspots"):
+    md = [f"### {title}"]
+    if summary["categories"]:
+        md.append("- Time by kind: " + ", ".join(f"{k} {v}s" for k, v in summary["categories"].items()))
+    md.append("| stage.process | seconds | breakdown |")
+    md.append("|---|---:|---|")
+    for info in summary["files"]:
+        breakdown = ", ".join(f"{k} {v}s" for k, v in info["categories"].items())
+        md.append(f"| {info['file'][:-len(FOLDED_SUFFIX)]} | {info['seconds']} | {breakdown} |")
+    md.append("")
+    md.append("| # | self time (s) | kind | function |")
+    md.append("|---:|---:|---|---|")
+    for rank, (leaf, _, seconds, category) in enumerate(summary["hotspots"], start=1):
+        md.append(f"| {rank} | {seconds} | {category} | `{leaf}` |")
+    return md
+
+# ================== CLI ==================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="daily_crawl 스테이지 샘플링 프로파일러")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_run = sub.add_parser("run", help="스크립트를 프로파일링하며 실행")
+    p_run.add_argument("--out-dir", type=Path, required=True)
+    p_run.add_argument("--stage", required=True, help="출력 파일 접두어 (예: items#1)")
+    p_run.add_argument("script")
+    p_run.add_argument("script_args", nargs=argparse.REMAINDER)
+    p_sum = sub.add_parser("summary", help="folded 프로파일 요약")
+    p_sum.add_argument("profile_dir", type=Path)
+    p_sum.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "run":
+        script_args = args.script_args[1:] if args.script_args[:1] == ["--"] else args.script_args
+        run_script(args.out_dir, args.stage, args.script, script_args)
+        return 0
+
+    print("\n".join(summary_markdown(summarize(args.profile_dir, args.top))))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import sys
+import argparse
 import subprocess
 import logging
 from pathlib import Path
@@ -8,6 +9,8 @@ import time
 import platform
 import json
 
+import crawl_profiler
+
 BASE = Path(__file__).resolve().parent
 CRAW_DIR = BASE  # 루트 디렉토리로 설정
 
@@ -29,12 +32,13 @@ _sh.setLevel(logging.INFO)
 _sh.setFormatter(_formatter)
 logger.addHandler(_sh)
 
-# 파일 핸들러: 항상 덮어쓰기로 초기화
-LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-_fh = logging.FileHandler(LOG_PATH, encoding="utf-8", mode="w")
-_fh.setLevel(logging.INFO)
-_fh.setFormatter(_formatter)
-logger.addHandler(_fh)
+def _attach_file_log(path: Path):
+    """파일 핸들러: 항상 덮어쓰기로 초기화 (샤드 실행은 샤드별 로그 파일 사용)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fh = logging.FileHandler(path, encoding="utf-8", mode="w")
+    fh.setLevel(logging.INFO)
+    fh.setFormatter(_formatter)
+    logger.addHandler(fh)
 
 # ANSI 색상 도우미 (GitHub Actions 콘솔 가독성)
 class C:
@@ -52,8 +56,16 @@ def color(msg: str, c: str) -> str:
 
 # 실행할 스크립트 목록 - 상대 경로로 수정
 CATEGORY_SCRIPT = BASE / "craw" / "category" / "craw_danawa_all_categories.py"
-FILTER_SCRIPT = BASE / "craw" / "items" / "A_link_filter.py"
-ITEM_SCRIPT = BASE / "craw" / "items" / "B_in_link_get_items.py"
+ITEMS_DIR = BASE / "craw" / "items"
+FILTER_SCRIPT = ITEMS_DIR / "A_link_filter.py"
+ITEM_SCRIPT = ITEMS_DIR / "B_in_link_get_items.py"
+MERGE_SCRIPT = ITEMS_DIR / "shard_merge.py"
+DAEMON_SCRIPT = ITEMS_DIR / "crawl_daemon.py"
+
+# 샤드 지정 검증은 아이템 단계와 같은 함수를 쓴다 (스크립트 디렉터리 기준 import)
+sys.path.insert(0, str(ITEMS_DIR))
+from result_store import parse_shard_spec  # noqa: E402
+PROFILER_SCRIPT = BASE / "crawl_profiler.py"
 PIPELINE = [
     ("category", CATEGORY_SCRIPT),
     ("link-filter", FILTER_SCRIPT),
@@ -71,6 +83,8 @@ SCRIPT_TIMEOUT = int(os.environ.get("SCRIPT_TIMEOUT", "0"))
 MAX_RETRIES = int(os.environ.get("MAX_RETRIES", "3"))
 CYCLE_LIMIT = max(1, int(os.environ.get("CRAWL_CYCLE_LIMIT", "1")))
 CYCLE_DELAY = max(0, int(os.environ.get("CRAWL_CYCLE_DELAY", "0")))
+# 프로파일링 모드: 각 단계를 샘플링 프로파일러로 감싸 실행 (--profile 또는 CRAWL_PROFILE=1)
+PROFILE_TOP_N = int(os.environ.get("PROFILE_TOP_N", "15"))
 
 def check_file_exists(path):
     if not os.path.exists(path):
@@ -95,10 +109,21 @@ def _kill_tree(proc: subprocess.Popen):
         except Exception:
             pass
 
-def run_script(path: Path, timeout: int = SCRIPT_TIMEOUT, max_retries: int = MAX_RETRIES) -> bool:
+def run_script(path: Path, timeout: int = SCRIPT_TIMEOUT, max_retries: int = MAX_RETRIES, args=None,
+               profile_dir: Path = None, profile_stage: str = None) -> bool:
     if not check_file_exists(path):
         return False
 
+    command = [sys.executable, str(path), *(args or [])]
+    if profile_dir is not None:
+        # 프로파일러가 스크립트를 __main__ 으로 실행하고, fork 된 Pool 워커까지 따라가 샘플링한다
+        command = [
+            sys.executable, str(PROFILER_SCRIPT), "run",
+            "--out-dir", str(profile_dir),
+            "--stage", profile_stage or path.stem,
+            str(path), *(args or []),
+        ]
+
     attempt = 0
     while attempt < max_retries:
         attempt += 1
@@ -106,7 +131,7 @@ def run_script(path: Path, timeout: int = SCRIPT_TIMEOUT, max_retries: int = MAX
         logger.info(color(f"=== 스크립트 실행 시작[{attempt}/{max_retries}]: {path} @ {start_ts} ===", C.BLUE))
         try:
             with subprocess.Popen(
-                [sys.executable, str(path)],
+                command,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 text=True,
@@ -154,11 +179,17 @@ def _write_github_summary(summary: str):
     except Exception:
         pass
 
-def _read_item_status():
+def _item_status_path(shard=None):
+    if shard and shard[1] > 1:
+        index, count = shard
+        return BASE / "craw" / "data" / f"quick_text_probe_parallel.shard-{index}-of-{count}.status.json"
+    return BASE / "craw" / "data" / "quick_text_probe_parallel.status.json"
+
+def _read_item_status(shard=None):
     """
     아이템 크롤러가 남긴 상태 파일(선택)을 읽어와 다음 루프 조건 판단에 활용.
     """
-    status_path = BASE / "craw" / "data" / "quick_text_probe_parallel.status.json"
+    status_path = _item_status_path(shard)
     if not status_path.exists():
         return None
     try:
@@ -198,7 +229,53 @@ def _should_run_category(now=None):
         return True, last_dt
     return False, last_dt
 
-def main():
+def _parse_shard(spec):
+    """argparse type: result_store.parse_shard_spec 의 ValueError 를 argparse 오류로"""
+    try:
+        return parse_shard_spec(spec)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Danawa 일일 크롤 파이프라인")
+    parser.add_argument(
+        "--shard",
+        type=_parse_shard,
+        default=None,
+        help="i/N: 필터된 링크 중 i번째 조각만 크롤 (카테고리 단계 생략, 샤드 전용 출력)",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        default=0,
+        metavar="N",
+        help="크롤 없이 N개 샤드 출력을 정규 레이아웃으로 병합",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="아이템 단계를 warm 브라우저 데몬으로 실행 (CRAWL_CYCLE_LIMIT 루프를 데몬 안에서 처리)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=os.environ.get("CRAWL_PROFILE", "0") == "1",
+        help="각 단계(와 Pool 워커)를 샘플링 프로파일링해 로그 옆에 folded 프로파일과 핫스팟 요약을 남김",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    opts = _parse_args(argv)
+    shard = opts.shard if opts.shard and opts.shard[1] > 1 else None
+    log_path = BASE / f"daily_crawl.shard-{shard[0]}-of-{shard[1]}.log" if shard else LOG_PATH
+    _attach_file_log(log_path)
+    profile_dir = None
+    if opts.profile:
+        profile_dir = log_path.with_suffix(".profile")
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        for old in profile_dir.glob("*.folded"):
+            old.unlink()
+
     start_iso = datetime.datetime.now().isoformat()
     logger.info(color(f"=== daily_crawl 시작 @ {start_iso} ===", C.BOLD))
     if not CRAW_DIR.exists():
@@ -208,8 +285,37 @@ def main():
 
     success, failed = [], []
     skipped = []
+    last_status = None
+    pipeline = [(name, path, []) for name, path in PIPELINE]
+    cycle_limit = CYCLE_LIMIT
     run_category, last_category_dt = _should_run_category()
-    if run_category:
+    if opts.merge_shards:
+        pipeline = [("merge", MERGE_SCRIPT, ["merge", "--shards", str(opts.merge_shards)])]
+        cycle_limit = 1
+        logger.info(color(f"샤드 병합 모드: {opts.merge_shards}개 샤드 출력을 병합합니다", C.DIM))
+    elif opts.daemon:
+        # 루프마다 프로세스/브라우저를 새로 띄우지 않고, 데몬 한 번에 cycle 작업 N개를 처리한다
+        daemon_args = [
+            "serve",
+            "--cycles", str(CYCLE_LIMIT),
+            "--cycle-delay", str(CYCLE_DELAY),
+            "--exit-when-done",
+        ]
+        pipeline = [
+            (name, DAEMON_SCRIPT, daemon_args) if name == "items" else (name, path, args)
+            for name, path, args in pipeline
+        ]
+        cycle_limit = 1
+        logger.info(color(f"데몬 모드: 아이템 단계 {CYCLE_LIMIT}회 루프를 warm 브라우저로 실행", C.DIM))
+    elif shard:
+        # 샤드 실행은 커밋된 카테고리 목록을 그대로 사용해야 러너 간 링크 분할이 일치한다
+        run_category = False
+        pipeline = [
+            (name, path, ["--shard", f"{shard[0]}/{shard[1]}"] if name == "items" else [])
+            for name, path, _ in pipeline
+        ]
+        logger.info(color(f"샤드 모드 {shard[0]}/{shard[1]}: 카테고리 단계는 건너뜁니다", C.DIM))
+    elif run_category:
         logger.info(color("카테고리 스크립트 실행 예정 (주기 조건 충족)", C.DIM))
     else:
         last_desc = (
@@ -225,9 +331,9 @@ def main():
             )
         )
 
-    for cycle in range(1, CYCLE_LIMIT + 1):
-        logger.info(color(f"=== 🔁 크롤 루프 {cycle}/{CYCLE_LIMIT} 시작 ===", C.BOLD))
-        for stage_name, script_path in PIPELINE:
+    for cycle in range(1, cycle_limit + 1):
+        logger.info(color(f"=== 🔁 크롤 루프 {cycle}/{cycle_limit} 시작 ===", C.BOLD))
+        for stage_name, script_path, stage_args in pipeline:
             if stage_name == "category" and not run_category:
                 label = f"{stage_name}#{cycle}: {script_path.name}"
                 skipped.append(label)
@@ -238,18 +344,54 @@ def main():
                     )
                 )
                 continue
-            ok = run_script(script_path, SCRIPT_TIMEOUT, MAX_RETRIES)
+            ok = run_script(
+                script_path, SCRIPT_TIMEOUT, MAX_RETRIES, args=stage_args,
+                profile_dir=profile_dir, profile_stage=f"{stage_name}#{cycle}",
+            )
             label = f"{stage_name}#{cycle}: {script_path.name}"
             if ok:
                 success.append(label)
             else:
                 failed.append(label)
-        status = _read_item_status()
+        status = _read_item_status(shard)
         if status:
+            last_status = status
             remaining = status.get("pending_links")
             processed = status.get("processed_links")
             logger.info(color(f"상태 요약: 신규 {processed}, 대기 {remaining}", C.BLUE))
-        if cycle < CYCLE_LIMIT and CYCLE_DELAY:
+            if status.get("changed_parts") is not None:
+                logger.info(color(
+                    f"변경된 결과 파트: {status.get('changed_parts')}개 "
+                    f"({(status.get('changed_bytes') or 0) / 1024:.1f} KiB)",
+                    C.BLUE,
+                ))
+            if status.get("fingerprint_checked"):
+                logger.info(color(
+                    f"목록 지문 적중: {status.get('fingerprint_hits')}/{status.get('fingerprint_checked')} "
+                    f"({(status.get('fingerprint_hit_rate') or 0):.1%})",
+                    C.BLUE,
+                ))
+            if status.get("negative_cached"):
+                logger.info(color(
+                    f"네거티브 캐시: 건너뜀 {status.get('negative_skipped')}개 "
+                    f"(약 {status.get('negative_saved_s')}s 절약), 신규 {status.get('negative_new')}개, "
+                    f"누적 {status.get('negative_cached')}개",
+                    C.BLUE,
+                ))
+            if status.get("links_per_sec"):
+                logger.info(color(
+                    f"실행기 {status.get('executor')}: {status.get('links_per_sec')} 링크/초, "
+                    f"파이썬 RSS {status.get('executor_rss_mb')}MB (워커당 {status.get('executor_rss_per_worker_mb')}MB), "
+                    f"스케줄 {status.get('schedule')} 꼬리 {status.get('tail_s')}s",
+                    C.BLUE,
+                ))
+            if status.get("cache_requests"):
+                logger.info(color(
+                    f"브라우저 캐시 적중: {status.get('cache_hits')}/{status.get('cache_requests')} 요청 "
+                    f"({(status.get('cache_hit_ratio') or 0):.1%}), 절약 {status.get('cache_saved_mb')}MB",
+                    C.BLUE,
+                ))
+        if cycle < cycle_limit and CYCLE_DELAY:
             logger.info(color(f"{CYCLE_DELAY}s 대기 후 다음 루프 진행", C.DIM))
             time.sleep(CYCLE_DELAY)
 
@@ -266,7 +408,15 @@ def main():
         logger.info(color(f"건너뜀: {len(skipped)}", C.YELLOW))
         for entry in skipped:
             logger.info(color(f"  ➖ {entry}", C.YELLOW))
-    logger.info(color(f"로그 파일: {LOG_PATH}", C.BLUE))
+    logger.info(color(f"로그 파일: {log_path}", C.BLUE))
+    profile_summary = None
+    if profile_dir is not None:
+        profile_summary = crawl_profiler.summarize(profile_dir, PROFILE_TOP_N)
+        logger.info(color(f"프로파일: {profile_dir} (folded 파일 {len(profile_summary['files'])}개)", C.BLUE))
+        for kind, seconds in profile_summary["categories"].items():
+            logger.info(color(f"  ⏱ {kind}: {seconds}s", C.BLUE))
+        for rank, (leaf, _, seconds, kind) in enumerate(profile_summary["hotspots"][:5], start=1):
+            logger.info(color(f"  🔥 {rank}. {seconds}s [{kind}] {leaf}", C.BLUE))
     logger.info(color(f"=== daily_crawl 종료 @ {end_iso} ===", C.BOLD))
 
     # GitHub Actions Step Summary 작성(있을 경우)
@@ -279,6 +429,43 @@ def main():
     ]
     if skipped:
         md.append(f"- Skipped: {len(skipped)}")
+    if last_status and last_status.get("changed_parts") is not None:
+        md.append(
+            f"- Changed shards: {last_status.get('changed_parts')} "
+            f"({(last_status.get('changed_bytes') or 0) / 1024:.1f} KiB)"
+        )
+    if last_status and last_status.get("fingerprint_checked"):
+        md.append(
+            f"- Unchanged list pages: {last_status.get('fingerprint_hits')}/{last_status.get('fingerprint_checked')} "
+            f"({(last_status.get('fingerprint_hit_rate') or 0):.1%} hit rate)"
+        )
+    if last_status and last_status.get("negative_cached"):
+        md.append(
+            f"- Dead links skipped: {last_status.get('negative_skipped')} "
+            f"(~{last_status.get('negative_saved_s')}s saved, {last_status.get('negative_cached')} cached)"
+        )
+    if last_status and last_status.get("links_per_sec"):
+        md.append(
+            f"- Executor: {last_status.get('executor')} x{last_status.get('executor_workers')}, "
+            f"{last_status.get('links_per_sec')} links/s, Python RSS {last_status.get('executor_rss_mb')} MB "
+            f"({last_status.get('executor_rss_per_worker_mb')} MB/worker), "
+            f"schedule {last_status.get('schedule')}, tail {last_status.get('tail_s')}s"
+        )
+    if last_status and last_status.get("cache_requests"):
+        md.append(
+            f"- Browser cache: {last_status.get('cache_hits')}/{last_status.get('cache_requests')} requests "
+            f"({(last_status.get('cache_hit_ratio') or 0):.1%} hit rate), "
+            f"{last_status.get('cache_saved_mb')} MB saved, {last_status.get('cache_fetched_mb')} MB fetched"
+        )
+    browser_memory = (last_status or {}).get("browser_memory") or {}
+    if browser_memory:
+        md.append("### Browser memory")
+        md.append("| worker | pages | peak RSS (MB) | recycles |")
+        md.append("|---|---:|---:|---:|")
+        for name, info in sorted(browser_memory.items()):
+            md.append(f"| {name} | {info.get('pages')} | {info.get('peak_rss_mb')} | {info.get('recycles')} |")
+    if profile_summary and profile_summary["files"]:
+        md += crawl_profiler.summary_markdown(profile_summary, title=f"Profile hotspots (top {PROFILE_TOP_N})")
     if success:
         md.append("### Succeeded")
         md += [f"- {entry}" for entry in success]